@@ -0,0 +1,160 @@
+import os
+import shutil
+import time
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.utils import timezone
+from posts.models import Like
+
+# Каталог з версіями моделі; файл CURRENT містить назву актуальної версії
+COLLABORATIVE_MODEL_DIR = getattr(
+    settings, 'COLLABORATIVE_MODEL_DIR', os.path.join(settings.BASE_DIR, 'ml_models', 'collaborative')
+)
+# Параметри implicit ALS (Hu, Koren, Volinsky): розмірність факторів, ітерації, регуляризація,
+# та alpha - наскільки лайк впевненіший за відсутність взаємодії (confidence = 1 + alpha)
+COLLABORATIVE_FACTORS = getattr(settings, 'COLLABORATIVE_FACTORS', 64)
+COLLABORATIVE_ITERATIONS = getattr(settings, 'COLLABORATIVE_ITERATIONS', 10)
+COLLABORATIVE_REGULARIZATION = getattr(settings, 'COLLABORATIVE_REGULARIZATION', 0.1)
+COLLABORATIVE_ALPHA = getattr(settings, 'COLLABORATIVE_ALPHA', 40.0)
+# Як часто воркер перевіряє, чи не з'явилась нова версія моделі (секунди)
+MODEL_RELOAD_INTERVAL = 60
+# Скільки версій зберігається на диску (старі можуть ще читатися воркерами)
+MODEL_VERSIONS_KEPT = 2
+
+CURRENT_FILE = 'CURRENT'
+
+
+def load_like_matrix():
+    """
+    Матриця лайків користувач x пост (1 - лайк) та відсортовані id її рядків і стовпчиків.
+    """
+    pairs = np.array(list(Like.objects.values_list('user_id', 'post_id')), dtype=np.int64).reshape(-1, 2)
+    user_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    post_ids, cols = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float64), (rows, cols)), shape=(len(user_ids), len(post_ids))
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return user_ids, post_ids, matrix
+
+
+def als_step(interactions, fixed, regularization, alpha):
+    """
+    Один напівкрок ALS: при фіксованих факторах fixed (стовпчиків interactions) точно розв'язує
+    (Yᵀ C_u Y + λI) x_u = Yᵀ C_u p_u для кожного рядка. Yᵀ Y спільний для всіх рядків, тож
+    для рядка додається лише внесок його лайків: alpha * Y_Iᵀ Y_I.
+    """
+    factors = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(factors)
+    solved = np.zeros((interactions.shape[0], factors))
+    for row in range(interactions.shape[0]):
+        items = interactions.indices[interactions.indptr[row]:interactions.indptr[row + 1]]
+        if not len(items):
+            continue
+        liked = fixed[items]
+        solved[row] = np.linalg.solve(gram + alpha * (liked.T @ liked), (1 + alpha) * liked.sum(axis=0))
+    return solved
+
+
+def train_als(matrix, factors=COLLABORATIVE_FACTORS, iterations=COLLABORATIVE_ITERATIONS,
+              regularization=COLLABORATIVE_REGULARIZATION, alpha=COLLABORATIVE_ALPHA, seed=0):
+    """
+    Навчає implicit ALS на матриці лайків. Повертає (фактори користувачів, фактори постів) у float32.
+    """
+    rng = np.random.default_rng(seed)
+    item_factors = rng.normal(scale=0.01, size=(matrix.shape[1], factors))
+    transposed = matrix.T.tocsr()
+    user_factors = np.zeros((matrix.shape[0], factors))
+    for _ in range(iterations):
+        user_factors = als_step(matrix, item_factors, regularization, alpha)
+        item_factors = als_step(transposed, user_factors, regularization, alpha)
+    return user_factors.astype(np.float32), item_factors.astype(np.float32)
+
+
+def save_model(user_ids, post_ids, user_factors, item_factors, directory=COLLABORATIVE_MODEL_DIR):
+    """
+    Записує нову версію моделі в окремий підкаталог і атомарно перемикає на неї CURRENT,
+    тож воркери ніколи не читають наполовину записані файли.
+    """
+    version = timezone.now().strftime('%Y%m%d%H%M%S')
+    path = os.path.join(directory, version)
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'user_ids.npy'), user_ids.astype(np.int64))
+    np.save(os.path.join(path, 'post_ids.npy'), post_ids.astype(np.int64))
+    np.save(os.path.join(path, 'user_factors.npy'), user_factors.astype(np.float32))
+    np.save(os.path.join(path, 'item_factors.npy'), item_factors.astype(np.float32))
+
+    pointer = os.path.join(directory, CURRENT_FILE)
+    with open(f'{pointer}.tmp', 'w') as pointer_file:
+        pointer_file.write(version)
+    os.replace(f'{pointer}.tmp', pointer)
+
+    versions = sorted(name for name in os.listdir(directory) if name.isdigit())
+    for old in versions[:-MODEL_VERSIONS_KEPT]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return version
+
+
+class CollaborativeModel:
+    """
+    Навчена модель, відкрита через memory map: масиви не копіюються в пам'ять кожного воркера,
+    а читаються зі спільного кешу сторінок ОС.
+    """
+
+    def __init__(self, path, version):
+        self.version = version
+        self.user_ids = np.load(os.path.join(path, 'user_ids.npy'), mmap_mode='r')
+        self.post_ids = np.load(os.path.join(path, 'post_ids.npy'), mmap_mode='r')
+        self.user_factors = np.load(os.path.join(path, 'user_factors.npy'), mmap_mode='r')
+        self.item_factors = np.load(os.path.join(path, 'item_factors.npy'), mmap_mode='r')
+
+    def affinity(self, user_id, post_ids):
+        """
+        Передбачена схильність користувача до кожного з постів (скалярний добуток факторів).
+        Для користувачів і постів, яких не було при навчанні, повертається 0.
+        """
+        result = np.zeros(len(post_ids), dtype=np.float32)
+        row = np.searchsorted(self.user_ids, user_id)
+        if row >= len(self.user_ids) or self.user_ids[row] != user_id or not len(self.post_ids):
+            return result
+
+        positions = np.minimum(np.searchsorted(self.post_ids, post_ids), len(self.post_ids) - 1)
+        known = self.post_ids[positions] == post_ids
+        all_scores = self.item_factors @ self.user_factors[row]
+        result[known] = all_scores[positions[known]]
+        return result
+
+
+_model = None
+_checked_at = None
+
+
+def get_collaborative_model(directory=COLLABORATIVE_MODEL_DIR):
+    """
+    Повертає актуальну модель (або None, якщо її ще не навчено).
+    Наявність нової версії перевіряється не частіше, ніж раз на MODEL_RELOAD_INTERVAL секунд.
+    """
+    global _model, _checked_at
+    if _checked_at is not None and time.monotonic() - _checked_at < MODEL_RELOAD_INTERVAL:
+        return _model
+    _checked_at = time.monotonic()
+
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as pointer_file:
+            version = pointer_file.read().strip()
+    except FileNotFoundError:
+        return _model
+    if _model is None or _model.version != version:
+        _model = CollaborativeModel(os.path.join(directory, version), version)
+    return _model
+
+
+def train_and_save():
+    user_ids, post_ids, matrix = load_like_matrix()
+    if not matrix.nnz:
+        return None
+    user_factors, item_factors = train_als(matrix)
+    return save_model(user_ids, post_ids, user_factors, item_factors)
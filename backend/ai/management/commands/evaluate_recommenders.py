@@ -0,0 +1,206 @@
+import math
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from users.models import CustomUser, UserHashtag, UserHashtagBucket
+from users.hashtag_index import index_hashtags
+from users.recommendations import SocialGraph, recommend_users
+from posts.models import Post, Hashtag, Like
+from posts.ranking import recommend_posts
+
+
+def precision_recall_ndcg(recommended, relevant, k):
+    """
+    precision@k, recall@k та NDCG@k з бінарною релевантністю.
+    """
+    hits = [1 if item in relevant else 0 for item in recommended[:k]]
+    dcg = sum(hit / math.log2(rank + 2) for rank, hit in enumerate(hits))
+    idcg = sum(1 / math.log2(rank + 2) for rank in range(min(len(relevant), k)))
+    return sum(hits) / k, sum(hits) / len(relevant), dcg / idcg if idcg else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Офлайн-оцінка рекомендацій постів і користувачів на відтворюваному синтетичному графі: "
+        "частина лайків і підписок відкладається, рекомендації порівнюються з ними "
+        "(precision@K, recall@K, NDCG@K), також вимірюються p50/p95 затримки та пікова пам'ять. "
+        "Створені дані відкочуються після виміру."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help="Кількість користувачів.")
+        parser.add_argument('--communities', type=int, default=20, help="Кількість спільнот за інтересами.")
+        parser.add_argument('--hashtags', type=int, default=300, help="Розмір словника хештегів.")
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--likes-per-user', type=int, default=30)
+        parser.add_argument('--holdout', type=float, default=0.2,
+                            help="Частка лайків і підписок користувачів-оцінювачів, яка відкладається.")
+        parser.add_argument('--eval-users', type=int, default=100, help="Для скількох користувачів рахуються метрики.")
+        parser.add_argument('--k', type=int, default=10, help="Довжина списку рекомендацій.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help="Не відкочувати створені дані.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        with transaction.atomic():
+            started = time.perf_counter()
+            eval_users, held_likes, held_follows = self.build_graph(options)
+            self.stdout.write(f"Синтетичний граф побудовано за {time.perf_counter() - started:.1f} с")
+
+            started = time.perf_counter()
+            graph = SocialGraph.load()
+            self.stdout.write(f"SocialGraph завантажено за {(time.perf_counter() - started) * 1000:.0f} мс")
+
+            k = options['k']
+            self.report('пости', eval_users, held_likes, k, lambda user: [
+                post_id for post_id, _ in recommend_posts(user, k)
+            ])
+            self.report('користувачі', eval_users, held_follows, k, lambda user: [
+                user_id for user_id, _ in recommend_users(user, k, graph=graph)
+            ])
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def report(self, name, users, held_out, k, recommend):
+        metrics = []
+        latencies = []
+        tracemalloc.start()
+        try:
+            for user in users:
+                relevant = held_out.get(user.id)
+                started = time.perf_counter()
+                recommended = recommend(user)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if relevant:
+                    metrics.append(precision_recall_ndcg(recommended, relevant, k))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        precision, recall, ndcg = np.mean(metrics, axis=0) if metrics else (0.0, 0.0, 0.0)
+        p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (0.0, 0.0)
+        self.stdout.write(
+            f"{name:>12}: precision@{k}={precision:.3f} recall@{k}={recall:.3f} ndcg@{k}={ndcg:.3f} "
+            f"p50={p50:.1f} мс p95={p95:.1f} мс пік пам'яті={peak / 2 ** 20:.1f} МБ ({len(metrics)} користувачів)"
+        )
+
+    def build_graph(self, options):
+        """
+        Користувачі розбиті на спільноти зі своїми хештегами; підписки та лайки здебільшого
+        всередині спільноти. Для користувачів-оцінювачів частка лайків і підписок не записується
+        в базу, а повертається як очікувані відповіді.
+        """
+        rng = self.rng
+        run_id = uuid.uuid4().hex[:8]
+        user_count = options['users']
+
+        tag_names = [f'#eval_{run_id}_{index}' for index in range(options['hashtags'])]
+        post_tags = Hashtag.objects.bulk_create([Hashtag(name=name) for name in tag_names])
+        user_tags = UserHashtag.objects.bulk_create([UserHashtag(name=name) for name in tag_names])
+        index_hashtags(user_tags, UserHashtagBucket)
+        topics = [rng.sample(range(len(tag_names)), 5) for _ in range(options['communities'])]
+
+        users = CustomUser.objects.bulk_create(
+            [
+                CustomUser(email=f'eval_{run_id}_{index}@example.com', display_name=f'eval_{run_id}_{index}',
+                           password='!', photo='')
+                for index in range(user_count)
+            ],
+            batch_size=5000,
+        )
+        community = [rng.randrange(options['communities']) for _ in users]
+        members = {}
+        for position, group in enumerate(community):
+            members.setdefault(group, []).append(position)
+
+        UserHashtags = CustomUser.hashtags.through
+        UserHashtags.objects.bulk_create(
+            [
+                UserHashtags(customuser_id=users[position].id, userhashtag_id=user_tags[tag].id)
+                for position in range(user_count)
+                for tag in {*rng.sample(topics[community[position]], 3), rng.randrange(len(tag_names))}
+            ],
+            batch_size=5000,
+        )
+
+        posts = Post.objects.bulk_create(
+            [
+                Post(author=users[position], content=f'eval post {run_id}')
+                for position in range(user_count)
+                for _ in range(options['posts_per_user'])
+            ],
+            batch_size=5000,
+        )
+        post_community = [community[index // options['posts_per_user']] for index in range(len(posts))]
+        posts_by_community = {}
+        for index, group in enumerate(post_community):
+            posts_by_community.setdefault(group, []).append(index)
+
+        PostHashtags = Post.hashtags.through
+        PostHashtags.objects.bulk_create(
+            [
+                PostHashtags(post_id=post.id, hashtag_id=post_tags[tag].id)
+                for index, post in enumerate(posts)
+                for tag in {*rng.sample(topics[post_community[index]], 2), rng.randrange(len(tag_names))}
+            ],
+            batch_size=5000,
+        )
+        # Пости рівномірно розподілені за останні 30 днів (created_at виставляється при вставці)
+        now = timezone.now()
+        by_age = {}
+        for post in posts:
+            by_age.setdefault(rng.randrange(30), []).append(post.id)
+        for days, post_ids in by_age.items():
+            Post.objects.filter(id__in=post_ids).update(created_at=now - timedelta(days=days, hours=rng.random()))
+
+        eval_positions = set(rng.sample(range(user_count), min(options['eval_users'], user_count)))
+        held_follows, held_likes = {}, {}
+
+        Subscriptions = CustomUser.subscriptions.through
+        follows = []
+        for position in range(user_count):
+            same = members[community[position]]
+            targets = set()
+            for _ in range(options['follows_per_user']):
+                pool = same if rng.random() < 0.8 else range(user_count)
+                target = rng.choice(pool)
+                if target != position:
+                    targets.add(target)
+            for target in targets:
+                if position in eval_positions and rng.random() < options['holdout']:
+                    held_follows.setdefault(users[position].id, set()).add(users[target].id)
+                else:
+                    follows.append(Subscriptions(from_customuser_id=users[position].id, to_customuser_id=users[target].id))
+        Subscriptions.objects.bulk_create(follows, batch_size=5000)
+
+        likes = []
+        likes_count = [0] * len(posts)
+        for position in range(user_count):
+            same = posts_by_community[community[position]]
+            liked = set()
+            for _ in range(options['likes_per_user']):
+                pool = same if rng.random() < 0.7 else range(len(posts))
+                liked.add(rng.choice(pool))
+            for index in liked:
+                if position in eval_positions and rng.random() < options['holdout']:
+                    held_likes.setdefault(users[position].id, set()).add(posts[index].id)
+                else:
+                    likes.append(Like(user_id=users[position].id, post_id=posts[index].id, liked_at=now))
+                    likes_count[index] += 1
+        Like.objects.bulk_create(likes, batch_size=5000)
+        # bulk_create не надсилає сигнали, тому денормалізовані лічильники виставляємо явно
+        for post, count in zip(posts, likes_count):
+            post.likes_count = count
+        Post.objects.bulk_update(posts, ['likes_count'], batch_size=5000)
+
+        eval_users = [users[position] for position in sorted(eval_positions)]
+        return eval_users, held_likes, held_follows
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0005_recommendation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recommendation',
+            name='kind',
+            field=models.CharField(choices=[('post', 'Пости'), ('user', 'Користувачі'), ('people', 'Люди, яких ви можете знати')], max_length=10),
+        ),
+    ]
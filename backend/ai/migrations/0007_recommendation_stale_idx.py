@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0006_alter_recommendation_kind'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recommendation',
+            index=models.Index(condition=models.Q(('is_stale', True)), fields=['kind', 'user'], name='recommendation_stale_idx'),
+        ),
+    ]
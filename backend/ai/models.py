@@ -88,4 +88,36 @@ class Lyrics(models.Model):
 
     class Meta:
         verbose_name = "Lyrics"
-        verbose_name_plural = "Lyrics"
\ No newline at end of file
+        verbose_name_plural = "Lyrics"
+
+class Recommendation(models.Model):
+    """
+    Попередньо обчислений ранжований список рекомендацій користувача.
+    Оновлюється періодичною задачею ai.tasks.generate_recommendations_periodically,
+    а списки, застарілі після подій, що змінюють рекомендації (is_stale=True), -
+    задачею ai.tasks.refresh_stale_recommendations.
+    """
+    KINDS = (
+        ('post', 'Пости'),
+        ('user', 'Користувачі'),
+        ('people', 'Люди, яких ви можете знати'),
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="recommendations"
+    )
+    kind = models.CharField(max_length=10, choices=KINDS)
+    items = models.JSONField(default=list, blank=True)  # [[id, оцінка], ...] від найкращих
+    is_stale = models.BooleanField(default=False)  # Список застарів і чекає на перерахунок
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'kind')
+        indexes = [
+            # Частковий індекс лише по застарілих списках для refresh_stale_recommendations
+            models.Index(fields=['kind', 'user'], condition=models.Q(is_stale=True), name='recommendation_stale_idx'),
+        ]
+
+    def __str__(self):
+        return f"Recommendation ({self.kind}) for {self.user_id}"
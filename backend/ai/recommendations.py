@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from posts.ranking import recommend_posts
+from users.recommendations import popular_users
+from users.friend_suggestions import friends_of_friends
+from .models import Recommendation
+
+# Скільки найкращих постів і користувачів зберігається в попередньо обчисленому списку
+RECOMMENDED_POSTS_STORED = getattr(settings, 'RECOMMENDED_POSTS_STORED', 200)
+RECOMMENDED_USERS_STORED = getattr(settings, 'RECOMMENDED_USERS_STORED', 50)
+PEOPLE_YOU_MAY_KNOW_STORED = getattr(settings, 'PEOPLE_YOU_MAY_KNOW_STORED', 50)
+
+
+def get_stored_recommendations(user_id, kind):
+    """
+    Повертає збережений список [[id, оцінка], ...] або None, якщо для користувача ще нічого не обчислено.
+    Застарілий список теж повертається: він віддається, поки триває перерахунок.
+    """
+    return Recommendation.objects.filter(user_id=user_id, kind=kind).values_list('items', flat=True).first()
+
+
+def store_recommendations(kind, items_by_user, is_stale=False):
+    """
+    Зберігає (вставляє або перезаписує) списки рекомендацій {user_id: [(id, оцінка), ...]} одним запитом.
+    is_stale задається лише новим рядкам, в існуючих не змінюється: його знімає claim_stale_recommendations
+    до обчислення, тож подія, що сталася під час обчислення, знову позначить список застарілим і не загубиться.
+    """
+    now = timezone.now()
+    Recommendation.objects.bulk_create(
+        [
+            Recommendation(
+                user_id=user_id, kind=kind, items=[list(item) for item in items], is_stale=is_stale, generated_at=now,
+            )
+            for user_id, items in items_by_user.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'kind'],
+        update_fields=['items', 'generated_at'],
+    )
+
+
+def get_post_recommendations(user):
+    items = get_stored_recommendations(user.id, 'post')
+    if items is None:
+        # Новий користувач: рахуємо наживо один раз, далі список оновлює Celery
+        items = recommend_posts(user, RECOMMENDED_POSTS_STORED)
+        store_recommendations('post', {user.id: items})
+    return items
+
+
+def get_user_recommendations(user):
+    items = get_stored_recommendations(user.id, 'user')
+    if items is None:
+        # Новий користувач: популярні кандидати одним запитом, а повний список за графом
+        # дорахує refresh_stale_recommendations - граф у запиті не завантажується
+        items = popular_users(user, RECOMMENDED_USERS_STORED)
+        store_recommendations('user', {user.id: items}, is_stale=True)
+    return items
+
+
+def get_people_recommendations(user):
+    items = get_stored_recommendations(user.id, 'people')
+    if items is None:
+        # Новий користувач: друзі друзів одним запитом, а повний список з personalized PageRank
+        # дорахує refresh_stale_recommendations - граф підписок у запиті не завантажується
+        items = friends_of_friends(user, PEOPLE_YOU_MAY_KNOW_STORED)
+        store_recommendations('people', {user.id: items}, is_stale=True)
+    return items
+
+
+def invalidate_recommendations(user_ids, kinds=('post', 'user', 'people')):
+    """
+    Позначає списки користувачів застарілими. Перераховує їх пачками періодична задача
+    ai.tasks.refresh_stale_recommendations, а не окрема задача на кожну подію:
+    ознаки постів і граф завантажуються один раз на всіх, чиї списки застаріли за інтервал.
+    """
+    Recommendation.objects.filter(user_id__in=user_ids, kind__in=kinds, is_stale=False).update(is_stale=True)
+
+
+def claim_stale_recommendations(user_ids, kind):
+    """
+    Знімає прапорець is_stale з тих списків user_ids виду kind, які ще застарілі, і повертає id їх власників.
+    Рядки блокуються з SKIP LOCKED, тож пачка, запланована двічі, перерахується лише один раз.
+    """
+    with transaction.atomic():
+        claimed = list(
+            Recommendation.objects.select_for_update(skip_locked=True)
+            .filter(user_id__in=user_ids, kind=kind, is_stale=True)
+            .values_list('user_id', flat=True)
+        )
+        Recommendation.objects.filter(user_id__in=claimed, kind=kind).update(is_stale=False)
+    return claimed
@@ -0,0 +1,32 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+from users.models import CustomUser
+from .recommendations import invalidate_recommendations
+
+
+def changed_user_ids(instance, reverse, pk_set):
+    """
+    Користувачі, у яких змінився зв'язок: instance при прямій зміні (user.subscriptions.add),
+    pk_set при зворотній (user.subscribers.add).
+    """
+    return list(pk_set) if reverse else [instance.id]
+
+
+@receiver(m2m_changed, sender=CustomUser.subscriptions.through)
+def invalidate_on_subscription_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # Підписки впливають на оцінку постів (автори), рекомендації користувачів (спільні підписки)
+    # і "людей, яких ви можете знати" (граф підписок)
+    if action in ('post_add', 'post_remove') and pk_set:
+        invalidate_recommendations(changed_user_ids(instance, reverse, pk_set))
+
+
+@receiver(m2m_changed, sender=CustomUser.hashtags.through)
+def invalidate_on_hashtags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        invalidate_recommendations([instance.id])
+
+
+@receiver(m2m_changed, sender=CustomUser.ignored_users.through)
+def invalidate_on_ignore(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and pk_set:
+        invalidate_recommendations(changed_user_ids(instance, reverse, pk_set), kinds=('user', 'people'))
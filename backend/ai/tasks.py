@@ -0,0 +1,98 @@
+from itertools import chain
+
+from celery import group, shared_task
+from django.conf import settings
+from django.utils import timezone
+from posts.models import Post
+from posts.ranking import load_post_features, load_user_profiles, load_hashtag_ids, rank_posts, SPECIAL_HASHTAG
+from posts.tasks import chunked
+from users.models import CustomUser
+from users.follow_graph import FollowGraph
+from users.recommendations import recommend_users, SocialGraph
+from users.friend_suggestions import suggest_people
+from .models import Recommendation
+from .recommendations import (
+    store_recommendations, claim_stale_recommendations,
+    RECOMMENDED_POSTS_STORED, RECOMMENDED_USERS_STORED, PEOPLE_YOU_MAY_KNOW_STORED,
+)
+from .collaborative import get_collaborative_model, train_and_save
+
+# Скільки користувачів обробляє одна задача перерахунку рекомендацій
+RECOMMENDATION_BATCH_SIZE = getattr(settings, 'RECOMMENDATION_BATCH_SIZE', 500)
+RECOMMENDATION_KINDS = tuple(kind for kind, _ in Recommendation.KINDS)
+
+
+@shared_task
+def generate_recommendations_periodically(batch_size=RECOMMENDATION_BATCH_SIZE):
+    """
+    Перераховує рекомендації всіх активних користувачів: розбиває їх на пачки
+    і запускає по задачі на пачку, тож пачки обробляються воркерами паралельно.
+    """
+    user_ids = list(CustomUser.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+    group(generate_recommendations_for_users.s(batch) for batch in chunked(user_ids, batch_size)).apply_async()
+    return len(user_ids)
+
+
+@shared_task
+def refresh_stale_recommendations(batch_size=RECOMMENDATION_BATCH_SIZE):
+    """
+    Перераховує списки, позначені застарілими (ai.recommendations.invalidate_recommendations).
+    Пачки формуються окремо для кожного виду, тож пачка завантажує лише дані, потрібні цьому виду.
+    """
+    batches = []
+    for kind in RECOMMENDATION_KINDS:
+        user_ids = list(
+            Recommendation.objects.filter(kind=kind, is_stale=True).order_by('user_id').values_list('user_id', flat=True)
+        )
+        batches.extend(refresh_recommendations_for_users.s(batch, kind) for batch in chunked(user_ids, batch_size))
+    if batches:
+        group(batches).apply_async()
+    return len(batches)
+
+
+@shared_task
+def refresh_recommendations_for_users(user_ids, kind):
+    claimed = claim_stale_recommendations(user_ids, kind)
+    if claimed:
+        generate_recommendations_for_users(claimed, [kind])
+    return len(claimed)
+
+
+@shared_task
+def generate_recommendations_for_users(user_ids, kinds=RECOMMENDATION_KINDS):
+    """
+    Обчислює та зберігає списки рекомендацій видів kinds (пости, користувачі, "люди, яких ви можете знати")
+    для пачки користувачів. Ознаки постів, профілі користувачів і граф підписок завантажуються
+    один раз на всю пачку і лише для потрібних видів.
+    """
+    if 'post' in kinds:
+        now = timezone.now()
+        features = load_post_features(Post.objects.all())
+        profiles = load_user_profiles(user_ids)
+        hashtag_ids = load_hashtag_ids(chain([SPECIAL_HASHTAG], *(profile.tag_names for profile in profiles.values())))
+        model = get_collaborative_model()
+        store_recommendations('post', {
+            user_id: rank_posts(features, profile, hashtag_ids, now, RECOMMENDED_POSTS_STORED, model=model)
+            for user_id, profile in profiles.items()
+        })
+
+    if 'user' not in kinds and 'people' not in kinds:
+        return
+    follow_graph = FollowGraph.load()
+    users = CustomUser.objects.in_bulk(user_ids)
+    if 'user' in kinds:
+        graph = SocialGraph.load(follow_graph)
+        store_recommendations('user', {
+            user_id: recommend_users(user, RECOMMENDED_USERS_STORED, graph=graph)
+            for user_id, user in users.items()
+        })
+    if 'people' in kinds:
+        store_recommendations('people', suggest_people(list(users), PEOPLE_YOU_MAY_KNOW_STORED, graph=follow_graph))
+
+
+@shared_task
+def train_collaborative_model():
+    """
+    Перенавчає implicit ALS на всій матриці лайків і публікує нову версію факторів для воркерів.
+    """
+    return train_and_save()
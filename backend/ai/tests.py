@@ -0,0 +1,74 @@
+from django.test import TestCase
+from users.models import CustomUser
+from .models import Recommendation
+from .recommendations import (
+    claim_stale_recommendations, get_user_recommendations, invalidate_recommendations, store_recommendations,
+)
+from .tasks import refresh_recommendations_for_users
+
+
+def create_user(name):
+    return CustomUser.objects.create_user(
+        email=f'{name}@example.com', display_name=name, password='TestPassword123!'
+    )
+
+
+class StaleRecommendationsTest(TestCase):
+    def setUp(self):
+        self.user = create_user('recommended_reader')
+        self.popular = create_user('recommended_popular')
+        self.other = create_user('recommended_other')
+        self.other.subscribe(self.popular)
+
+    def is_stale(self, user, kind):
+        return Recommendation.objects.get(user=user, kind=kind).is_stale
+
+    def test_new_user_gets_sql_fallback_stored_as_stale(self):
+        items = get_user_recommendations(self.user)
+        self.assertEqual(items, [(self.popular.id, 1.0)])
+        self.assertTrue(self.is_stale(self.user, 'user'))
+        # Повторне читання віддає збережений список, а не рахує його знову
+        self.assertEqual(get_user_recommendations(self.user), [[self.popular.id, 1.0]])
+
+    def test_stale_list_is_claimed_once_and_refreshed(self):
+        get_user_recommendations(self.user)
+        self.assertEqual(refresh_recommendations_for_users([self.user.id], 'user'), 1)
+        self.assertFalse(self.is_stale(self.user, 'user'))
+        refreshed = Recommendation.objects.get(user=self.user, kind='user').items
+        self.assertEqual({user_id for user_id, _ in refreshed}, {self.popular.id, self.other.id})
+        # Пачка, запланована вдруге, нічого не перераховує
+        self.assertEqual(refresh_recommendations_for_users([self.user.id], 'user'), 0)
+
+    def test_claim_returns_only_stale_rows_of_kind(self):
+        store_recommendations('user', {self.user.id: [], self.other.id: []}, is_stale=True)
+        store_recommendations('post', {self.user.id: []}, is_stale=True)
+        self.assertEqual(sorted(claim_stale_recommendations([self.user.id, self.other.id], 'user')),
+                         sorted([self.user.id, self.other.id]))
+        self.assertEqual(claim_stale_recommendations([self.user.id, self.other.id], 'user'), [])
+        self.assertTrue(self.is_stale(self.user, 'post'))
+
+    def test_store_updates_items_without_touching_stale_flag(self):
+        store_recommendations('user', {self.user.id: [(self.other.id, 0.5)]})
+        invalidate_recommendations([self.user.id], kinds=('user',))
+        # Подія під час обчислення: збережений результат не знімає позначку
+        store_recommendations('user', {self.user.id: [(self.popular.id, 0.9)]})
+        recommendation = Recommendation.objects.get(user=self.user, kind='user')
+        self.assertEqual(recommendation.items, [[self.popular.id, 0.9]])
+        self.assertTrue(recommendation.is_stale)
+        self.assertEqual(Recommendation.objects.filter(user=self.user).count(), 1)
+
+    def test_subscription_and_ignore_mark_lists_stale(self):
+        store_recommendations('user', {self.user.id: [], self.popular.id: []})
+        store_recommendations('post', {self.user.id: [], self.popular.id: []})
+        self.user.subscribe(self.popular)
+        # Підписка змінює списки обох сторін і всіх видів
+        for user in (self.user, self.popular):
+            self.assertTrue(self.is_stale(user, 'user'))
+            self.assertTrue(self.is_stale(user, 'post'))
+
+        store_recommendations('post', {self.other.id: []})
+        store_recommendations('user', {self.other.id: []})
+        self.other.ignored_users.add(self.user)
+        # Ігнор не впливає на рекомендації постів
+        self.assertTrue(self.is_stale(self.other, 'user'))
+        self.assertFalse(self.is_stale(self.other, 'post'))
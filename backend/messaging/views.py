@@ -9,8 +9,8 @@ from django.contrib.auth import get_user_model
 from .models import ChatRoom, Message, Reaction
 from .serializers import ChatRoomSerializer, MessageSerializer, ChatRoomAvatarSerializer, ReactionSerializer
 from rest_framework.permissions import IsAuthenticated
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from django.db import transaction
+from posts.outbox import publish_event
 
 class ChatRoomView(APIView):
     permission_classes = [IsAuthenticated]  # Доступ лише для автентифікованих користувачів
@@ -139,29 +139,29 @@ class MessageView(APIView):
         
         serializer = MessageSerializer(data=data)
         if serializer.is_valid():
-            message_obj = serializer.save()
-            
-            #ЦЕ ДЛЯ БЕКЕНДЕРОВ
-            # Підрахунок кількості непрочитаних повідомлень.
-            # Поточна реалізація рахує всі повідомлення в чаті,
-            # окрім повідомлень, надісланих поточним користувачем.
-            # При необхідності, варто імплементувати механізм відстеження прочитаних повідомлень.
-            unread_count = Message.objects.filter(chat=chat_room).exclude(sender=request.user).count()
-            
-            # Надсилання створеного повідомлення через веб-сокети.
-            # Використовуємо channel layer і групу з іменем "chat_<room_id>".
-            channel_layer = get_channel_layer()
-            group_name = f"chat_{chat_room.pk}"
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    'type': 'chat_message',
-                    'message': message_obj.content,
-                    'sender': request.user.display_name,
-                    'unread_count': unread_count,
-                }
-            )
+            with transaction.atomic():
+                message_obj = serializer.save()
+                
+                #ЦЕ ДЛЯ БЕКЕНДЕРОВ
+                # Підрахунок кількості непрочитаних повідомлень.
+                # Поточна реалізація рахує всі повідомлення в чаті,
+                # окрім повідомлень, надісланих поточним користувачем.
+                # При необхідності, варто імплементувати механізм відстеження прочитаних повідомлень.
+                unread_count = Message.objects.filter(chat=chat_room).exclude(sender=request.user).count()
+                
+                # Надсилання створеного повідомлення через веб-сокети.
+                # Подія пишеться в outbox у тій самій транзакції і відправляється в групу "chat_<room_id>" після коміту.
+                group_name = f"chat_{chat_room.pk}"
+                
+                publish_event(
+                    group_name,
+                    {
+                        'type': 'chat_message',
+                        'message': message_obj.content,
+                        'sender': request.user.display_name,
+                        'unread_count': unread_count,
+                    }
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
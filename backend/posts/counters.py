@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from users.models import CustomUser
+from .models import AuthorLikesDelta
+
+# Скільки записаних змін обробляє одна транзакція зливу
+TOTAL_LIKES_FLUSH_BATCH_SIZE = getattr(settings, 'TOTAL_LIKES_FLUSH_BATCH_SIZE', 10000)
+# Найбільша за модулем зміна в одному рядку AuthorLikesDelta (SmallIntegerField)
+AUTHOR_LIKES_DELTA_LIMIT = 32767
+
+
+def record_author_likes_change(author_id, delta):
+    AuthorLikesDelta.objects.create(author_id=author_id, delta=delta)
+
+
+def record_author_likes_changes(changes):
+    """
+    Записує зміни {author_id: delta} однією вставкою. Зміна, що не вміщується в один рядок
+    (видалення поста з десятками тисяч лайків), розбивається на кілька.
+    """
+    rows = []
+    for author_id, delta in changes.items():
+        while delta:
+            step = max(-AUTHOR_LIKES_DELTA_LIMIT, min(AUTHOR_LIKES_DELTA_LIMIT, delta))
+            rows.append(AuthorLikesDelta(author_id=author_id, delta=step))
+            delta -= step
+    AuthorLikesDelta.objects.bulk_create(rows)
+
+
+def flush_author_likes(batch_size=TOTAL_LIKES_FLUSH_BATCH_SIZE):
+    """
+    Переносить накопичені зміни в CustomUser.total_likes: сумує їх по авторах і застосовує
+    одним UPDATE total_likes = total_likes + n для всіх авторів з однаковою сумою.
+    Рядки блокуються з SKIP LOCKED, тож паралельні запуски не застосують одну зміну двічі.
+    Повертає кількість оброблених змін.
+    """
+    flushed = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                AuthorLikesDelta.objects.select_for_update(skip_locked=True)
+                .order_by('id').values_list('id', 'author_id', 'delta')[:batch_size]
+            )
+            if not rows:
+                return flushed
+
+            totals = defaultdict(int)
+            for _, author_id, delta in rows:
+                totals[author_id] += delta
+            author_ids_by_total = defaultdict(list)
+            for author_id, total in totals.items():
+                if total:
+                    author_ids_by_total[total].append(author_id)
+            for total, author_ids in author_ids_by_total.items():
+                CustomUser.objects.filter(pk__in=sorted(author_ids)).update(
+                    total_likes=Greatest(F('total_likes') + total, 0)
+                )
+            AuthorLikesDelta.objects.filter(id__in=[row[0] for row in rows]).delete()
+            flushed += len(rows)
@@ -0,0 +1,104 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from posts import ranking
+
+
+class Command(BaseCommand):
+    help = (
+        "Вимірює швидкість векторного підрахунку оцінок рекомендацій і вибору top-K "
+        "на синтетичних ознаках постів (без бази даних) та порівнює з поштучним підрахунком у Python."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help="Кількості постів-кандидатів, для яких виконується вимір.")
+        parser.add_argument('--top', type=int, default=21, help="Скільки найкращих постів вибирати (K).")
+        parser.add_argument('--tags-per-post', type=int, default=3, help="Середня кількість хештегів на пост.")
+        parser.add_argument('--python-max-posts', type=int, default=100_000,
+                            help="Поштучний підрахунок у Python виконується лише до цієї кількості постів.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        now = timezone.now()
+        self.stdout.write(f"{'постів':>10} {'ознаки, МБ':>11} {'numpy, мс':>10} {'python, мс':>11} {'збіг':>5}")
+
+        for count in options['posts']:
+            features, subscription_ids, user_tag_ids, special_tag_id = self.make_features(rng, count, options, now)
+
+            started = time.perf_counter()
+            scores = ranking.score_posts(
+                features, subscription_ids, user_tag_ids, len(user_tag_ids), special_tag_id, now
+            )
+            best = ranking.top_k(scores, features.post_ids, options['top'])
+            numpy_ms = (time.perf_counter() - started) * 1000
+
+            python_ms = '-'
+            matches = '-'
+            if count <= options['python_max_posts']:
+                started = time.perf_counter()
+                expected = self.python_top_k(
+                    features, subscription_ids, user_tag_ids, special_tag_id, now, options['top']
+                )
+                python_ms = f"{(time.perf_counter() - started) * 1000:.1f}"
+                matches = 'так' if expected == [int(features.post_ids[index]) for index in best] else 'ні'
+
+            size_mb = sum(array.nbytes for array in vars(features).values()) / 2 ** 20
+            self.stdout.write(f"{count:>10} {size_mb:>11.1f} {numpy_ms:>10.1f} {python_ms:>11} {matches:>5}")
+
+    def make_features(self, rng, count, options, now):
+        tag_vocabulary = 5000
+        post_ids = np.arange(1, count + 1, dtype=np.int64)
+        author_ids = rng.integers(1, max(count // 20, 2), size=count, dtype=np.int64)
+        likes_counts = rng.geometric(0.15, size=count).astype(np.int64)
+        created_at = now.timestamp() - rng.uniform(0, timedelta(days=60).total_seconds(), size=count)
+
+        tags_per_post = rng.poisson(options['tags_per_post'], size=count)
+        tag_rows = np.repeat(np.arange(count), tags_per_post)
+        tag_ids = rng.integers(1, tag_vocabulary, size=len(tag_rows), dtype=np.int64)
+        # Прибираємо повтори хештегу в межах одного поста, як у зв'язку many-to-many
+        unique_links = np.unique(np.stack([tag_rows, tag_ids], axis=1), axis=0)
+        features = ranking.PostFeatures(
+            post_ids, author_ids, likes_counts, created_at, unique_links[:, 0], unique_links[:, 1]
+        )
+
+        subscription_ids = rng.choice(author_ids, size=min(200, count), replace=False)
+        user_tag_ids = rng.choice(np.arange(1, tag_vocabulary), size=10, replace=False)
+        return features, subscription_ids, user_tag_ids, 1
+
+    def python_top_k(self, features, subscription_ids, user_tag_ids, special_tag_id, now, k):
+        """
+        Той самий підрахунок, що й у попередній реалізації RecommendedPostsView: пост за постом у Python.
+        """
+        subscriptions = set(subscription_ids.tolist())
+        user_tags = set(user_tag_ids.tolist())
+        post_tags = [set() for _ in range(len(features))]
+        for row, tag_id in zip(features.tag_rows.tolist(), features.tag_ids.tolist()):
+            post_tags[row].add(tag_id)
+        fresh_since = (now - ranking.FRESHNESS_PERIOD).timestamp()
+
+        recommendations = []
+        rows = zip(
+            features.post_ids.tolist(), features.author_ids.tolist(),
+            features.likes_counts.tolist(), features.created_at.tolist(), post_tags,
+        )
+        for post_id, author_id, likes_count, created_at, tags in rows:
+            score = 0.0
+            if author_id in subscriptions:
+                score += ranking.SUBSCRIPTION_WEIGHT
+            if user_tags and tags:
+                score += ranking.HASHTAG_SIMILARITY_WEIGHT * (len(user_tags & tags) / len(user_tags | tags))
+            if likes_count > ranking.POPULAR_LIKES_THRESHOLD:
+                score += ranking.POPULARITY_WEIGHT
+            if created_at >= fresh_since:
+                score += ranking.FRESHNESS_WEIGHT
+            if special_tag_id in tags:
+                score += ranking.SPECIAL_HASHTAG_WEIGHT
+            recommendations.append((score, post_id))
+
+        recommendations.sort(reverse=True)
+        return [post_id for _, post_id in recommendations[:k]]
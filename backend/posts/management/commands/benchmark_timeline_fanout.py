@@ -0,0 +1,70 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from users.models import CustomUser
+from posts.models import Post
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = (
+        "Вимірює вартість розподілу поста по домашніх стрічках залежно від кількості підписників автора. "
+        "Всі створені дані відкочуються після виміру."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--followers', type=int, nargs='+', default=[100, 1000, 10000, 50000],
+                            help="Кількості підписників, для яких виконується вимір.")
+        parser.add_argument('--threshold', type=int, default=timeline.TIMELINE_FANOUT_MAX_FOLLOWERS,
+                            help="Поріг підписників, вище якого автор переходить на pull.")
+        parser.add_argument('--posts', type=int, default=5, help="Скільки постів створювати на кожен вимір.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Поріг pull: {options['threshold']} підписників")
+        self.stdout.write(f"{'підписників':>12} {'режим':>6} {'мс/пост':>10} {'запитів/пост':>13}")
+
+        for followers in options['followers']:
+            with transaction.atomic():
+                author = self.create_audience(followers)
+                mode = 'pull' if followers > options['threshold'] else 'push'
+
+                elapsed = 0.0
+                queries = 0
+                for i in range(options['posts']):
+                    # Пост створюється без сигналів, щоб виміряти лише розподіл по стрічках
+                    post = Post(author=author, content=f'benchmark {i}')
+                    Post.objects.bulk_create([post])
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        timeline.distribute_post(post, max_followers=options['threshold'])
+                        elapsed += time.perf_counter() - started
+                    queries += len(captured)
+
+                posts = options['posts']
+                self.stdout.write(f"{followers:>12} {mode:>6} {elapsed / posts * 1000:>10.2f} {queries / posts:>13.1f}")
+                transaction.set_rollback(True)
+
+    def create_audience(self, followers):
+        run_id = uuid.uuid4().hex[:8]
+        author = CustomUser.objects.create_user(
+            email=f'bench_author_{run_id}@example.com', display_name=f'bench_author_{run_id}', password=None
+        )
+        users = CustomUser.objects.bulk_create(
+            [
+                CustomUser(email=f'bench_{run_id}_{i}@example.com', display_name=f'bench_{run_id}_{i}', photo='')
+                for i in range(followers)
+            ],
+            batch_size=5000,
+        )
+        Through = CustomUser.subscriptions.through
+        Through.objects.bulk_create(
+            [Through(from_customuser_id=user.id, to_customuser_id=author.id) for user in users],
+            batch_size=5000,
+        )
+        # bulk_create оминає сигнали, тож лічильник підписників виставляємо вручну
+        CustomUser.objects.filter(pk=author.pk).update(subscribers_count=followers)
+        author.subscribers_count = followers
+        return author
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from posts.models import Post, Like, Comment
+
+# Лічильник поста -> (модель, поле зв'язку з постом)
+COUNTERS = {
+    'likes_count': (Like, 'post'),
+    'comments_count': (Comment, 'post'),
+    'reposts_count': (Post, 'original_post'),
+}
+
+
+def actual_count(model, field):
+    subquery = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(subquery), 0)
+
+
+class Command(BaseCommand):
+    help = "Звіряє денормалізовані лічильники постів (лайки, коментарі, репости) з реальними даними та виправляє розбіжності."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Кількість постів, що перевіряються за одну транзакцію.")
+        parser.add_argument('--dry-run', action='store_true', help="Лише показати кількість розбіжностей, нічого не змінюючи.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        fixed = {field: 0 for field in COUNTERS}
+
+        last_id = 0
+        while True:
+            batch_ids = list(
+                Post.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            last_id = batch_ids[-1]
+
+            batch = Post.objects.filter(pk__gte=batch_ids[0], pk__lte=last_id).annotate(
+                **{f'actual_{field}': actual_count(model, relation) for field, (model, relation) in COUNTERS.items()}
+            )
+            drift = Q()
+            for field in COUNTERS:
+                drift |= ~Q(**{field: F(f'actual_{field}')})
+            drifted = list(batch.filter(drift).values('pk', *COUNTERS, *[f'actual_{field}' for field in COUNTERS]))
+
+            if not drifted or dry_run:
+                for row in drifted:
+                    for field in COUNTERS:
+                        if row[field] != row[f'actual_{field}']:
+                            fixed[field] += 1
+                continue
+
+            with transaction.atomic():
+                for row in drifted:
+                    changes = {
+                        field: row[f'actual_{field}']
+                        for field in COUNTERS
+                        if row[field] != row[f'actual_{field}']
+                    }
+                    for field in changes:
+                        fixed[field] += 1
+                    # Перераховуємо в UPDATE, щоб не затерти зміни, що відбулися після вибірки
+                    Post.objects.filter(pk=row['pk']).update(**{
+                        field: actual_count(*COUNTERS[field]) for field in changes
+                    })
+
+        verb = "Знайдено розбіжностей" if dry_run else "Виправлено розбіжностей"
+        for field, total in fixed.items():
+            self.stdout.write(f"{verb} у {field}: {total}")
+        self.stdout.write(self.style.SUCCESS("Звірку лічильників завершено."))
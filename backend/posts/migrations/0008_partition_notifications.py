@@ -0,0 +1,111 @@
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.db import migrations
+
+PARTITIONS_AHEAD = 2
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def bound(month):
+    return datetime.combine(month, time.min, tzinfo=dt_timezone.utc).isoformat()
+
+
+def partition_notifications(apps, schema_editor):
+    """
+    Перетворює posts_notification на таблицю, секціоновану по місяцях за timestamp.
+    Первинний ключ стає (id, timestamp), бо ключ секціонування має входити в усі унікальні обмеження;
+    id і далі генерується послідовністю, тож для Django він залишається унікальним.
+    На інших СУБД міграція нічого не робить.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('ALTER TABLE posts_notification RENAME TO posts_notification_unpartitioned')
+        cursor.execute(
+            """
+            CREATE TABLE posts_notification (
+                id bigint NOT NULL,
+                notification_type varchar(50) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                is_read boolean NOT NULL,
+                actor_id bigint NOT NULL,
+                post_id bigint NULL,
+                recipient_id bigint NOT NULL,
+                actor_count integer NOT NULL CHECK (actor_count >= 0),
+                sample_actor_ids jsonb NOT NULL,
+                push_pending boolean NOT NULL,
+                PRIMARY KEY (id, "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+            """
+        )
+        cursor.execute('CREATE TABLE posts_notification_default PARTITION OF posts_notification DEFAULT')
+
+        cursor.execute('SELECT min("timestamp"), max(id) FROM posts_notification_unpartitioned')
+        oldest, max_id = cursor.fetchone()
+        today = date.today()
+        month = date(oldest.year, oldest.month, 1) if oldest else date(today.year, today.month, 1)
+        last = add_months(date(today.year, today.month, 1), PARTITIONS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE posts_notification_y{month.year}m{month.month:02d} PARTITION OF posts_notification '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [bound(month), bound(add_months(month, 1))],
+            )
+            month = add_months(month, 1)
+
+        cursor.execute(
+            """
+            INSERT INTO posts_notification (
+                id, notification_type, "timestamp", is_read, actor_id, post_id, recipient_id,
+                actor_count, sample_actor_ids, push_pending
+            )
+            SELECT id, notification_type, "timestamp", is_read, actor_id, post_id, recipient_id,
+                   actor_count, sample_actor_ids, push_pending
+            FROM posts_notification_unpartitioned
+            """
+        )
+        # Разом зі старою таблицею видаляються її індекси та identity-послідовність
+        cursor.execute('DROP TABLE posts_notification_unpartitioned')
+
+        cursor.execute('CREATE SEQUENCE posts_notification_id_seq OWNED BY posts_notification.id')
+        cursor.execute("SELECT setval('posts_notification_id_seq', %s, false)", [(max_id or 0) + 1])
+        cursor.execute("ALTER TABLE posts_notification ALTER COLUMN id SET DEFAULT nextval('posts_notification_id_seq')")
+
+        # Індекси та зовнішні ключі на батьківській таблиці поширюються на всі партиції
+        cursor.execute('CREATE INDEX posts_notification_actor_id_idx ON posts_notification (actor_id)')
+        cursor.execute('CREATE INDEX posts_notification_post_id_idx ON posts_notification (post_id)')
+        cursor.execute('CREATE INDEX posts_notification_recipient_id_idx ON posts_notification (recipient_id)')
+        cursor.execute(
+            'CREATE INDEX notification_coalesce_idx ON posts_notification '
+            '(recipient_id, notification_type, post_id, is_read)'
+        )
+        cursor.execute(
+            'CREATE INDEX notification_inbox_unread_idx ON posts_notification '
+            '(recipient_id, is_read, "timestamp" DESC, id DESC)'
+        )
+        cursor.execute(
+            'CREATE INDEX notification_inbox_idx ON posts_notification (recipient_id, "timestamp" DESC, id DESC)'
+        )
+        for column, table in (('actor_id', 'users_customuser'), ('recipient_id', 'users_customuser'), ('post_id', 'posts_post')):
+            cursor.execute(
+                f'ALTER TABLE posts_notification ADD CONSTRAINT posts_notification_{column}_fk '
+                f'FOREIGN KEY ({column}) REFERENCES {table} (id) DEFERRABLE INITIALLY DEFERRED'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_notification_inbox_indexes'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        # Незворотна: секціоновану таблицю назад у звичайну не перетворюємо, відкат має падати, а не мовчки лишати її
+        migrations.RunPython(partition_notifications, elidable=False),
+    ]
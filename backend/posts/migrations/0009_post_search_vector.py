@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    from posts.search import update_post_search_vectors
+
+    Post = apps.get_model('posts', 'Post')
+    ids = list(Post.objects.order_by('id').values_list('id', flat=True))
+    # Пачками, щоб не тримати блокування на всій таблиці одним UPDATE
+    for start in range(0, len(ids), BACKFILL_BATCH_SIZE):
+        update_post_search_vectors(Post.objects.filter(id__in=ids[start:start + BACKFILL_BATCH_SIZE]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_partition_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ),
+    ]
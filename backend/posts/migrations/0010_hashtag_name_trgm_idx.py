@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:40
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_search_vector'),
+        # Розширення pg_trgm створюється міграцією users
+        ('users', '0004_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hashtag',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='hashtag_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
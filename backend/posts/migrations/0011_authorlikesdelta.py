@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_total_likes(apps, schema_editor):
+    # До цього total_likes ніхто не оновлював, тож рахуємо його один раз з наявних лайків
+    CustomUser = apps.get_model('users', 'CustomUser')
+    Like = apps.get_model('posts', 'Like')
+    likes = (
+        Like.objects.filter(post__author=OuterRef('pk'))
+        .order_by().values('post__author').annotate(total=Count('pk')).values('total')
+    )
+    CustomUser.objects.update(total_likes=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_hashtag_name_trgm_idx'),
+        ('users', '0005_customuser_subscription_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorLikesDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author_id', models.IntegerField()),
+                ('delta', models.SmallIntegerField()),
+            ],
+        ),
+        migrations.RunPython(backfill_total_likes, migrations.RunPython.noop),
+    ]
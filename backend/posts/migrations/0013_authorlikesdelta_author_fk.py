@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_author_created_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Колонка author_id лишається на місці, лише розширюється до bigint, як id користувачів;
+        # у стані моделі ціле поле замінюється на FK без обмеження в БД
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterField(
+                    model_name='authorlikesdelta',
+                    name='author_id',
+                    field=models.BigIntegerField(),
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='authorlikesdelta',
+                    name='author_id',
+                ),
+                migrations.AddField(
+                    model_name='authorlikesdelta',
+                    name='author',
+                    field=models.ForeignKey(
+                        db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name='+', to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
 from users.models import CustomUser
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now
@@ -12,6 +15,12 @@ class Hashtag(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # Триграмний індекс для підказок під час введення (users.autocomplete)
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='hashtag_name_trgm_idx'),
+        ]
+
 # Модель для коментарів - тут використовується ForeignKey до Post
 class Comment(models.Model):
     post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='post_comments')
@@ -64,6 +73,37 @@ def validate_file_extension(value, file_type):
     elif file_type == 'audio' and ext.lower() not in valid_audio_extensions:
         raise ValidationError('Підтримуються формати: ' + ', '.join(valid_audio_extensions))
 
+class PostQuerySet(models.QuerySet):
+    def with_is_liked(self, user=None):
+        # is_liked одним EXISTS в основному запиті замість окремого запиту на кожен пост
+        if user is not None and user.is_authenticated:
+            is_liked = Exists(Like.objects.filter(post=OuterRef('pk'), user=user))
+        else:
+            is_liked = Value(False, output_field=BooleanField())
+        return self.annotate(annotated_is_liked=is_liked)
+
+    def for_listing(self, user=None):
+        """
+        Готує queryset для рендерингу списку постів через PostSerializer.
+        is_liked рахується в основному запиті, лічильники зберігаються в самому пості,
+        а автор, хештеги, лайки та медіа завантажуються наперед, тому
+        сторінка будь-якого розміру рендериться за фіксовану кількість запитів.
+        """
+        return self.select_related('author').with_is_liked(user).prefetch_related(
+            'hashtags',
+            'author__hashtags',
+            Prefetch('likes', queryset=CustomUser.objects.only('id')),
+            'images',
+            'videos',
+            'audios',
+        )
+
+    def for_cards(self, user=None):
+        """
+        Готує queryset для компактних карток (PostCardSerializer): лише автор і хештеги, без лайків і медіа.
+        """
+        return self.select_related('author').with_is_liked(user).prefetch_related('hashtags')
+
 # Модель для постів без полів для медіа та ManyToManyField для коментарів
 class Post(models.Model):
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='posts')
@@ -74,6 +114,23 @@ class Post(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     original_post = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
     video_thumbnail = models.ImageField(upload_to='posts/video_thumbnails/', blank=True, null=True)
+    # Денормалізовані лічильники, оновлюються сигналами в тій самій транзакції, що й запис
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    reposts_count = models.PositiveIntegerField(default=0)
+    # Текст і хештеги для повнотекстового пошуку, оновлюється сигналами (posts.search)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Складений індекс для курсорної пагінації стрічки за (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            # Пости одного автора сторінками (профіль, UserPostsView)
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_id_idx'),
+            GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ]
 
     def __str__(self):
         if self.original_post:
@@ -108,6 +165,25 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ('user', 'post')
+        indexes = [
+            # Індекс для курсорної пагінації історії лайків користувача
+            models.Index(fields=['user', '-liked_at', '-id'], name='like_user_liked_id_idx'),
+        ]
+
+class TimelineEntry(models.Model):
+    """
+    Матеріалізована домашня стрічка: пост автора, на якого підписаний user.
+    Записується при створенні поста (fan-out on write) і обрізається до HOME_TIMELINE_MAX_LENGTH.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField()  # Копія post.created_at для впорядкування без join
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_created_idx'),
+        ]
 
 class Notification(models.Model):
     NOTIFICATION_TYPES = (
@@ -131,8 +207,45 @@ class Notification(models.Model):
     )
     notification_type = models.CharField(max_length=50, choices=NOTIFICATION_TYPES)
     post = models.ForeignKey('posts.Post', on_delete=models.CASCADE, null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(auto_now_add=True)  # Час останньої дії (оновлюється при об'єднанні)
     is_read = models.BooleanField(default=False)
+    # Об'єднання однотипних сповіщень на один пост ("X та ще 12 лайкнули ваш пост")
+    actor_count = models.PositiveIntegerField(default=1)  # Скільки користувачів зробили дію
+    sample_actor_ids = models.JSONField(default=list, blank=True)  # Кілька останніх користувачів, від новіших
+    push_pending = models.BooleanField(default=False)  # Чи запланована відкладена real-time відправка
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', 'notification_type', 'post', 'is_read'], name='notification_coalesce_idx'),
+            # Індекси для курсорної пагінації вхідних сповіщень (всіх та лише непрочитаних)
+            models.Index(fields=['recipient', 'is_read', '-timestamp', '-id'], name='notification_inbox_unread_idx'),
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notification_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"Notification ({self.notification_type}): {self.actor} -> {self.recipient}"
+
+class AuthorLikesDelta(models.Model):
+    """
+    Зміна CustomUser.total_likes автора (+1 за лайк, -1 за зняття), записана в тій самій транзакції, що й лайк.
+    Вставки не конкурують за рядок популярного автора; posts.counters.flush_author_likes
+    періодично підсумовує їх пачками і застосовує до total_likes.
+    """
+    # Без обмеження в БД: зміни для видаленого автора просто нікуди не застосуються при зливі
+    author = models.ForeignKey(
+        CustomUser, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+'
+    )
+    delta = models.SmallIntegerField()
+
+
+class OutboxEvent(models.Model):
+    """
+    Подія для channel layer, записана в тій самій транзакції, що й зміни, які її спричинили.
+    Диспетчер (posts.tasks.dispatch_outbox_events) відправляє події пачками і видаляє відправлені.
+    """
+    group = models.CharField(max_length=255)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Notification ({self.notification_type}): {self.actor} -> {self.recipient}"
\ No newline at end of file
+        return f"OutboxEvent {self.id} -> {self.group}"
@@ -0,0 +1,155 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .models import Notification
+from .outbox import publish_event
+
+logger = logging.getLogger(__name__)
+
+# Однотипні непрочитані сповіщення на той самий пост у межах вікна об'єднуються в одне
+NOTIFICATION_COALESCE_WINDOW = timedelta(seconds=getattr(settings, 'NOTIFICATION_COALESCE_WINDOW_SECONDS', 60 * 60))
+# Оновлення об'єднаного сповіщення надсилаються по сокету не частіше, ніж раз на цей інтервал
+NOTIFICATION_PUSH_DEBOUNCE_SECONDS = getattr(settings, 'NOTIFICATION_PUSH_DEBOUNCE_SECONDS', 5)
+# Скільки останніх користувачів зберігається в сповіщенні для показу ("X, Y та ще 10")
+NOTIFICATION_SAMPLE_ACTORS = 3
+
+# Лічильник змінюють і веб-процеси, і Celery (fan_out_new_post), тому він живе лише в спільному кеші (Redis)
+UNREAD_COUNT_CACHE_KEY = 'notifications:unread:{user_id}'
+UNREAD_COUNT_CACHE_TIMEOUT = 60 * 60
+
+MESSAGES = {
+    'post_like': ("{actor} лайкнув ваш пост", "{actor} та ще {others} лайкнули ваш пост"),
+    'post_repost': ("{actor} репостнув ваш пост", "{actor} та ще {others} репостнули ваш пост"),
+    'new_comment': (
+        "{actor} залишив коментар до вашого поста",
+        "{actor} та ще {others} залишили коментарі до вашого поста",
+    ),
+}
+
+
+def notify_coalesced(recipient, actor, notification_type, post):
+    """
+    Створює сповіщення або додає actor до вже існуючого однотипного непрочитаного сповіщення
+    на цей пост, якщо воно оновлювалось не раніше NOTIFICATION_COALESCE_WINDOW тому.
+    Перше сповіщення відправляється по сокету одразу, оновлення - не частіше NOTIFICATION_PUSH_DEBOUNCE_SECONDS.
+    Має викликатися в транзакції разом із записом, що спричинив сповіщення.
+    """
+    with transaction.atomic():
+        notification = (
+            Notification.objects.select_for_update()
+            .filter(
+                recipient=recipient,
+                notification_type=notification_type,
+                post=post,
+                is_read=False,
+                timestamp__gte=timezone.now() - NOTIFICATION_COALESCE_WINDOW,
+            )
+            .order_by('-timestamp')
+            .first()
+        )
+
+        if notification is None:
+            notification = Notification.objects.create(
+                recipient=recipient,
+                actor=actor,
+                notification_type=notification_type,
+                post=post,
+                sample_actor_ids=[actor.id],
+            )
+            publish_event(f"notifications_{recipient.id}", build_event(notification, actor))
+            return notification
+
+        # Повторна дія того самого користувача (наприклад, лайк після зняття лайку) не збільшує лічильник
+        if actor.id not in notification.sample_actor_ids:
+            notification.actor_count += 1
+        sample = [actor.id, *[actor_id for actor_id in notification.sample_actor_ids if actor_id != actor.id]]
+        notification.sample_actor_ids = sample[:NOTIFICATION_SAMPLE_ACTORS]
+        notification.actor = actor
+        notification.timestamp = timezone.now()
+
+        schedule_push = not notification.push_pending
+        notification.push_pending = True
+        notification.save(update_fields=['actor_count', 'sample_actor_ids', 'actor', 'timestamp', 'push_pending'])
+
+        if schedule_push:
+            notification_id = notification.id
+            transaction.on_commit(lambda: schedule_debounced_push(notification_id))
+        return notification
+
+
+def schedule_debounced_push(notification_id):
+    from .tasks import push_coalesced_notification
+    try:
+        push_coalesced_notification.apply_async((notification_id,), countdown=NOTIFICATION_PUSH_DEBOUNCE_SECONDS)
+    except Exception:
+        # Брокер недоступний: знімаємо прапорець, щоб наступна дія знову запланувала відправку
+        logger.warning("Не вдалося запланувати відправку сповіщення %s", notification_id, exc_info=True)
+        Notification.objects.filter(pk=notification_id).update(push_pending=False)
+
+
+def build_event(notification, actor=None):
+    actor = actor or notification.actor
+    single, grouped = MESSAGES.get(notification.notification_type, ("{actor}", "{actor} та ще {others}"))
+    template = single if notification.actor_count == 1 else grouped
+    return {
+        "type": "send_notification",
+        "notification": {
+            "type": notification.notification_type,
+            "message": template.format(actor=actor.display_name, others=notification.actor_count - 1),
+            "post_id": notification.post_id,
+            "notification_id": notification.id,
+            "actor_count": notification.actor_count,
+            "sample_actor_ids": notification.sample_actor_ids,
+        }
+    }
+
+
+def push_pending_notification(notification_id):
+    """
+    Відправляє по сокету поточний стан об'єднаного сповіщення і знімає прапорець push_pending.
+    """
+    with transaction.atomic():
+        notification = Notification.objects.select_for_update().filter(pk=notification_id, push_pending=True).first()
+        if notification is None:
+            return
+        notification.push_pending = False
+        notification.save(update_fields=['push_pending'])
+        publish_event(f"notifications_{notification.recipient_id}", build_event(notification))
+
+
+def get_unread_count(user_id):
+    """
+    Кількість непрочитаних сповіщень з кешу; COUNT по таблиці виконується лише при промаху кешу.
+    """
+    key = UNREAD_COUNT_CACHE_KEY.format(user_id=user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.set(key, count, UNREAD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def change_unread_count(user_id, delta):
+    key = UNREAD_COUNT_CACHE_KEY.format(user_id=user_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        # Лічильника немає в кеші - він буде порахований при наступному читанні
+        return
+    if count < 0:
+        cache.delete(key)
+
+
+def invalidate_unread_counts(user_ids):
+    """
+    Скидає лічильники пачки користувачів одним запитом до кешу; вони перерахуються при наступному читанні.
+    """
+    cache.delete_many([UNREAD_COUNT_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def reset_unread_count(user_id):
+    cache.set(UNREAD_COUNT_CACHE_KEY.format(user_id=user_id), 0, UNREAD_COUNT_CACHE_TIMEOUT)
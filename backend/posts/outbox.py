@@ -0,0 +1,24 @@
+import logging
+from django.db import transaction
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def publish_event(group, message):
+    """
+    Записує подію для channel layer в outbox в поточній транзакції.
+    Подія буде відправлена диспетчером лише після коміту; при відкаті вона зникає разом з транзакцією.
+    """
+    OutboxEvent.objects.create(group=group, payload=message)
+    transaction.on_commit(schedule_dispatch)
+
+
+def schedule_dispatch():
+    # Імпорт тут, бо posts.tasks залежить від моделей і таймлайну
+    from .tasks import dispatch_outbox_events
+    try:
+        dispatch_outbox_events.delay()
+    except Exception:
+        # Брокер недоступний: події залишаться в outbox і будуть відправлені періодичним запуском диспетчера
+        logger.warning("Не вдалося запланувати відправку outbox-подій", exc_info=True)
@@ -0,0 +1,161 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    """
+    Кодує значення ключа останнього елемента сторінки в непрозорий рядок-курсор.
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Розкодовує курсор назад у список значень ключа.
+    Рядки у форматі ISO 8601 перетворюються назад у datetime.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValidationError({"cursor": "Невірний курсор."})
+    if not isinstance(payload, list):
+        raise ValidationError({"cursor": "Невірний курсор."})
+
+    values = []
+    for value in payload:
+        if isinstance(value, str):
+            parsed = parse_datetime(value)
+            values.append(parsed if parsed is not None else value)
+        else:
+            values.append(value)
+    return values
+
+
+class KeysetPaginator:
+    """
+    Курсорна (keyset) пагінація за спаданням набору полів, за замовчуванням (created_at, id).
+
+    Замість OFFSET наступна сторінка вибирається умовою "ключ менший за ключ останнього
+    елемента попередньої сторінки", тому глибокі сторінки коштують O(розміру сторінки)
+    при наявності складеного індексу на ці поля.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering=('created_at', 'id'), page_size=DEFAULT_PAGE_SIZE, max_page_size=MAX_PAGE_SIZE,
+                 cursor_query_param=None):
+        self.ordering = tuple(ordering)
+        # Окремий параметр курсора, коли в одній відповіді кілька незалежно гортаних списків
+        if cursor_query_param is not None:
+            self.cursor_query_param = cursor_query_param
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Розмір сторінки має бути цілим числом."})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: "Розмір сторінки має бути більшим за нуль."})
+        return min(page_size, self.max_page_size)
+
+    def get_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        values = decode_cursor(cursor)
+        if len(values) != len(self.ordering):
+            raise ValidationError({self.cursor_query_param: "Невірний курсор."})
+        return values
+
+    def _after_cursor_filter(self, values):
+        # (a, b) < (x, y)  <=>  a < x  OR  (a = x AND b < y)
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            term = Q(**{f'{field}__lt': values[index]})
+            for prev_field, prev_value in zip(self.ordering[:index], values[:index]):
+                term &= Q(**{prev_field: prev_value})
+            condition |= term
+        return condition
+
+    def _key(self, obj):
+        key = []
+        for field in self.ordering:
+            value = obj
+            for part in field.split('__'):
+                value = getattr(value, part)
+            key.append(value)
+        return key
+
+    def filter_queryset(self, queryset, request):
+        """
+        Впорядковує queryset за ключем і відкидає все, що не далі за курсор (без обмеження розміру).
+        """
+        cursor = self.get_cursor(request)
+        queryset = queryset.order_by(*[f'-{field}' for field in self.ordering])
+        if cursor is not None:
+            queryset = queryset.filter(self._after_cursor_filter(cursor))
+        return queryset
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Повертає (елементи сторінки, курсор наступної сторінки або None).
+        """
+        return self._slice_page(self.filter_queryset(queryset, request), self.get_page_size(request))
+
+    def first_page(self, queryset):
+        """
+        Перша сторінка розміром page_size без урахування параметрів запиту
+        (для списку, вкладеного в іншу відповідь, наприклад постів у профілі).
+        """
+        return self._slice_page(queryset.order_by(*[f'-{field}' for field in self.ordering]), self.page_size)
+
+    def _slice_page(self, queryset, page_size):
+        # Беремо на один елемент більше, щоб знати, чи є наступна сторінка
+        items = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            next_cursor = encode_cursor(self._key(items[-1]))
+        return items, next_cursor
+
+    def paginate_sequence(self, items, request, key):
+        """
+        Пагінація вже відсортованого за спаданням key(item) списку (наприклад, рекомендацій з оцінками).
+        key має повертати кортеж, унікальний для кожного елемента.
+        """
+        page_size = self.get_page_size(request)
+        cursor = self.get_cursor(request)
+
+        if cursor is not None:
+            cursor = tuple(cursor)
+            items = [item for item in items if tuple(key(item)) < cursor]
+
+        page = list(items[:page_size + 1])
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_cursor = encode_cursor(key(page[-1]))
+        return page, next_cursor
+
+    @staticmethod
+    def get_paginated_data(data, next_cursor):
+        return {
+            "results": data,
+            "next_cursor": next_cursor,
+        }
@@ -0,0 +1,137 @@
+import gzip
+import logging
+import os
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from .notifications import UNREAD_COUNT_CACHE_KEY
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_TABLE = 'posts_notification'
+PARTITION_PREFIX = f'{NOTIFICATION_TABLE}_y'
+
+# Скільки місяців сповіщень зберігається, старіші партиції від'єднуються і видаляються
+NOTIFICATION_RETENTION_MONTHS = getattr(settings, 'NOTIFICATION_RETENTION_MONTHS', 6)
+# Куди архівувати видалені партиції у вигляді стиснутого JSONL (None - видаляти без архіву)
+NOTIFICATION_ARCHIVE_DIR = getattr(settings, 'NOTIFICATION_ARCHIVE_DIR', None)
+# На скільки місяців наперед створюються партиції
+NOTIFICATION_PARTITIONS_AHEAD = 2
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARTITION_PREFIX}{month.year}m{month.month:02d}'
+
+
+def partition_bound(month):
+    return datetime.combine(month, time.min, tzinfo=dt_timezone.utc).isoformat()
+
+
+def notification_retention_cutoff(today=None):
+    """
+    Нижня межа timestamp для читання сповіщень: умова по ключу секціонування дозволяє
+    PostgreSQL відкинути партиції поза періодом зберігання ще до їх видалення.
+    """
+    month = add_months(month_start(today or date.today()), -NOTIFICATION_RETENTION_MONTHS)
+    return datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [NOTIFICATION_TABLE])
+        return cursor.fetchone() is not None
+
+
+def create_month_partition(cursor, month):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{NOTIFICATION_TABLE}" '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [partition_bound(month), partition_bound(add_months(month, 1))],
+    )
+
+
+def list_month_partitions(cursor):
+    """
+    Повертає [(перший день місяця, назва партиції)] для всіх місячних партицій, від старіших.
+    """
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = %s
+        """,
+        [NOTIFICATION_TABLE],
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        if not name.startswith(PARTITION_PREFIX):
+            continue
+        year, month = name[len(PARTITION_PREFIX):].split('m')
+        partitions.append((date(int(year), int(month), 1), name))
+    return sorted(partitions)
+
+
+def ensure_notification_partitions(today=None, months_ahead=NOTIFICATION_PARTITIONS_AHEAD):
+    """
+    Створює партиції для поточного місяця і months_ahead наступних, щоб нові сповіщення не падали в DEFAULT.
+    """
+    current = month_start(today or date.today())
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            create_month_partition(cursor, add_months(current, offset))
+
+
+def archive_partition(cursor, name, archive_dir):
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{name}.jsonl.gz')
+    cursor.execute(f'SELECT row_to_json(t)::text FROM "{name}" t ORDER BY id')
+    with gzip.open(path, 'wt', encoding='utf-8') as archive:
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            for (row,) in rows:
+                archive.write(row)
+                archive.write('\n')
+    return path
+
+
+def drop_expired_notification_partitions(today=None, retention_months=NOTIFICATION_RETENTION_MONTHS, archive_dir=NOTIFICATION_ARCHIVE_DIR):
+    """
+    Від'єднує та видаляє партиції, що повністю старші за retention_months місяців,
+    попередньо архівуючи їх у стиснутий JSONL, якщо задано archive_dir.
+    Повертає список видалених партицій.
+    """
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in list_month_partitions(cursor):
+            if add_months(month, 1) > cutoff:
+                continue
+            with transaction.atomic():
+                cursor.execute(f'ALTER TABLE "{NOTIFICATION_TABLE}" DETACH PARTITION "{name}"')
+                # Непрочитані сповіщення зникають - скидаємо кешовані лічильники їх отримувачів
+                cursor.execute(f'SELECT DISTINCT recipient_id FROM "{name}" WHERE NOT is_read')
+                recipients = [recipient_id for (recipient_id,) in cursor.fetchall()]
+                if archive_dir:
+                    path = archive_partition(cursor, name, archive_dir)
+                    logger.info("Партицію %s заархівовано в %s", name, path)
+                cursor.execute(f'DROP TABLE "{name}"')
+            cache.delete_many([UNREAD_COUNT_CACHE_KEY.format(user_id=recipient_id) for recipient_id in recipients])
+            dropped.append(name)
+    return dropped
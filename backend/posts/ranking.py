@@ -0,0 +1,194 @@
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+from users.models import CustomUser
+from ai.collaborative import get_collaborative_model
+from .models import Post, Hashtag, Like
+
+# Ваги критеріїв рекомендації постів
+SUBSCRIPTION_WEIGHT = 0.3  # Автор - користувач, на якого підписаний юзер
+HASHTAG_SIMILARITY_WEIGHT = 0.25  # Множиться на схожість Жаккара хештегів юзера та поста
+POPULARITY_WEIGHT = 0.2  # Пост має більше POPULAR_LIKES_THRESHOLD лайків
+FRESHNESS_WEIGHT = 0.15  # Пост опублікований не раніше FRESHNESS_PERIOD тому
+SPECIAL_HASHTAG_WEIGHT = 0.1  # Серед хештегів поста є SPECIAL_HASHTAG
+COLLABORATIVE_WEIGHT = 0.2  # Множиться на передбачену ALS-моделлю схильність юзера до поста (0..1)
+
+POPULAR_LIKES_THRESHOLD = 10
+FRESHNESS_PERIOD = timedelta(days=7)
+SPECIAL_HASHTAG = '#chort'
+
+
+class PostFeatures:
+    """
+    Ознаки постів-кандидатів у вигляді масивів NumPy (i-й елемент кожного масиву - i-й пост).
+    Хештеги зберігаються як пари (tag_rows[j], tag_ids[j]): пост з індексом tag_rows[j] має хештег tag_ids[j].
+    """
+
+    def __init__(self, post_ids, author_ids, likes_counts, created_at, tag_rows, tag_ids):
+        self.post_ids = post_ids
+        self.author_ids = author_ids
+        self.likes_counts = likes_counts
+        self.created_at = created_at  # Unix-час у секундах
+        self.tag_rows = tag_rows
+        self.tag_ids = tag_ids
+
+    def __len__(self):
+        return len(self.post_ids)
+
+
+def load_post_features(candidates):
+    """
+    Завантажує ознаки всіх постів queryset-у candidates двома запитами (пости та їх хештеги).
+    """
+    rows = list(candidates.order_by('id').values_list('id', 'author_id', 'likes_count', 'created_at'))
+    post_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    author_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    likes_counts = np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows))
+    created_at = np.fromiter((row[3].timestamp() for row in rows), dtype=np.float64, count=len(rows))
+
+    links = Post.hashtags.through.objects.filter(post__in=candidates).values_list('post_id', 'hashtag_id')
+    link_array = np.array(list(links), dtype=np.int64).reshape(-1, 2)
+    # post_ids відсортовані, тож індекс поста знаходиться бінарним пошуком
+    tag_rows = np.searchsorted(post_ids, link_array[:, 0])
+    return PostFeatures(post_ids, author_ids, likes_counts, created_at, tag_rows, link_array[:, 1])
+
+
+def score_posts(features, subscription_ids, user_tag_ids, user_tag_count, special_tag_id, now, affinity=None):
+    """
+    Обчислює оцінки всіх постів одночасно векторними операціями.
+    user_tag_ids - id хештегів постів (Hashtag), назви яких збігаються з хештегами юзера,
+    user_tag_count - загальна кількість хештегів юзера (для знаменника схожості Жаккара).
+    affinity - передбачена колаборативною моделлю схильність юзера до кожного поста (або None).
+    """
+    n = len(features)
+    scores = np.zeros(n, dtype=np.float64)
+
+    # Критерій 1: автор поста - користувач, на якого підписаний юзер
+    scores += SUBSCRIPTION_WEIGHT * np.isin(features.author_ids, subscription_ids)
+
+    # Критерій 2: схожість Жаккара |A ∩ B| / |A ∪ B| між хештегами юзера і поста
+    post_tag_counts = np.bincount(features.tag_rows, minlength=n)
+    in_user_tags = np.isin(features.tag_ids, user_tag_ids)
+    intersections = np.bincount(features.tag_rows, weights=in_user_tags, minlength=n)
+    unions = user_tag_count + post_tag_counts - intersections
+    similarity = np.divide(intersections, unions, out=np.zeros(n), where=unions > 0)
+    scores += HASHTAG_SIMILARITY_WEIGHT * similarity
+
+    # Критерій 3: пост має велику кількість лайків
+    scores += POPULARITY_WEIGHT * (features.likes_counts > POPULAR_LIKES_THRESHOLD)
+
+    # Критерій 4: пост опублікований в межах FRESHNESS_PERIOD
+    scores += FRESHNESS_WEIGHT * (features.created_at >= (now - FRESHNESS_PERIOD).timestamp())
+
+    # Критерій 5: серед хештегів поста є SPECIAL_HASHTAG
+    if special_tag_id is not None:
+        has_special = np.bincount(features.tag_rows, weights=features.tag_ids == special_tag_id, minlength=n) > 0
+        scores += SPECIAL_HASHTAG_WEIGHT * has_special
+
+    # Критерій 6: пост лайкали користувачі зі схожими вподобаннями (див. ai.collaborative)
+    if affinity is not None:
+        scores += COLLABORATIVE_WEIGHT * np.clip(affinity, 0, 1)
+
+    return scores
+
+
+def top_k(scores, post_ids, k, after=None, exclude=None):
+    """
+    Повертає індекси k найкращих постів за спаданням (оцінка, id) без повного сортування.
+    after - ключ (оцінка, id) останнього поста попередньої сторінки: враховуються лише пости після нього.
+    exclude - булева маска постів, які не можна рекомендувати (наприклад, вже лайкнуті).
+    """
+    mask = np.ones(len(scores), dtype=bool)
+    if after is not None:
+        after_score, after_id = after
+        mask &= (scores < after_score) | ((scores == after_score) & (post_ids < after_id))
+    if exclude is not None:
+        mask &= ~exclude
+    candidates = np.flatnonzero(mask)
+
+    if k < len(candidates):
+        candidate_scores = scores[candidates]
+        kth_score = candidate_scores[np.argpartition(-candidate_scores, k - 1)[:k]].min()
+        above = candidates[candidate_scores > kth_score]
+        # Серед постів з пороговою оцінкою беремо ті, що мають більші id, щоб порядок збігався з курсором
+        ties = candidates[candidate_scores == kth_score]
+        needed = k - len(above)
+        if needed < len(ties):
+            ties = ties[np.argpartition(-post_ids[ties], needed - 1)[:needed]]
+        candidates = np.concatenate([above, ties])
+
+    order = np.lexsort((post_ids[candidates], scores[candidates]))[::-1]
+    return candidates[order]
+
+
+class UserProfile:
+    """
+    Дані користувача, потрібні для оцінки постів: підписки, назви хештегів та лайкнуті пости.
+    """
+
+    def __init__(self, user_id, subscription_ids=(), tag_names=(), liked_post_ids=()):
+        self.user_id = user_id
+        self.subscription_ids = list(subscription_ids)
+        self.tag_names = list(tag_names)
+        self.liked_post_ids = list(liked_post_ids)
+
+
+def load_user_profiles(user_ids):
+    """
+    Завантажує профілі для пачки користувачів трьома запитами: {user_id: UserProfile}.
+    """
+    profiles = {user_id: UserProfile(user_id) for user_id in user_ids}
+    Subscriptions = CustomUser.subscriptions.through
+    for follower_id, author_id in Subscriptions.objects.filter(from_customuser_id__in=user_ids).values_list(
+        'from_customuser_id', 'to_customuser_id'
+    ):
+        profiles[follower_id].subscription_ids.append(author_id)
+    UserHashtags = CustomUser.hashtags.through
+    for user_id, name in UserHashtags.objects.filter(customuser_id__in=user_ids).values_list(
+        'customuser_id', 'userhashtag__name'
+    ):
+        profiles[user_id].tag_names.append(name)
+    for user_id, post_id in Like.objects.filter(user_id__in=user_ids).values_list('user_id', 'post_id'):
+        profiles[user_id].liked_post_ids.append(post_id)
+    return profiles
+
+
+def load_hashtag_ids(names):
+    return dict(Hashtag.objects.filter(name__in=set(names)).values_list('name', 'id'))
+
+
+def rank_posts(features, profile, hashtag_ids, now, limit, after=None, model=None):
+    """
+    Повертає до limit пар (id поста, оцінка) для профілю, від найкращих; лайкнуті пости пропускаються.
+    hashtag_ids - {назва: id Hashtag}, має містити хештеги профілю та SPECIAL_HASHTAG, якщо вони існують.
+    model - навчена колаборативна модель (ai.collaborative) або None.
+    """
+    if not len(features):
+        return []
+    user_tag_ids = np.array(
+        [hashtag_ids[name] for name in profile.tag_names if name in hashtag_ids], dtype=np.int64
+    )
+    scores = score_posts(
+        features,
+        np.array(profile.subscription_ids, dtype=np.int64),
+        user_tag_ids,
+        len(profile.tag_names),
+        hashtag_ids.get(SPECIAL_HASHTAG),
+        now,
+        affinity=model.affinity(profile.user_id, features.post_ids) if model is not None else None,
+    )
+    liked = np.isin(features.post_ids, np.array(profile.liked_post_ids, dtype=np.int64))
+    best = top_k(scores, features.post_ids, limit, after=after, exclude=liked)
+    return [(int(features.post_ids[index]), float(scores[index])) for index in best]
+
+
+def recommend_posts(user, limit, after=None):
+    """
+    Живий підрахунок рекомендацій для одного користувача: до limit пар (id поста, оцінка), від найкращих.
+    Кандидати - всі пости, які user ще не лайкнув.
+    """
+    features = load_post_features(Post.objects.exclude(likes=user))
+    profile = load_user_profiles([user.id])[user.id]
+    hashtag_ids = load_hashtag_ids([*profile.tag_names, SPECIAL_HASHTAG])
+    return rank_posts(features, profile, hashtag_ids, timezone.now(), limit, after=after, model=get_collaborative_model())
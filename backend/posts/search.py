@@ -0,0 +1,79 @@
+import json
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+# Конфігурація повнотекстового пошуку PostgreSQL: 'simple' без стемінгу, бо контент змішаний (укр/англ)
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'simple')
+# До скількох результатів рахується точна кількість; далі - оцінка планувальника PostgreSQL
+SEARCH_EXACT_COUNT_LIMIT = getattr(settings, 'SEARCH_EXACT_COUNT_LIMIT', 1000)
+
+
+def related_names(through_model, owner_field, name_path):
+    """
+    Підзапит: назви всіх пов'язаних хештегів рядка через пробіл (NULL, якщо хештегів немає,
+    SearchVector сам замінює його порожнім рядком).
+    """
+    names = (
+        through_model.objects.filter(**{owner_field: OuterRef('pk')})
+        .values(owner_field)
+        .annotate(names=StringAgg(name_path, ' '))
+        .values('names')
+    )
+    return Subquery(names)
+
+
+def post_search_vector(post_model):
+    # Хештеги важать більше за текст поста
+    return (
+        SearchVector(
+            related_names(post_model.hashtags.through, 'post_id', 'hashtag__name'), weight='A', config=SEARCH_CONFIG
+        )
+        + SearchVector('content', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_post_search_vectors(queryset):
+    """
+    Перераховує search_vector одним UPDATE для всіх постів queryset-у.
+    """
+    return queryset.update(search_vector=post_search_vector(queryset.model))
+
+
+def build_search_query(text):
+    return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+
+
+def search_ranked(queryset, text):
+    """
+    Лишає рядки, що відповідають запиту (через GIN-індекс на search_vector), і додає релевантність rank.
+    ts_rank повертає real; rank приводиться до double precision, щоб значення в курсорі
+    збігалося з рядком точно, інакше рядки з однаковим rank на межі сторінки губилися б або дублювалися.
+    """
+    query = build_search_query(text)
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+    )
+
+
+def estimate_count(queryset):
+    """
+    Оцінка кількості рядків з плану запиту (EXPLAIN), без виконання самого запиту.
+    """
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_results(queryset, exact_limit=SEARCH_EXACT_COUNT_LIMIT):
+    """
+    Повертає (кількість, чи є вона оцінкою). COUNT обмежений exact_limit + 1 рядками,
+    тому для популярних запитів він не читає всі збіги, а бере оцінку планувальника.
+    """
+    queryset = queryset.order_by()
+    exact = queryset.values('pk')[:exact_limit + 1].count()
+    if exact <= exact_limit:
+        return exact, False
+    return max(estimate_count(queryset), exact), True
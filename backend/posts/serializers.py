@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from users.models import CustomUser
-from .models import Post, Comment, Hashtag, PostImage, PostVideo, PostAudio
+from .models import Post, Comment, Hashtag, PostImage, PostVideo, PostAudio, Notification
 from django.core.exceptions import ValidationError
 import re
 
@@ -87,13 +87,16 @@ class PostSerializer(serializers.ModelSerializer):
         }
 
     def get_is_liked(self, obj):
+        # Пости з Post.objects.for_listing() вже мають is_liked в основному запиті
+        if hasattr(obj, 'annotated_is_liked'):
+            return obj.annotated_is_liked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.likes.filter(id=request.user.id).exists()
         return False
 
     def get_comments(self, obj):
-        return obj.post_comments.count()
+        return obj.comments_count
 
     def validate_hashtags(self, value):
         if not value:
@@ -121,10 +124,68 @@ class PostSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'author', 'content', 'hashtags', 'hashtag_objects', 
             'images', 'videos', 'audios', 'likes', 'comments', 
-            'created_at', 'updated_at', 'original_post', 'is_liked'
+            'created_at', 'updated_at', 'original_post', 'is_liked',
+            'likes_count', 'comments_count', 'reposts_count'
         ]
         read_only_fields = [
             'id', 'likes', 'comments', 'created_at', 
             'updated_at', 'is_liked', 'hashtag_objects',
-            'images', 'videos', 'audios'
-        ]
\ No newline at end of file
+            'images', 'videos', 'audios',
+            'likes_count', 'comments_count', 'reposts_count'
+        ]
+
+class PostCardSerializer(serializers.ModelSerializer):
+    """
+    Компактна картка поста для результатів пошуку: фрагмент тексту, автор, хештеги та лічильники.
+    Очікує queryset з Post.objects.for_cards().
+    """
+    # Скільки символів тексту потрапляє в картку
+    CONTENT_PREVIEW_LENGTH = 280
+
+    author = serializers.SerializerMethodField()
+    content = serializers.SerializerMethodField()
+    hashtags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+    is_liked = serializers.BooleanField(source='annotated_is_liked', read_only=True)
+
+    def get_author(self, obj):
+        request = self.context.get('request')
+        photo_url = obj.author.photo.url if obj.author.photo else None
+        if request and photo_url:
+            photo_url = request.build_absolute_uri(photo_url)
+        return {
+            "id": obj.author.id,
+            "display_name": obj.author.display_name,
+            "photo": photo_url,
+        }
+
+    def get_content(self, obj):
+        if len(obj.content) <= self.CONTENT_PREVIEW_LENGTH:
+            return obj.content
+        return obj.content[:self.CONTENT_PREVIEW_LENGTH].rstrip() + '…'
+
+    class Meta:
+        model = Post
+        fields = [
+            'id', 'author', 'content', 'hashtags', 'created_at', 'original_post', 'is_liked',
+            'likes_count', 'comments_count', 'reposts_count'
+        ]
+        read_only_fields = fields
+
+class NotificationSerializer(serializers.ModelSerializer):
+    actor = serializers.SerializerMethodField()
+
+    def get_actor(self, obj):
+        request = self.context.get('request')
+        photo_url = obj.actor.photo.url if obj.actor.photo else None
+        if request and photo_url:
+            photo_url = request.build_absolute_uri(photo_url)
+        return {
+            "id": obj.actor.id,
+            "display_name": obj.actor.display_name,
+            "photo": photo_url,
+        }
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'notification_type', 'actor', 'post', 'timestamp', 'is_read', 'actor_count', 'sample_actor_ids']
+        read_only_fields = fields
@@ -1,33 +1,35 @@
-from django.db.models.signals import post_save, m2m_changed
+import logging
+from django.db import transaction
+from django.db.models import Count, F, QuerySet
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Post, Notification, Comment
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from .models import Post, Notification, Comment, Like
 from users.models import CustomUser
+from .outbox import publish_event
+from .notifications import notify_coalesced, change_unread_count
+from .tasks import fan_out_new_post
+from .timeline import backfill_timeline, remove_authors_from_timeline, invalidate_author_posts_cache
+from .search import update_post_search_vectors
+from .counters import record_author_likes_change, record_author_likes_changes
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_fan_out(post_id):
+    try:
+        fan_out_new_post.delay(post_id)
+    except Exception:
+        # Брокер недоступний: пост уже збережено, тож помилку лише журналюємо, щоб не зламати відповідь
+        # на запит після коміту; розсилку можна повторити викликом fan_out_new_post(post_id)
+        logger.warning("Не вдалося запланувати розсилку поста %s", post_id, exc_info=True)
 
 @receiver(post_save, sender=Post)
 def notify_subscribers_on_new_post(sender, instance, created, **kwargs):
     if created:
-        author = instance.author
-        # яке повертає всіх користувачів, що підписані на автора.
-        subscribers = author.subscribers.all()
-        channel_layer = get_channel_layer()
-        
-        for subscriber in subscribers:
-            # Створення запису повідомлення в базі даних
-            Notification.objects.create(recipient=subscriber, actor=author, notification_type='new_post',post=instance)
-            # Надсилання сповіщення через Channels (для real-time повідомлень)
-            async_to_sync(channel_layer.group_send)(
-                f"notifications_{subscriber.id}",
-                {
-                    "type": "send_notification",
-                    "notification": {
-                        "type": "new_post",
-                        "message": f"{author.display_name} створив новий пост",
-                        "post_id": instance.id,
-                    }
-                }
-            )
+        # Розсилка підписникам (стрічки та сповіщення) виконується в Celery після коміту,
+        # тому створення поста не залежить від розміру аудиторії автора
+        transaction.on_commit(lambda: schedule_fan_out(instance.id))
 
 @receiver(m2m_changed, sender=CustomUser.subscribers.through)
 def notify_new_subscription(sender, instance, action, pk_set, **kwargs):
@@ -36,14 +38,13 @@ def notify_new_subscription(sender, instance, action, pk_set, **kwargs):
     pk_set – набір ID користувачів, які щойно підписалися.
     """
     if action == 'post_add':
-        channel_layer = get_channel_layer()
         for subscriber_id in pk_set:
             try:
                 subscriber = CustomUser.objects.get(pk=subscriber_id)
             except CustomUser.DoesNotExist:
                 continue  # Якщо користувача не знайдено, пропускаємо
             Notification.objects.create(recipient=instance, actor=subscriber, notification_type='new_subscription')
-            async_to_sync(channel_layer.group_send)(
+            publish_event(
                 f"notifications_{instance.id}",
                 {
                     "type": "send_notification",
@@ -54,27 +55,155 @@ def notify_new_subscription(sender, instance, action, pk_set, **kwargs):
                 }
             )
 
+@receiver(m2m_changed, sender=CustomUser.subscriptions.through)
+def sync_timeline_on_subscription_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Підтримує домашні стрічки при підписці/відписці.
+    reverse=False: instance підписується на pk_set (user.subscriptions.add),
+    reverse=True: pk_set підписуються на instance (user.subscribers.add).
+    """
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    if reverse:
+        pairs = [(follower_id, [instance.id]) for follower_id in pk_set]
+    else:
+        pairs = [(instance.id, list(pk_set))]
+
+    for follower_id, author_ids in pairs:
+        if action == 'post_add':
+            backfill_timeline(follower_id, author_ids)
+        else:
+            remove_authors_from_timeline(follower_id, author_ids)
+
 @receiver(post_save, sender=Comment)
 def notify_post_author_on_new_comment(sender, instance, created, **kwargs):
     if created:
         post = instance.post
         # Не надсилаємо сповіщення, якщо автор коментаря є автором поста
         if instance.author != post.author:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=instance.author,
-                notification_type='new_comment',
-                post=post
-            )
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"notifications_{post.author.id}",
-                {
-                    "type": "send_notification",
-                    "notification": {
-                        "type": "new_comment",
-                        "message": f"{instance.author.display_name} залишив коментар до вашого поста",
-                        "post_id": post.id,
-                    }
-                }
-            )
+            notify_coalesced(post.author, instance.author, 'new_comment', post)
+
+
+def update_post_counter(post_id, field, delta):
+    """
+    Атомарно змінює денормалізований лічильник поста через F()-вираз (без COUNT та без гонок).
+    Лічильник не опускається нижче нуля навіть якщо він розійшовся з реальними даними.
+    """
+    Post.objects.filter(pk=post_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+def update_post_counters(post_ids, field, delta):
+    # Те саме для кількох постів з однаковою зміною одним UPDATE
+    Post.objects.filter(pk__in=sorted(post_ids)).update(**{field: Greatest(F(field) + delta, 0)})
+
+@receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        update_post_counter(instance.post_id, 'likes_count', 1)
+        # total_likes автора оновлюється не тут, а пачками (posts.counters), щоб не блокувати його рядок
+        record_author_likes_change(instance.post.author_id, 1)
+
+def deleted_directly(origin, model):
+    """
+    Чи видалення почалося з самого об'єкта model (або queryset цієї моделі), а не каскадом
+    від поста чи користувача. Каскадні зміни лічильників робляться пачкою в pre_delete батьківського об'єкта.
+    """
+    if origin is None:
+        return True
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+@receiver(post_delete, sender=Like)
+def decrement_likes_count(sender, instance, origin=None, **kwargs):
+    if not deleted_directly(origin, Like):
+        return
+    update_post_counter(instance.post_id, 'likes_count', -1)
+    if Like.post.is_cached(instance):
+        author_id = instance.post.author_id
+    else:
+        author_id = Post.objects.filter(pk=instance.post_id).values_list('author_id', flat=True).first()
+    if author_id is not None:
+        record_author_likes_change(author_id, -1)
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        update_post_counter(instance.post_id, 'comments_count', 1)
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, origin=None, **kwargs):
+    if deleted_directly(origin, Comment):
+        update_post_counter(instance.post_id, 'comments_count', -1)
+
+@receiver(pre_delete, sender=Post)
+def discount_likes_of_deleted_post(sender, instance, origin=None, **kwargs):
+    # Лайки поста видаляються каскадом без оновлень на кожен лайк: автор втрачає їх одним записом.
+    # Якщо пост видаляється разом з автором (каскад від CustomUser), total_likes уже нікому змінювати
+    if deleted_directly(origin, Post):
+        record_author_likes_changes({instance.author_id: -instance.liked_by.count()})
+
+@receiver(pre_delete, sender=CustomUser)
+def discount_activity_of_deleted_user(sender, instance, **kwargs):
+    """
+    Лайки й коментарі користувача на чужих постах видаляються каскадом без оновлень на кожен об'єкт:
+    лічильники постів і total_likes їх авторів зменшуються кількома запитами на всього користувача.
+    """
+    # Користувач лайкає пост не більше одного разу, тож кожен такий пост втрачає рівно один лайк
+    Post.objects.filter(liked_by__user=instance).exclude(author=instance).update(
+        likes_count=Greatest(F('likes_count') - 1, 0)
+    )
+    likes_by_author = (
+        Like.objects.filter(user=instance).exclude(post__author=instance)
+        .values('post__author_id').annotate(total=Count('id')).values_list('post__author_id', 'total')
+    )
+    record_author_likes_changes({author_id: -total for author_id, total in likes_by_author})
+    comments = (
+        Comment.objects.filter(author=instance).exclude(post__author=instance)
+        .values('post_id').annotate(total=Count('id')).values_list('post_id', 'total')
+    )
+    post_ids_by_total = {}
+    for post_id, total in comments:
+        post_ids_by_total.setdefault(total, []).append(post_id)
+    for total, post_ids in post_ids_by_total.items():
+        update_post_counters(post_ids, 'comments_count', -total)
+
+@receiver(post_save, sender=Post)
+def increment_reposts_count(sender, instance, created, **kwargs):
+    if created and instance.original_post_id:
+        update_post_counter(instance.original_post_id, 'reposts_count', 1)
+
+@receiver(post_delete, sender=Post)
+def decrement_reposts_count(sender, instance, **kwargs):
+    if instance.original_post_id:
+        update_post_counter(instance.original_post_id, 'reposts_count', -1)
+
+@receiver(post_delete, sender=Post)
+def drop_post_from_author_cache(sender, instance, **kwargs):
+    # Записи TimelineEntry видаляються каскадом, а кеш останніх постів автора треба скинути
+    invalidate_author_posts_cache(instance.author_id)
+
+@receiver(post_save, sender=Notification)
+def increment_unread_count(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: change_unread_count(instance.recipient_id, 1))
+
+@receiver(post_delete, sender=Notification)
+def decrement_unread_count(sender, instance, **kwargs):
+    if not instance.is_read:
+        transaction.on_commit(lambda: change_unread_count(instance.recipient_id, -1))
+
+@receiver(post_save, sender=Post)
+def update_post_search_vector(sender, instance, update_fields=None, **kwargs):
+    # Лічильники та інші службові поля не впливають на пошук
+    if update_fields is not None and 'content' not in update_fields:
+        return
+    update_post_search_vectors(Post.objects.filter(pk=instance.pk))
+
+@receiver(m2m_changed, sender=Post.hashtags.through)
+def update_search_vector_on_hashtags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_post_search_vectors(Post.objects.filter(pk=instance.pk))
+    elif pk_set:
+        update_post_search_vectors(Post.objects.filter(pk__in=pk_set))
@@ -0,0 +1,127 @@
+import asyncio
+from collections import defaultdict
+from itertools import islice
+
+from celery import shared_task
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+from .models import Post, Notification, OutboxEvent
+from .timeline import distribute_post
+from .notifications import invalidate_unread_counts, push_pending_notification
+from .partitions import is_partitioned, ensure_notification_partitions, drop_expired_notification_partitions
+from .counters import flush_author_likes
+
+# Скільки сповіщень створюється одним bulk_create і розсилається однією пачкою через channel layer
+NOTIFICATION_FANOUT_BATCH_SIZE = getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 1000)
+# Скільки outbox-подій диспетчер відправляє за одну транзакцію
+OUTBOX_DISPATCH_BATCH_SIZE = getattr(settings, 'OUTBOX_DISPATCH_BATCH_SIZE', 500)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def group_send_many(channel_layer, messages):
+    """
+    Надсилає пачку повідомлень (group, message) в channel layer за один виклик async_to_sync.
+    Різні групи обслуговуються паралельно, а в межах однієї групи порядок повідомлень зберігається.
+    """
+    by_group = defaultdict(list)
+    for group, message in messages:
+        by_group[group].append(message)
+
+    async def send_in_order(group, group_messages):
+        for message in group_messages:
+            await channel_layer.group_send(group, message)
+
+    await asyncio.gather(*[send_in_order(group, group_messages) for group, group_messages in by_group.items()])
+
+
+@shared_task
+def fan_out_new_post(post_id):
+    """
+    Розсилає новий пост підписникам автора: домашні стрічки, сповіщення в БД та real-time сповіщення.
+    Виконується воркером Celery після коміту транзакції, в якій створено пост.
+    """
+    try:
+        post = Post.objects.select_related('author').get(pk=post_id)
+    except Post.DoesNotExist:
+        return
+
+    author = post.author
+    distribute_post(post)
+
+    channel_layer = get_channel_layer()
+    notification = {
+        "type": "send_notification",
+        "notification": {
+            "type": "new_post",
+            "message": f"{author.display_name} створив новий пост",
+            "post_id": post.id,
+        }
+    }
+
+    subscriber_ids = author.subscribers.values_list('id', flat=True).iterator(chunk_size=NOTIFICATION_FANOUT_BATCH_SIZE)
+    for batch in chunked(subscriber_ids, NOTIFICATION_FANOUT_BATCH_SIZE):
+        Notification.objects.bulk_create([
+            Notification(recipient_id=subscriber_id, actor=author, notification_type='new_post', post=post)
+            for subscriber_id in batch
+        ])
+        # bulk_create не надсилає post_save, тому лічильники непрочитаних скидаємо явно, одним запитом на пачку
+        invalidate_unread_counts(batch)
+        async_to_sync(group_send_many)(
+            channel_layer,
+            [(f"notifications_{subscriber_id}", notification) for subscriber_id in batch],
+        )
+
+
+@shared_task
+def dispatch_outbox_events(batch_size=OUTBOX_DISPATCH_BATCH_SIZE):
+    """
+    Вичитує outbox пачками і відправляє події в channel layer.
+    Рядки блокуються з SKIP LOCKED, тож кілька диспетчерів не відправляють одну подію двічі;
+    якщо відправка впаде, транзакція відкотиться і пачку буде відправлено наступним запуском.
+    """
+    channel_layer = get_channel_layer()
+    while True:
+        with transaction.atomic():
+            events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+            if not events:
+                return
+            async_to_sync(group_send_many)(channel_layer, [(event.group, event.payload) for event in events])
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+
+
+@shared_task
+def push_coalesced_notification(notification_id):
+    """
+    Відкладена (debounced) real-time відправка об'єднаного сповіщення.
+    """
+    push_pending_notification(notification_id)
+
+
+@shared_task
+def maintain_notification_partitions():
+    """
+    Щоденне обслуговування секціонованої таблиці сповіщень: створює партиції на наступні місяці
+    та від'єднує і видаляє (за потреби архівуючи) партиції, старші за період зберігання.
+    """
+    if not is_partitioned():
+        return []
+    ensure_notification_partitions()
+    return drop_expired_notification_partitions()
+
+
+@shared_task
+def flush_total_likes():
+    """
+    Переносить накопичені зміни лайків у CustomUser.total_likes авторів.
+    """
+    return flush_author_likes()
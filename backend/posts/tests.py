@@ -82,3 +82,685 @@
 #         os.makedirs(os.path.dirname(file_path), exist_ok=True)
 #         with open(file_path, "w", encoding="utf-8") as json_file:
 #             json.dump(created_users_data, json_file, ensure_ascii=False, indent=4)
+
+
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APITestCase
+from users.models import CustomUser
+from .models import Post, Hashtag, Like, Comment, AuthorLikesDelta, TimelineEntry, OutboxEvent, Notification
+from .serializers import PostSerializer
+from .counters import flush_author_likes, record_author_likes_changes, AUTHOR_LIKES_DELTA_LIMIT
+from .pagination import KeysetPaginator
+from .outbox import publish_event
+from .notifications import (
+    notify_coalesced, build_event, get_unread_count, change_unread_count, UNREAD_COUNT_CACHE_KEY,
+    NOTIFICATION_COALESCE_WINDOW, NOTIFICATION_SAMPLE_ACTORS,
+)
+from .tasks import dispatch_outbox_events, fan_out_new_post
+from .partitions import (
+    month_start, add_months, partition_name, partition_bound, notification_retention_cutoff,
+    NOTIFICATION_RETENTION_MONTHS,
+)
+from .ranking import (
+    PostFeatures, score_posts, top_k, SUBSCRIPTION_WEIGHT, HASHTAG_SIMILARITY_WEIGHT, POPULARITY_WEIGHT,
+    POPULAR_LIKES_THRESHOLD, FRESHNESS_WEIGHT, FRESHNESS_PERIOD, SPECIAL_HASHTAG, SPECIAL_HASHTAG_WEIGHT,
+    COLLABORATIVE_WEIGHT,
+)
+from .timeline import (
+    distribute_post, read_home_timeline, trim_timelines, get_pull_author_ids, TIMELINE_FANOUT_MAX_FOLLOWERS,
+)
+
+# Окремий кеш процесу для тестів, що залежать від кешу стрічок: не змішуються з даними спільного Redis
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class PostListingQueryCountTest(TestCase):
+    """
+    Сторінка постів з Post.objects.for_listing() має рендеритись за фіксовану кількість
+    SQL-запитів незалежно від кількості постів.
+    """
+    # 1 основний запит + префетчі: hashtags, author__hashtags, likes, images, videos, audios
+    EXPECTED_QUERIES = 7
+
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(
+            email='listing_author@example.com', display_name='listing_author', password='TestPassword123!'
+        )
+        self.reader = CustomUser.objects.create_user(
+            email='listing_reader@example.com', display_name='listing_reader', password='TestPassword123!'
+        )
+        self.author.add_hashtag('#listing')
+        hashtag, _ = Hashtag.objects.get_or_create(name='#listingpost')
+        for i in range(50):
+            post = Post.objects.create(author=self.author, content=f'Post {i}')
+            post.hashtags.add(hashtag)
+            Comment.objects.create(post=post, author=self.reader, content='comment')
+            if i % 2 == 0:
+                Like.objects.create(user=self.reader, post=post)
+
+        self.request = RequestFactory().get('/api/posts/posts/')
+        self.request.user = self.reader
+
+    def render(self, limit):
+        posts = Post.objects.for_listing(self.reader).filter(author=self.author).order_by('-created_at', '-id')[:limit]
+        return PostSerializer(posts, many=True, context={'request': self.request}).data
+
+    def test_page_renders_in_constant_number_of_queries(self):
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            small_page = self.render(5)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            full_page = self.render(50)
+
+        self.assertEqual(len(small_page), 5)
+        self.assertEqual(len(full_page), 50)
+        self.assertEqual(sum(1 for post in full_page if post['is_liked']), 25)
+        self.assertTrue(all(post['comments'] == 1 for post in full_page))
+
+
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(
+            email='paginator_author@example.com', display_name='paginator_author', password='TestPassword123!'
+        )
+        for i in range(9):
+            Post.objects.create(author=self.author, content=f'Post {i}')
+        # Більшість постів з однаковим created_at: межі сторінок проходять усередині групи рівних ключів
+        tied_at = timezone.now()
+        Post.objects.filter(pk__in=list(Post.objects.order_by('id').values_list('id', flat=True)[2:8])).update(
+            created_at=tied_at
+        )
+        self.expected = list(Post.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.factory = RequestFactory()
+
+    def request(self, **params):
+        return Request(self.factory.get('/', {key: value for key, value in params.items() if value is not None}))
+
+    def test_pages_follow_key_order_without_gaps_or_duplicates(self):
+        paginator = KeysetPaginator()
+        seen, cursor = [], None
+        while True:
+            items, cursor = paginator.paginate_queryset(Post.objects.all(), self.request(cursor=cursor, page_size=2))
+            self.assertLessEqual(len(items), 2)
+            seen.extend(post.id for post in items)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_last_full_page_has_no_next_cursor(self):
+        items, cursor = KeysetPaginator().paginate_queryset(Post.objects.all(), self.request(page_size=9))
+        self.assertEqual(len(items), 9)
+        self.assertIsNone(cursor)
+
+    def test_sequence_with_tied_scores_is_paged_by_key(self):
+        items = [(post_id, 0.5 if post_id % 2 else 1.0) for post_id in self.expected]
+        items.sort(key=lambda item: (item[1], item[0]), reverse=True)
+        paginator = KeysetPaginator(ordering=('score', 'id'))
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginator.paginate_sequence(
+                items, self.request(cursor=cursor, page_size=3), key=lambda item: (item[1], item[0])
+            )
+            seen.extend(page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, items)
+
+    def test_malformed_cursor_is_rejected(self):
+        paginator = KeysetPaginator()
+        for cursor in ('не-курсор', 'WzFd'):  # WzFd - курсор з одним значенням замість двох
+            with self.assertRaises(ValidationError):
+                paginator.paginate_queryset(Post.objects.all(), self.request(cursor=cursor))
+
+
+class SearchPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='searcher@example.com', display_name='searcher', password='pass12345'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_tied_ranks_are_paged_without_gaps_or_duplicates(self):
+        # Однаковий текст - однаковий rank у всіх постів, тож межі сторінок проходять усередині групи рівних
+        expected = {
+            Post.objects.create(author=self.user, content='однаковий текст для пошуку').id
+            for _ in range(7)
+        }
+        Post.objects.create(author=self.user, content='інший пост')
+
+        seen = []
+        cursor = None
+        while True:
+            params = {'query': 'однаковий', 'type': 'posts', 'page_size': 2}
+            if cursor:
+                params['posts_cursor'] = cursor
+            response = self.client.get(reverse('search'), params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(post['id'] for post in response.data['posts'])
+            cursor = response.data['posts_next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), expected)
+        self.assertEqual(response.data['metadata']['total_posts'], 7)
+
+
+class LikeCountersTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(
+            email='likes_author@example.com', display_name='likes_author', password='TestPassword123!'
+        )
+        self.fans = [
+            CustomUser.objects.create_user(
+                email=f'likes_fan{i}@example.com', display_name=f'likes_fan{i}', password='TestPassword123!'
+            )
+            for i in range(3)
+        ]
+        self.post = Post.objects.create(author=self.author, content='Пост для лайків')
+        for fan in self.fans:
+            Like.objects.create(user=fan, post=self.post)
+        Comment.objects.create(post=self.post, author=self.fans[0], content='коментар')
+
+    def test_likes_update_post_and_author_counters(self):
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (3, 1))
+
+        Like.objects.get(user=self.fans[1], post=self.post).delete()
+        flush_author_likes()
+        self.post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        self.assertEqual(self.author.total_likes, 2)
+        self.assertFalse(AuthorLikesDelta.objects.exists())
+
+    def test_deleting_liker_adjusts_counters_in_bulk(self):
+        self.fans[0].delete()
+        flush_author_likes()
+        self.post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (2, 0))
+        self.assertEqual(self.author.total_likes, 2)
+
+    def test_deleting_post_discounts_its_likes_in_one_change(self):
+        flush_author_likes()
+        self.post.delete()
+        self.assertEqual(list(AuthorLikesDelta.objects.values_list('author_id', 'delta')), [(self.author.id, -3)])
+        flush_author_likes()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.total_likes, 0)
+
+
+class AuthorLikesFlushTest(TestCase):
+    def setUp(self):
+        self.authors = [
+            CustomUser.objects.create_user(
+                email=f'flush_author_{i}@example.com', display_name=f'flush_author_{i}', password='TestPassword123!'
+            )
+            for i in range(3)
+        ]
+
+    def total_likes(self):
+        return [user.total_likes for user in CustomUser.objects.filter(pk__in=[a.pk for a in self.authors]).order_by('pk')]
+
+    def test_large_change_is_split_into_rows_that_fit(self):
+        first, second = self.authors[:2]
+        record_author_likes_changes({first.id: 2 * AUTHOR_LIKES_DELTA_LIMIT + 5, second.id: -AUTHOR_LIKES_DELTA_LIMIT - 1})
+        deltas = list(AuthorLikesDelta.objects.order_by('id').values_list('author_id', 'delta'))
+        self.assertEqual(deltas, [
+            (first.id, AUTHOR_LIKES_DELTA_LIMIT), (first.id, AUTHOR_LIKES_DELTA_LIMIT), (first.id, 5),
+            (second.id, -AUTHOR_LIKES_DELTA_LIMIT), (second.id, -1),
+        ])
+        CustomUser.objects.filter(pk=second.pk).update(total_likes=AUTHOR_LIKES_DELTA_LIMIT + 1)
+        flush_author_likes()
+        self.assertEqual(self.total_likes(), [2 * AUTHOR_LIKES_DELTA_LIMIT + 5, 0, 0])
+
+    def test_flush_in_batches_nets_changes_across_authors(self):
+        first, second, third = self.authors
+        for delta in (1, 1, -1, 1, -1, -1):
+            record_author_likes_changes({first.id: delta, second.id: 1, third.id: delta})
+        record_author_likes_changes({third.id: 2})
+        # 19 змін пачками по 4: суми першого й третього автора обнуляються всередині пачок і між ними
+        self.assertEqual(flush_author_likes(batch_size=4), 19)
+        self.assertEqual(self.total_likes(), [0, 6, 2])
+        self.assertFalse(AuthorLikesDelta.objects.exists())
+        self.assertEqual(flush_author_likes(batch_size=4), 0)
+
+    def test_changes_of_deleted_author_are_dropped(self):
+        gone = self.authors[0]
+        record_author_likes_changes({gone.id: 3, self.authors[1].id: 2})
+        gone.delete()
+        # Рядки змін не мають обмеження в БД і переживають видалення автора
+        self.assertTrue(AuthorLikesDelta.objects.filter(author_id=gone.id).exists())
+        self.assertEqual(flush_author_likes(), 2)
+        self.assertFalse(AuthorLikesDelta.objects.exists())
+        self.assertEqual(CustomUser.objects.get(pk=self.authors[1].pk).total_likes, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HomeTimelineTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader, self.author, self.other = [
+            CustomUser.objects.create_user(
+                email=f'timeline_{name}@example.com', display_name=f'timeline_{name}', password='TestPassword123!'
+            )
+            for name in ('reader', 'author', 'other')
+        ]
+        self.reader.subscribe(self.author)
+        self.factory = RequestFactory()
+
+    def publish(self, author, content):
+        post = Post.objects.create(author=author, content=content)
+        distribute_post(post)
+        return post
+
+    def newest_first(self, *authors):
+        return list(
+            Post.objects.filter(author__in=authors).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def read_all(self, page_size):
+        paginator = KeysetPaginator(ordering=('created_at', 'post_id'))
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            page, cursor = read_home_timeline(self.reader, paginator, Request(self.factory.get('/', params)))
+            seen.extend(post_id for _, post_id in page)
+            if cursor is None:
+                return seen
+
+
+class HomeTimelineFanOutTest(HomeTimelineTestCase):
+    def test_posts_reach_author_and_followers_only(self):
+        for i in range(5):
+            self.publish(self.author, f'Post {i}')
+        self.publish(self.other, 'Пост автора без підписки')
+
+        self.assertEqual(self.read_all(page_size=2), self.newest_first(self.author))
+        self.assertEqual(TimelineEntry.objects.filter(user=self.author).count(), 5)
+
+    def test_subscribe_backfills_and_unsubscribe_removes_posts(self):
+        self.publish(self.author, 'Пост автора')
+        for i in range(3):
+            self.publish(self.other, f'Ранній пост {i}')
+
+        self.reader.subscribe(self.other)
+        self.assertEqual(self.read_all(page_size=2), self.newest_first(self.author, self.other))
+
+        self.reader.unsubscribe(self.other)
+        self.assertEqual(self.read_all(page_size=2), self.newest_first(self.author))
+
+    def test_timeline_is_trimmed_to_newest_entries(self):
+        for i in range(5):
+            self.publish(self.author, f'Post {i}')
+        trim_timelines([self.reader.id], max_length=3)
+        self.assertEqual(self.read_all(page_size=10), self.newest_first(self.author)[:3])
+
+
+class HomeTimelinePullMergeTest(HomeTimelineTestCase):
+    def setUp(self):
+        super().setUp()
+        # self.other стає автором з великою аудиторією: його пости не розсилаються, а підмішуються при читанні
+        followers = TIMELINE_FANOUT_MAX_FOLLOWERS + 1
+        CustomUser.objects.filter(pk=self.other.pk).update(subscribers_count=followers)
+        self.other.subscribers_count = followers
+        self.reader.subscribe(self.other)
+
+    def test_pull_author_posts_are_merged_in_order(self):
+        for i in range(4):
+            self.publish(self.author, f'Звичайний пост {i}')
+            self.publish(self.other, f'Пост популярного автора {i}')
+
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post__author=self.other).exists())
+        self.assertEqual(self.read_all(page_size=3), self.newest_first(self.author, self.other))
+
+    def test_unfollowed_pull_author_is_not_merged(self):
+        self.publish(self.author, 'Звичайний пост')
+        self.publish(self.other, 'Пост популярного автора')
+
+        self.reader.unsubscribe(self.other)
+        self.assertEqual(self.read_all(page_size=3), self.newest_first(self.author))
+
+
+class PullThresholdCrossingTest(HomeTimelineTestCase):
+    def set_followers(self, author, followers):
+        CustomUser.objects.filter(pk=author.pk).update(subscribers_count=followers)
+        author.subscribers_count = followers
+
+    def test_author_crossing_threshold_in_both_directions(self):
+        self.publish(self.author, 'Пост до порогу')
+        # Набір pull-авторів уже закешований без self.author
+        self.assertNotIn(self.author.id, get_pull_author_ids())
+
+        self.set_followers(self.author, TIMELINE_FANOUT_MAX_FOLLOWERS + 1)
+        pulled = self.publish(self.author, 'Пост після переходу на pull')
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post=pulled).exists())
+        self.assertIn(self.author.id, get_pull_author_ids())
+        self.assertEqual(self.read_all(page_size=2), self.newest_first(self.author))
+
+        self.set_followers(self.author, 1)
+        pushed = self.publish(self.author, 'Пост після повернення на push')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=pushed).exists())
+        self.assertNotIn(self.author.id, get_pull_author_ids())
+        # Пост, опублікований у режимі pull, дописується в стрічку при поверненні на push
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=pulled).exists())
+        self.assertEqual(self.read_all(page_size=2), self.newest_first(self.author))
+
+
+@mock.patch('posts.tasks.get_channel_layer', return_value=None)
+class OutboxDispatchTest(TestCase):
+    def test_events_are_sent_in_order_and_removed(self, get_channel_layer):
+        for i in range(3):
+            publish_event('notifications_1', {'type': 'send_notification', 'index': i})
+
+        sent = []
+
+        async def group_send_many(channel_layer, messages):
+            sent.extend(messages)
+
+        with mock.patch('posts.tasks.group_send_many', group_send_many):
+            dispatch_outbox_events(batch_size=2)
+
+        self.assertEqual([message['index'] for _, message in sent], [0, 1, 2])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failed_send_keeps_events_for_next_run(self, get_channel_layer):
+        publish_event('notifications_1', {'type': 'send_notification'})
+
+        async def group_send_many(channel_layer, messages):
+            raise ConnectionError
+
+        with mock.patch('posts.tasks.group_send_many', group_send_many), self.assertRaises(ConnectionError):
+            dispatch_outbox_events()
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    def test_rolled_back_event_is_not_stored(self, get_channel_layer):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            publish_event('notifications_1', {'type': 'send_notification'})
+            raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch('posts.tasks.NOTIFICATION_FANOUT_BATCH_SIZE', 2)
+@mock.patch('posts.tasks.get_channel_layer', return_value=None)
+class FanOutNewPostTaskTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Задачі, запущені через delay() з on_commit, виконуються одразу в процесі тесту
+        celery_conf = fan_out_new_post.app.conf
+        always_eager = celery_conf.task_always_eager
+        celery_conf.task_always_eager = True
+        self.addCleanup(setattr, celery_conf, 'task_always_eager', always_eager)
+
+        self.author = CustomUser.objects.create_user(
+            email='fanout_author@example.com', display_name='fanout_author', password='TestPassword123!'
+        )
+        self.subscribers = [
+            CustomUser.objects.create_user(
+                email=f'fanout_{i}@example.com', display_name=f'fanout_{i}', password='TestPassword123!'
+            )
+            for i in range(5)
+        ]
+        for subscriber in self.subscribers:
+            subscriber.subscribe(self.author)
+
+        self.sent_batches = []
+
+        async def group_send_many(channel_layer, messages):
+            self.sent_batches.append(messages)
+
+        patcher = mock.patch('posts.tasks.group_send_many', group_send_many)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_notifications_are_created_and_sent_per_chunk(self, get_channel_layer):
+        reader = self.subscribers[0]
+        self.assertEqual(get_unread_count(reader.id), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(author=self.author, content='Пост для підписників')
+
+        notifications = Notification.objects.filter(notification_type='new_post', post=post)
+        self.assertEqual(
+            sorted(notifications.values_list('recipient_id', flat=True)), sorted(user.id for user in self.subscribers)
+        )
+        # 5 підписників пачками по 2: три виклики group_send_many
+        self.assertEqual([len(batch) for batch in self.sent_batches], [2, 2, 1])
+        # Закешований лічильник скинуто і перераховано з БД
+        self.assertEqual(get_unread_count(reader.id), 1)
+
+    def test_missing_post_is_noop(self, get_channel_layer):
+        fan_out_new_post.delay(0)
+        self.assertFalse(Notification.objects.filter(notification_type='new_post').exists())
+        self.assertEqual(self.sent_batches, [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class UnreadNotificationsCountTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.actor = [
+            CustomUser.objects.create_user(
+                email=f'unread_{name}@example.com', display_name=f'unread_{name}', password='TestPassword123!'
+            )
+            for name in ('recipient', 'actor')
+        ]
+        self.post = Post.objects.create(author=self.user, content='Пост для лічильника')
+        self.key = UNREAD_COUNT_CACHE_KEY.format(user_id=self.user.id)
+        self.client.force_authenticate(self.user)
+
+    def notification(self, is_read=False):
+        return Notification(
+            recipient=self.user, actor=self.actor, notification_type='new_post', post=self.post, is_read=is_read
+        )
+
+    def unread_count(self):
+        response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.status_code, 200)
+        return response.data['unread_count']
+
+    def test_cache_miss_recomputes_from_database(self):
+        # bulk_create без сигналів: кеш про ці сповіщення не знає
+        Notification.objects.bulk_create([self.notification(), self.notification(), self.notification(is_read=True)])
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(self.unread_count(), 2)
+        self.assertEqual(cache.get(self.key), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notification().save()
+        self.assertEqual(self.unread_count(), 3)
+
+    def test_mark_read_and_mark_all_read_update_count(self):
+        first, second, third = Notification.objects.bulk_create([self.notification() for _ in range(3)])
+        self.assertEqual(self.unread_count(), 3)
+
+        self.client.post(reverse('mark-notification-read', args=[first.id]))
+        self.assertEqual(self.unread_count(), 2)
+        # Повторна позначка вже прочитаного не зменшує лічильник
+        self.client.post(reverse('mark-notification-read', args=[first.id]))
+        self.assertEqual(self.unread_count(), 2)
+
+        self.client.post(reverse('mark-all-notifications-read'))
+        self.assertEqual(cache.get(self.key), 0)
+        self.assertEqual(self.unread_count(), 0)
+
+    def test_negative_count_drops_cached_value(self):
+        Notification.objects.bulk_create([self.notification()])
+        cache.set(self.key, 0)
+        change_unread_count(self.user.id, -1)
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(self.unread_count(), 1)
+
+    def test_change_without_cached_value_is_ignored(self):
+        change_unread_count(self.user.id, 1)
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(self.unread_count(), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationCoalescingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = CustomUser.objects.create_user(
+            email='coalesce_author@example.com', display_name='coalesce_author', password='TestPassword123!'
+        )
+        self.actors = [
+            CustomUser.objects.create_user(
+                email=f'coalesce_actor{i}@example.com', display_name=f'coalesce_actor{i}', password='TestPassword123!'
+            )
+            for i in range(5)
+        ]
+        self.post = Post.objects.create(author=self.author, content='Пост для сповіщень')
+
+    def notify(self, actor):
+        return notify_coalesced(self.author, actor, 'new_comment', self.post)
+
+    def test_actions_on_same_post_are_merged(self):
+        first, second = self.actors[:2]
+        self.notify(first)
+        self.notify(second)
+        notification = self.notify(first)
+
+        self.assertEqual(Notification.objects.filter(recipient=self.author).count(), 1)
+        notification.refresh_from_db()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.sample_actor_ids, [first.id, second.id])
+        self.assertTrue(notification.push_pending)
+        self.assertEqual(
+            build_event(notification)['notification']['message'],
+            f"{first.display_name} та ще 1 залишили коментарі до вашого поста",
+        )
+
+    def test_sample_keeps_latest_actors_only(self):
+        for actor in self.actors:
+            notification = self.notify(actor)
+        notification.refresh_from_db()
+        self.assertEqual(notification.actor_count, len(self.actors))
+        self.assertEqual(
+            notification.sample_actor_ids,
+            [actor.id for actor in reversed(self.actors)][:NOTIFICATION_SAMPLE_ACTORS],
+        )
+
+    def test_read_or_expired_notification_is_not_reused(self):
+        read = self.notify(self.actors[0])
+        Notification.objects.filter(pk=read.pk).update(is_read=True)
+        expired = self.notify(self.actors[1])
+        Notification.objects.filter(pk=expired.pk).update(
+            timestamp=timezone.now() - NOTIFICATION_COALESCE_WINDOW - timedelta(minutes=1)
+        )
+        fresh = self.notify(self.actors[2])
+
+        self.assertEqual(len({read.pk, expired.pk, fresh.pk}), 3)
+        self.assertEqual(Notification.objects.filter(recipient=self.author).count(), 3)
+
+
+class NotificationPartitionDatesTest(SimpleTestCase):
+    def test_month_arithmetic_crosses_year_boundaries(self):
+        self.assertEqual(month_start(date(2026, 12, 31)), date(2026, 12, 1))
+        self.assertEqual(add_months(date(2026, 12, 1), 1), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2027, 1, 1), -1), date(2026, 12, 1))
+        self.assertEqual(add_months(date(2026, 3, 1), -27), date(2023, 12, 1))
+        self.assertEqual(add_months(date(2026, 3, 1), 0), date(2026, 3, 1))
+
+    def test_partition_name_and_bounds(self):
+        self.assertEqual(partition_name(date(2027, 1, 1)), 'posts_notification_y2027m01')
+        self.assertEqual(partition_bound(date(2026, 12, 1)), '2026-12-01T00:00:00+00:00')
+        # Верхня межа партиції - нижня межа наступної
+        self.assertEqual(partition_bound(add_months(date(2026, 12, 1), 1)), '2027-01-01T00:00:00+00:00')
+
+    def test_retention_cutoff_is_start_of_oldest_kept_month(self):
+        for today in (date(2026, 3, 1), date(2026, 3, 31), date(2027, 1, 15)):
+            cutoff = notification_retention_cutoff(today)
+            oldest = add_months(month_start(today), -NOTIFICATION_RETENTION_MONTHS)
+            self.assertEqual(cutoff, datetime(oldest.year, oldest.month, 1, tzinfo=dt_timezone.utc))
+            self.assertEqual(cutoff.isoformat(), partition_bound(oldest))
+        with mock.patch('posts.partitions.NOTIFICATION_RETENTION_MONTHS', 6):
+            self.assertEqual(notification_retention_cutoff(date(2026, 3, 31)), datetime(2025, 9, 1, tzinfo=dt_timezone.utc))
+
+
+class PostRankingParityTest(SimpleTestCase):
+    """
+    Векторна оцінка і вибір найкращих постів (posts.ranking) порівнюються з прямим підрахунком по одному посту.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.rng = rng
+        self.now = timezone.now()
+        self.tag_names = [f'#tag{i}' for i in range(12)] + [SPECIAL_HASHTAG]
+        n = 300
+        self.post_ids = np.arange(1, n + 1, dtype=np.int64) * 3
+        self.author_ids = rng.integers(1, 20, n)
+        self.likes_counts = rng.integers(0, 25, n)
+        self.created_at = np.array([
+            (self.now - timedelta(days=float(days))).timestamp() for days in rng.uniform(0, 14, n)
+        ])
+        self.post_tags = [
+            sorted(rng.choice(len(self.tag_names), size=rng.integers(0, 5), replace=False).tolist()) for _ in range(n)
+        ]
+        self.features = PostFeatures(
+            self.post_ids, self.author_ids, self.likes_counts, self.created_at,
+            np.array([row for row, tags in enumerate(self.post_tags) for _ in tags], dtype=np.int64),
+            np.array([tag for tags in self.post_tags for tag in tags], dtype=np.int64),
+        )
+
+    def reference_score(self, index, subscription_ids, user_tag_names, affinity):
+        post_tag_names = {self.tag_names[tag] for tag in self.post_tags[index]}
+        union = user_tag_names | post_tag_names
+        score = SUBSCRIPTION_WEIGHT * (self.author_ids[index] in subscription_ids)
+        score += HASHTAG_SIMILARITY_WEIGHT * (len(user_tag_names & post_tag_names) / len(union) if union else 0)
+        score += POPULARITY_WEIGHT * (self.likes_counts[index] > POPULAR_LIKES_THRESHOLD)
+        score += FRESHNESS_WEIGHT * (self.created_at[index] >= (self.now - FRESHNESS_PERIOD).timestamp())
+        score += SPECIAL_HASHTAG_WEIGHT * (SPECIAL_HASHTAG in post_tag_names)
+        score += COLLABORATIVE_WEIGHT * min(max(affinity[index], 0), 1)
+        return score
+
+    def test_vectorized_scores_match_per_post_formula(self):
+        subscription_ids = {2, 5, 11}
+        # Хештег '#unknown' є в профілі, але не в жодному пості: враховується лише в знаменнику
+        user_tag_names = {'#tag0', '#tag3', '#tag7', '#unknown'}
+        affinity = self.rng.uniform(-0.2, 1.2, len(self.post_ids))
+
+        scores = score_posts(
+            self.features,
+            np.array(sorted(subscription_ids), dtype=np.int64),
+            np.array([self.tag_names.index(name) for name in user_tag_names if name in self.tag_names]),
+            len(user_tag_names),
+            self.tag_names.index(SPECIAL_HASHTAG),
+            self.now,
+            affinity=affinity,
+        )
+
+        expected = [
+            self.reference_score(index, subscription_ids, user_tag_names, affinity)
+            for index in range(len(self.post_ids))
+        ]
+        np.testing.assert_allclose(scores, expected)
+
+    def test_top_k_matches_full_sort_with_ties(self):
+        # Оцінки з одним знаком після коми - багато рівних, порядок серед них визначає id
+        scores = np.round(self.rng.uniform(0, 1, len(self.post_ids)), 1)
+        exclude = self.rng.random(len(self.post_ids)) < 0.2
+        expected = sorted(
+            np.flatnonzero(~exclude).tolist(), key=lambda index: (scores[index], self.post_ids[index]), reverse=True
+        )
+
+        for k in (1, 7, 40, len(self.post_ids)):
+            self.assertEqual(top_k(scores, self.post_ids, k, exclude=exclude).tolist(), expected[:k])
+
+        last = expected[9]
+        after = (scores[last], self.post_ids[last])
+        self.assertEqual(top_k(scores, self.post_ids, 10, after=after, exclude=exclude).tolist(), expected[10:20])
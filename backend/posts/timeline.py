@@ -0,0 +1,196 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from users.models import CustomUser
+from .models import Post, TimelineEntry
+
+# Скільки останніх постів зберігається в домашній стрічці кожного користувача
+HOME_TIMELINE_MAX_LENGTH = getattr(settings, 'HOME_TIMELINE_MAX_LENGTH', 800)
+# Автори з більшою кількістю підписників не розсилають пости (push), їх пости підмішуються при читанні (pull)
+TIMELINE_FANOUT_MAX_FOLLOWERS = getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 10000)
+# Розмір пачки для bulk_create записів стрічки
+TIMELINE_WRITE_BATCH_SIZE = 1000
+# Скільки останніх постів автора, що повернувся з pull на push, дописується в стрічки підписників
+TIMELINE_REPUSH_MAX_POSTS = 50
+
+PULL_AUTHORS_CACHE_KEY = 'timeline:pull_authors:{max_followers}'
+# Набір лише читається з БД і скидається, коли автор перетинає поріг; термін обмежує вік набору,
+# закешованого читачем паралельно зі скиданням
+PULL_AUTHORS_CACHE_TIMEOUT = 60
+AUTHOR_POSTS_CACHE_KEY = 'timeline:author_posts:{author_id}'
+AUTHOR_POSTS_CACHE_TIMEOUT = 60 * 60
+
+
+def distribute_post(post, max_followers=TIMELINE_FANOUT_MAX_FOLLOWERS):
+    """
+    Розподіляє новий пост по домашніх стрічках.
+    Пост завжди потрапляє в стрічку автора. Підписникам він розсилається лише якщо
+    у автора не більше max_followers підписників, інакше він додається
+    в кеш останніх постів автора і підмішується в стрічки при читанні.
+    """
+    author = post.author
+    pull = is_pull_author(author, max_followers)
+    if pull != (author.id in get_pull_author_ids(max_followers)):
+        # Автор перетнув поріг: набір перерахується з БД при наступному читанні
+        cache.delete(PULL_AUTHORS_CACHE_KEY.format(max_followers=max_followers))
+    if pull:
+        push_post_to_timelines(post, [author.id])
+        add_to_author_posts_cache(post)
+        return
+    posts = [post]
+    if author.subscribers_count > max_followers // 2:
+        # Поблизу порогу автор міг щойно повернутися з pull: його пости, опубліковані в режимі pull,
+        # ще не розіслані і без дописування зникли б зі стрічок підписників
+        posts += undelivered_posts(author, exclude_post_id=post.id)
+    push_posts_to_timelines(posts, [author.id, *author.subscribers.values_list('id', flat=True)])
+
+
+def undelivered_posts(author, exclude_post_id, limit=TIMELINE_REPUSH_MAX_POSTS):
+    """
+    Останні пости автора, яких немає в жодній стрічці, крім його власної.
+    """
+    recent = list(Post.objects.filter(author=author).exclude(pk=exclude_post_id).order_by('-created_at', '-id')[:limit])
+    delivered = set(
+        TimelineEntry.objects.filter(post__in=recent).exclude(user=author).values_list('post_id', flat=True).distinct()
+    )
+    return [post for post in recent if post.id not in delivered]
+
+
+def is_pull_author(author, max_followers=TIMELINE_FANOUT_MAX_FOLLOWERS):
+    return author.subscribers_count > max_followers
+
+
+def get_pull_author_ids(max_followers=TIMELINE_FANOUT_MAX_FOLLOWERS):
+    """
+    Множина id авторів, чиї пости читаються через pull. Перераховується з БД при промаху кешу.
+    """
+    key = PULL_AUTHORS_CACHE_KEY.format(max_followers=max_followers)
+    pull_author_ids = cache.get(key)
+    if pull_author_ids is None:
+        pull_author_ids = set(
+            CustomUser.objects.filter(subscribers_count__gt=max_followers).values_list('id', flat=True)
+        )
+        cache.set(key, pull_author_ids, PULL_AUTHORS_CACHE_TIMEOUT)
+    return pull_author_ids
+
+
+def get_author_recent_posts(author_id, max_length=HOME_TIMELINE_MAX_LENGTH):
+    """
+    Останні пости автора як список (created_at, post_id) від новіших до старіших.
+    """
+    key = AUTHOR_POSTS_CACHE_KEY.format(author_id=author_id)
+    entries = cache.get(key)
+    if entries is None:
+        entries = list(
+            Post.objects.filter(author_id=author_id).order_by('-created_at', '-id').values_list('created_at', 'id')[:max_length]
+        )
+        cache.set(key, entries, AUTHOR_POSTS_CACHE_TIMEOUT)
+    return entries
+
+
+def add_to_author_posts_cache(post, max_length=HOME_TIMELINE_MAX_LENGTH):
+    key = AUTHOR_POSTS_CACHE_KEY.format(author_id=post.author_id)
+    entries = cache.get(key)
+    if entries is None:
+        # Кеш заповниться з БД при першому читанні, де новий пост вже є
+        return
+    entries = [(post.created_at, post.id), *[entry for entry in entries if entry[1] != post.id]]
+    cache.set(key, entries[:max_length], AUTHOR_POSTS_CACHE_TIMEOUT)
+
+
+def invalidate_author_posts_cache(author_id):
+    cache.delete(AUTHOR_POSTS_CACHE_KEY.format(author_id=author_id))
+
+
+def read_home_timeline(user, paginator, request):
+    """
+    Повертає сторінку домашньої стрічки як (список (created_at, post_id), next_cursor).
+    Записи, розіслані при записі, зливаються з останніми постами pull-авторів,
+    на яких підписаний користувач, з тим самим порядком (created_at, post_id) і курсором.
+    """
+    page_size = paginator.get_page_size(request)
+    cursor = paginator.get_cursor(request)
+
+    pushed = list(
+        paginator.filter_queryset(TimelineEntry.objects.filter(user=user), request)
+        .values_list('created_at', 'post_id')[:page_size + 1]
+    )
+
+    pulled = []
+    pull_author_ids = get_pull_author_ids()
+    if pull_author_ids:
+        followed = user.subscriptions.filter(id__in=pull_author_ids).values_list('id', flat=True)
+        for author_id in followed:
+            entries = get_author_recent_posts(author_id)
+            if cursor is not None:
+                entries = [entry for entry in entries if entry < tuple(cursor)]
+            pulled.extend(entries[:page_size + 1])
+
+    merged = {}
+    for entry in [*pushed, *pulled]:
+        merged[entry[1]] = entry
+    ordered = sorted(merged.values(), reverse=True)
+    return paginator.paginate_sequence(ordered, request, key=lambda entry: entry)
+
+
+def push_post_to_timelines(post, user_ids):
+    """
+    Fan-out on write: додає пост у домашні стрічки вказаних користувачів і обрізає їх.
+    """
+    push_posts_to_timelines([post], user_ids)
+
+
+def push_posts_to_timelines(posts, user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post.id, created_at=post.created_at)
+            for post in posts for user_id in user_ids
+        ],
+        batch_size=TIMELINE_WRITE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines(user_ids)
+
+
+def trim_timelines(user_ids, max_length=HOME_TIMELINE_MAX_LENGTH):
+    """
+    Видаляє записи стрічки, що виходять за межі max_length найновіших, одним запитом на вибірку.
+    """
+    overflow = TimelineEntry.objects.filter(user_id__in=user_ids).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[F('created_at').desc(), F('post_id').desc()],
+        )
+    ).filter(position__gt=max_length).values_list('id', flat=True)
+    overflow_ids = list(overflow)
+    if overflow_ids:
+        TimelineEntry.objects.filter(id__in=overflow_ids).delete()
+
+
+def backfill_timeline(user_id, author_ids, max_length=HOME_TIMELINE_MAX_LENGTH):
+    """
+    Додає в стрічку користувача останні пости авторів, на яких він щойно підписався.
+    Пости pull-авторів не копіюються: вони підмішуються при читанні.
+    """
+    author_ids = [author_id for author_id in author_ids if author_id not in get_pull_author_ids()]
+    if not author_ids:
+        return
+    recent_posts = Post.objects.filter(author_id__in=author_ids).order_by('-created_at', '-id').values_list('id', 'created_at')[:max_length]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at) for post_id, created_at in recent_posts],
+        batch_size=TIMELINE_WRITE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id], max_length)
+
+
+def remove_authors_from_timeline(user_id, author_ids):
+    """
+    Прибирає зі стрічки користувача пости авторів, від яких він відписався.
+    """
+    TimelineEntry.objects.filter(user_id=user_id, post__author_id__in=author_ids).delete()
@@ -6,7 +6,10 @@ from .views import (
                     CommentDetailView, 
                     RecommendedPostsView, 
                     RecentLikesView, 
+                    HomeTimelineView,
                     LikeView, 
+                    NotificationListView,
+                    UnreadNotificationsCountView,
                     MarkNotificationAsReadView, 
                     MarkAllNotificationsAsReadView
                 )
@@ -19,6 +22,7 @@ urlpatterns = [
     path('posts/<int:pk>/', PostDetailView.as_view(), name='post-detail'),  # Деталі поста
     
     path('posts/recomendations/post/', RecommendedPostsView.as_view(), name='post-recommendation'),  # Рекомендації
+    path('timeline/', HomeTimelineView.as_view(), name='home-timeline'),  # Пости від тих, на кого підписаний
 
     # Шляхи для коментарів
     path('posts/<int:post_id>/comments/', CommentListView.as_view(), name='comment-list'),  # Список всіх коментарів
@@ -31,6 +35,8 @@ urlpatterns = [
     path('posts/<int:post_id>/like/', LikeView.as_view(), name='post-like'),
 
     # Повідомлення для користувача несистемні  
+    path('notifications/', NotificationListView.as_view(), name='notification-list'),
+    path('notifications/unread-count/', UnreadNotificationsCountView.as_view(), name='notification-unread-count'),
     path('notifications/<int:notification_id>/read/', MarkNotificationAsReadView.as_view(), name='mark-notification-read'),
     path('notifications/read-all/', MarkAllNotificationsAsReadView.as_view(), name='mark-all-notifications-read'),
 ]
@@ -5,23 +5,25 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 from .models import Post, Comment, Like, PostImage, PostVideo, PostAudio, Notification
 from rest_framework import status
-from .serializers import PostSerializer, CommentSerializer
+from .serializers import PostSerializer, CommentSerializer, NotificationSerializer
+from .pagination import KeysetPaginator
+from ai.recommendations import get_post_recommendations
+from .timeline import read_home_timeline
+from .notifications import notify_coalesced, get_unread_count, change_unread_count, reset_unread_count
+from .partitions import notification_retention_cutoff
 
 from datetime import timedelta
 from django.utils.timezone import now
 from django.db import transaction
+from django.db.models import Prefetch
 from django.core.files.base import ContentFile
 import os
 import ffmpeg
 from django.core.files import File
 from django.core.files.storage import default_storage
 import tempfile
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 import logging
 from rest_framework.generics import ListAPIView
-from django.utils import timezone
-from nltk import jaccard_distance
 
 
 logger = logging.getLogger(__name__)
@@ -32,11 +34,14 @@ class PostListView(views.APIView):
 
     def get(self, request):
         """
-        Отримання списку всіх постів.
+        Отримання сторінки постів (від новіших до старіших).
+        Наступна сторінка запитується параметром ?cursor=<next_cursor>.
         """
-        posts = Post.objects.all().prefetch_related('hashtags', 'likes', 'post_comments', 'author')
-        serializer = PostSerializer(posts, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        posts = Post.objects.for_listing(request.user)
+        paginator = KeysetPaginator()
+        page, next_cursor = paginator.paginate_queryset(posts, request)
+        serializer = PostSerializer(page, many=True, context={'request': request})
+        return Response(paginator.get_paginated_data(serializer.data, next_cursor), status=status.HTTP_200_OK)
 
     def post(self, request):
         """
@@ -67,24 +72,14 @@ class PostListView(views.APIView):
             # Валідація даних поста (без медіа) через серіалайзер.
             serializer = PostSerializer(data=data, context={'request': request})
             if serializer.is_valid():
-                # Збереження поста (без файлів)
-                post = serializer.save(author=request.user)
-
-                # Якщо створено репост, створюємо повідомлення для автора оригінального поста
-                if original_post_object and request.user != original_post_object.author:
-                    Notification.objects.create(recipient=original_post_object.author, actor=request.user, notification_type='post_repost', post=original_post_object)
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        f"notifications_{original_post_object.author.id}",
-                        {
-                            "type": "send_notification",
-                            "notification": {
-                                "type": "post_repost",
-                                "message": f"{request.user.display_name} репостнув ваш пост",
-                                "post_id": original_post_object.id,
-                            }
-                        }
-                    )
+                # Збереження поста (без файлів) разом з оновленням лічильника репостів оригіналу
+                # і подією для автора оригіналу в одній транзакції
+                with transaction.atomic():
+                    post = serializer.save(author=request.user)
+
+                    # Якщо створено репост, створюємо повідомлення для автора оригінального поста
+                    if original_post_object and request.user != original_post_object.author:
+                        notify_coalesced(original_post_object.author, request.user, 'post_repost', original_post_object)
 
                 # Отримуємо файли і читаємо їх вміст, аби не зберігати файлові об'єкти в замиканні
                 images = request.FILES.getlist('images')
@@ -197,12 +192,13 @@ class CommentListView(APIView):
             # Перевіряємо чи існує пост
             post = Post.objects.get(pk=post_id)
             
-            # Створюємо коментар безпосередньо
-            comment = Comment.objects.create(
-                post=post,  # Використовуємо об'єкт поста замість post_id
-                author=request.user,
-                content=request.data.get('content')
-            )
+            # Створюємо коментар безпосередньо (лічильник коментарів оновлюється в тій самій транзакції)
+            with transaction.atomic():
+                comment = Comment.objects.create(
+                    post=post,  # Використовуємо об'єкт поста замість post_id
+                    author=request.user,
+                    content=request.data.get('content')
+                )
             
             serializer = CommentSerializer(comment)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -257,55 +253,30 @@ class CommentDetailView(APIView):
 class RecommendedPostsView(ListAPIView):
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        user = self.request.user
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-
-        # Отримуємо всі пости, які не були лайкнуті користувачем
-        posts = Post.objects.exclude(likes=user)
-
-        recommendations = []
-        for post in posts:
-            score = 0
-
-            # Критерій 1: Якщо пост опублікований користувачем, на якого підписаний юзер
-            if post.author in user.subscriptions.all():
-                score += 0.3
-
-            # Критерій 2: Якщо пост має спільні хештеги з користувачем
-            user_hashtags = set(user.hashtags.values_list('name', flat=True))
-            post_hashtags = set(post.hashtags.values_list('name', flat=True))
-
-            if user_hashtags and post_hashtags:
-                similarity = 1 - jaccard_distance(set(user_hashtags), set(post_hashtags))
-                if similarity > 0:
-                    score += 0.25 * similarity  # Додаємо до оцінки пропорційно до схожості
-
-            # Критерій 3: Якщо пост має велику кількість лайків
-            if post.likes.count() > 10:  # Приклад: більше 10 лайків
-                score += 0.2
-
-            # Критерій 4: Якщо пост був опублікований в межах 7 днів
-            if post.created_at >= timezone.now() - timedelta(days=7):
-                score += 0.15
-
-            # Критерій 5: Якщо в хештегах поста є слово #chort
-            if '#chort' in post_hashtags:
-                score += 0.1
-
-            # Додаємо пост і його оцінку до списку рекомендацій
-            recommendations.append((post, score))
-
-        # Сортуємо рекомендації за оцінкою від 1 до 0
-        recommendations.sort(key=lambda x: x[1], reverse=True)
-
-        # Повертаємо лише пости, без оцінок
-        return [post for post, score in recommendations]
-
     def get(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = PostSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        '''
+        Повертає сторінку рекомендованих постів за спаданням оцінки.
+        Список попередньо обчислюється задачею Celery (див. ai.tasks), наживо - лише для нових користувачів.
+        '''
+        items = get_post_recommendations(request.user)
+        # Пости, лайкнуті після обчислення списку, більше не рекомендуємо
+        liked = set(Like.objects.filter(
+            user=request.user, post_id__in=[post_id for post_id, _ in items]
+        ).values_list('post_id', flat=True))
+        items = [item for item in items if item[0] not in liked]
+
+        paginator = KeysetPaginator(ordering=('score', 'id'))
+        ranked, next_cursor = paginator.paginate_sequence(items, request, key=lambda item: (item[1], item[0]))
+
+        listed = Post.objects.for_listing(request.user).in_bulk([post_id for post_id, _ in ranked])
+        page = []
+        for post_id, score in ranked:
+            if post_id in listed:
+                post = listed[post_id]
+                post.recommendation_score = score
+                page.append(post)
+        serializer = PostSerializer(page, many=True, context={'request': request})
+        return Response(paginator.get_paginated_data(serializer.data, next_cursor), status=status.HTTP_200_OK)
 
 class RecentLikesView(APIView):
     permission_classes = [IsAuthenticated]
@@ -317,11 +288,30 @@ class RecentLikesView(APIView):
         recent_likes = Like.objects.filter(
             liked_at__gte=now() - timedelta(days=7),
             user=request.user
-        ).select_related('post')
-        
-        posts = [like.post for like in recent_likes]
+        ).prefetch_related(Prefetch('post', queryset=Post.objects.for_listing(request.user)))
+
+        paginator = KeysetPaginator(ordering=('liked_at', 'id'))
+        page, next_cursor = paginator.paginate_queryset(recent_likes, request)
+        posts = [like.post for like in page]
         serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(paginator.get_paginated_data(serializer.data, next_cursor), status=status.HTTP_200_OK)
+
+
+class HomeTimelineView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        '''
+        Повертає домашню стрічку: пости користувачів, на яких підписаний поточний користувач.
+        Читається з матеріалізованої стрічки одним діапазонним скануванням індексу,
+        пости авторів з дуже великою аудиторією підмішуються з кешу їхніх останніх постів.
+        '''
+        paginator = KeysetPaginator(ordering=('created_at', 'post_id'))
+        page, next_cursor = read_home_timeline(request.user, paginator, request)
+        listed = Post.objects.for_listing(request.user).in_bulk([post_id for created_at, post_id in page])
+        posts = [listed[post_id] for created_at, post_id in page if post_id in listed]
+        serializer = PostSerializer(posts, many=True, context={'request': request})
+        return Response(paginator.get_paginated_data(serializer.data, next_cursor), status=status.HTTP_200_OK)
 
 
 class LikeView(APIView):
@@ -332,38 +322,29 @@ class LikeView(APIView):
             post = Post.objects.get(pk=post_id)
             
             # Перевіряємо, чи користувач вже лайкнув цей пост
-            like, created = Like.objects.get_or_create(user=request.user, post=post)
-            
+            # Лайк, лічильник likes_count, зміна total_likes автора і сповіщення записуються в одній транзакції
+            with transaction.atomic():
+                like, created = Like.objects.get_or_create(user=request.user, post=post)
+                if not created:
+                    # Якщо лайк уже існує - видаляємо його (тобто "знімаємо" лайк)
+                    like.delete()
+                # Якщо лайк додано вперше, створюємо повідомлення для автора поста
+                # Переконуємося, що автор не став лайкати власний пост
+                elif request.user != post.author:
+                    # Сповіщення об'єднується з іншими лайками цього поста ("X та ще 12 лайкнули ваш пост"),
+                    # real-time відправку виконає диспетчер outbox після коміту
+                    notify_coalesced(post.author, request.user, 'post_like', post)
+            post.refresh_from_db(fields=['likes_count'])
+
             if not created:
-                # Якщо лайк уже існує - видаляємо його (тобто "знімаємо" лайк)
-                like.delete()
                 return Response({
                     "detail": "Лайк видалено",
-                    "likes_count": post.likes.count()
+                    "likes_count": post.likes_count
                 }, status=status.HTTP_200_OK)
-            
-            # Якщо лайк додано вперше, створюємо повідомлення для автора поста
-            # Переконуємося, що автор не став лайкати власний пост
-            if request.user != post.author:
-                # Створення запису повідомлення в базі даних
-                Notification.objects.create(recipient=post.author, actor=request.user, notification_type='post_like', post=post)
-                # Надсилання повідомлення через Channels (real-time сповіщення)
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f"notifications_{post.author.id}",
-                    {
-                        "type": "send_notification",
-                        "notification": {
-                            "type": "post_like",
-                            "message": f"{request.user.display_name} лайкнув ваш пост",
-                            "post_id": post.id,
-                        }
-                    }
-                )
-            
+
             return Response({
                 "detail": "Лайк додано",
-                "likes_count": post.likes.count()
+                "likes_count": post.likes_count
             }, status=status.HTTP_201_CREATED)
             
         except Post.DoesNotExist:
@@ -377,17 +358,47 @@ class LikeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+class NotificationListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        '''
+        Повертає сторінку вхідних сповіщень (від новіших до старіших) та кількість непрочитаних.
+        ?unread=true - лише непрочитані.
+        '''
+        # Обмеження по timestamp дає змогу читати лише партиції в межах періоду зберігання
+        notifications = Notification.objects.filter(
+            recipient=request.user, timestamp__gte=notification_retention_cutoff()
+        ).select_related('actor')
+        if request.query_params.get('unread') in ('1', 'true', 'True'):
+            notifications = notifications.filter(is_read=False)
+
+        paginator = KeysetPaginator(ordering=('timestamp', 'id'))
+        page, next_cursor = paginator.paginate_queryset(notifications, request)
+        serializer = NotificationSerializer(page, many=True, context={'request': request})
+        data = paginator.get_paginated_data(serializer.data, next_cursor)
+        data['unread_count'] = get_unread_count(request.user.id)
+        return Response(data, status=status.HTTP_200_OK)
+
+class UnreadNotificationsCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        '''
+        Кількість непрочитаних сповіщень для бейджа (з кешу, без COUNT по таблиці).
+        '''
+        return Response({"unread_count": get_unread_count(request.user.id)}, status=status.HTTP_200_OK)
+
 class MarkNotificationAsReadView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, notification_id):
-        try:
-            notification = Notification.objects.get(id=notification_id, recipient=request.user)
-        except Notification.DoesNotExist:
+        if not Notification.objects.filter(id=notification_id, recipient=request.user).exists():
             return Response({"error": "Повідомлення не знайдено."}, status=status.HTTP_404_NOT_FOUND)
 
-        notification.is_read = True
-        notification.save()
+        updated = Notification.objects.filter(id=notification_id, recipient=request.user, is_read=False).update(is_read=True)
+        if updated:
+            change_unread_count(request.user.id, -1)
 
         return Response({"message": "Повідомлення відзначене як прочитане."}, status=status.HTTP_200_OK)
 
@@ -397,4 +408,5 @@ class MarkAllNotificationsAsReadView(APIView):
     def post(self, request):
         notifications = Notification.objects.filter(recipient=request.user, is_read=False)
         notifications.update(is_read=True)
+        reset_unread_count(request.user.id)
         return Response({"message": "Усі повідомлення відзначені як прочитані."}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,109 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlAuditSink:
+    """
+    Асинхронний журнал аудиту у форматі JSONL (один JSON-об'єкт на рядок).
+
+    write() лише кладе запис у чергу і ніколи не чекає на диск: якщо черга переповнена,
+    запис відкидається (кількість відкинутих записується в журнал при наступному скиданні).
+    Фоновий потік збирає записи пачками (до batch_size або раз на flush_interval секунд),
+    дописує кожну пачку одним write і ротує файл, коли він перевищує max_bytes
+    (path -> path.1 -> ... -> path.backup_count).
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5, batch_size=500,
+                 flush_interval=1.0, queue_size=10000):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def write(self, record):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        # Потік і черга створюються в кожному процесі окремо: після fork (gunicorn, Celery) потоку батька немає
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._thread = threading.Thread(target=self._run, name='jsonl-audit-sink', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.close)
+
+    def close(self, timeout=5.0):
+        """
+        Дописує все, що лишилось у черзі, і зупиняє фоновий потік.
+        """
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                record = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                record = ...
+            if record is None:
+                self._flush(batch)
+                return
+            if record is not ...:
+                batch.append(record)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch):
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            batch = [*batch, {"event": "audit_records_dropped", "count": dropped}]
+        if not batch:
+            return
+        lines = ''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in batch)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as audit_file:
+                audit_file.write(lines)
+        except OSError:
+            # Журнал аудиту не повинен зупиняти фоновий потік: пачка втрачається, помилка логується
+            logger.warning("Не вдалося записати %s записів аудиту в %s", len(batch), self.path, exc_info=True)
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -42,6 +42,7 @@ INSTALLED_APPS = [       # коли створюєш нові додатки ї
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'rest_framework',
     'rest_framework.authtoken',
@@ -210,10 +211,93 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'ai.tasks.generate_recommendations_periodically',
         'schedule': crontab(hour=0, day_of_month=range(1, 32, 3)),
     },
+    # Позачерговий перерахунок рекомендацій, позначених застарілими після підписок, хештегів та ігнорування
+    'refresh-stale-recommendations-every-minute': {
+        'task': 'ai.tasks.refresh_stale_recommendations',
+        'schedule': 60.0,
+    },
+    # Страховка для outbox: відправляє події, якщо запуск диспетчера після коміту не вдалося запланувати
+    'dispatch-outbox-events-every-10-seconds': {
+        'task': 'posts.tasks.dispatch_outbox_events',
+        'schedule': 10.0,
+    },
+    # Перенавчання колаборативної моделі перед перерахунком рекомендацій
+    'train-collaborative-model-daily': {
+        'task': 'ai.tasks.train_collaborative_model',
+        'schedule': crontab(hour=23, minute=0),
+    },
+    'maintain-notification-partitions-daily': {
+        'task': 'posts.tasks.maintain_notification_partitions',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    # total_likes авторів відстає від лайків не більше ніж на цей інтервал
+    'flush-total-likes-every-30-seconds': {
+        'task': 'posts.tasks.flush_total_likes',
+        'schedule': 30.0,
+    },
 }
 
 FILE_UPLOAD_MAX_MEMORY_SIZE = 500 * 1024 * 1024
 
+# Скільки останніх постів зберігається в матеріалізованій домашній стрічці кожного користувача
+HOME_TIMELINE_MAX_LENGTH = 800
+# Автори з більшою кількістю підписників не розсилають пости по стрічках, а підмішуються при читанні
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10000
+# Розмір пачки при розсилці сповіщень про новий пост у Celery
+NOTIFICATION_FANOUT_BATCH_SIZE = 1000
+# Скільки подій outbox відправляється в channel layer за одну транзакцію диспетчера
+OUTBOX_DISPATCH_BATCH_SIZE = 500
+# Однотипні непрочитані сповіщення на один пост у межах цього вікна об'єднуються в одне
+NOTIFICATION_COALESCE_WINDOW_SECONDS = 60 * 60
+# Оновлення об'єднаного сповіщення відправляються по сокету не частіше, ніж раз на стільки секунд
+NOTIFICATION_PUSH_DEBOUNCE_SECONDS = 5
+
+# Сповіщення зберігаються в місячних партиціях; старші за цей період партиції видаляються щоденною задачею
+NOTIFICATION_RETENTION_MONTHS = 6
+# Каталог для архіву видалених партицій (стиснутий JSONL); None - видаляти без архіву
+NOTIFICATION_ARCHIVE_DIR = BASE_DIR / 'archive' / 'notifications'
+# Попередньо обчислені рекомендації: скільки постів і користувачів зберігати на користувача
+RECOMMENDED_POSTS_STORED = 200
+RECOMMENDED_USERS_STORED = 50
+PEOPLE_YOU_MAY_KNOW_STORED = 50
+# Ймовірність повернення блукання до користувача в personalized PageRank (users.friend_suggestions)
+PAGERANK_RESTART_PROBABILITY = 0.15
+# Скільки користувачів обробляє одна задача перерахунку рекомендацій
+RECOMMENDATION_BATCH_SIZE = 500
+# Скільки секунд граф підписок і лайків для рекомендацій користувачів тримається в пам'яті воркера
+SOCIAL_GRAPH_TTL = 5 * 60
+# Журнал аудиту рекомендацій користувачів (JSONL з ротацією за розміром), пишеться у фоновому потоці
+RECOMMENDATION_AUDIT_LOG = BASE_DIR / 'logs' / 'recommendations.jsonl'
+RECOMMENDATION_AUDIT_MAX_BYTES = 10 * 1024 * 1024
+RECOMMENDATION_AUDIT_BACKUP_COUNT = 5
+# Частка запитів, що потрапляють у журнал, і скільки найкращих кандидатів записується на запит
+RECOMMENDATION_AUDIT_SAMPLE_RATE = 0.1
+RECOMMENDATION_AUDIT_MAX_CANDIDATES = 20
+# Фактори колаборативної моделі (float32 .npy, відкриваються воркерами через memory map)
+COLLABORATIVE_MODEL_DIR = BASE_DIR / 'ml_models' / 'collaborative'
+COLLABORATIVE_FACTORS = 64
+# Конфігурація повнотекстового пошуку PostgreSQL ('simple' - без стемінгу, контент змішаний українською та англійською)
+SEARCH_CONFIG = 'simple'
+# Точна кількість результатів пошуку рахується до цього порогу, більші - оцінюються за планом запиту
+SEARCH_EXACT_COUNT_LIMIT = 1000
+# Скільки накопичених змін total_likes застосовується за одну транзакцію зливу
+TOTAL_LIKES_FLUSH_BATCH_SIZE = 10000
+# Скільки постів віддається разом із профілем користувача (решта - через profile/<id>/posts/)
+PROFILE_POSTS_PAGE_SIZE = 10
+# Підказки пошуку (pg_trgm): максимум результатів кожного типу і скільки секунд кешується відповідь на префікс
+AUTOCOMPLETE_MAX_RESULTS = 10
+AUTOCOMPLETE_CACHE_TIMEOUT = 30
+
+# Кеш має бути спільним для всіх процесів (gunicorn-воркери, Celery): лічильники непрочитаних сповіщень,
+# кеш стрічок і підказок змінюються в одному процесі, а читаються в інших. LocMem тут не підходить.
+# Той самий Redis уже потрібен як брокер Celery, кеш використовує окрему базу 1.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    }
+}
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -0,0 +1,66 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models.functions import Length
+from posts.models import Hashtag
+from .models import CustomUser, UserHashtag
+
+# Скільки підказок кожного типу повертається, мінімальна довжина запиту
+# (коротші рядки не мають жодної повної триграми, і індекс не допомагає)
+AUTOCOMPLETE_MAX_RESULTS = getattr(settings, 'AUTOCOMPLETE_MAX_RESULTS', 10)
+AUTOCOMPLETE_MIN_LENGTH = 2
+# Популярні префікси повторюються на кожне натискання клавіші, тому відповіді коротко кешуються
+AUTOCOMPLETE_CACHE_TIMEOUT = getattr(settings, 'AUTOCOMPLETE_CACHE_TIMEOUT', 30)
+AUTOCOMPLETE_CACHE_KEY = 'autocomplete:{digest}:{limit}'
+
+
+def complete(queryset, field, prefix, limit, fields):
+    """
+    До limit рядків, у яких значення field містить слово, схоже на prefix (оператор pg_trgm %>,
+    використовує GIN-індекс gin_trgm_ops). Найсхожіші й найкоротші йдуть першими.
+    """
+    return list(
+        queryset.filter(**{f'{field}__trigram_word_similar': prefix})
+        .annotate(similarity=TrigramWordSimilarity(prefix, field))
+        .order_by('-similarity', Length(field), 'id')
+        .values(*fields)[:limit]
+    )
+
+
+def autocomplete(prefix, limit=AUTOCOMPLETE_MAX_RESULTS):
+    """
+    Підказки для пошуку: користувачі (id, ім'я, шлях до аватара), хештеги постів і користувачів (id, назва).
+    """
+    prefix = prefix.strip().lower()
+    if len(prefix) < AUTOCOMPLETE_MIN_LENGTH:
+        return {"users": [], "hashtags": [], "user_hashtags": []}
+
+    key = AUTOCOMPLETE_CACHE_KEY.format(digest=hashlib.md5(prefix.encode('utf-8')).hexdigest(), limit=limit)
+    suggestions = cache.get(key)
+    if suggestions is not None:
+        return suggestions
+
+    users = complete(CustomUser.objects.all(), 'display_name', prefix, limit, ('id', 'display_name', 'photo'))
+    suggestions = {
+        "users": [
+            {
+                "id": user['id'],
+                "name": user['display_name'],
+                "avatar": default_storage.url(user['photo']) if user['photo'] else None,
+            }
+            for user in users
+        ],
+        "hashtags": [
+            {"id": hashtag['id'], "name": hashtag['name']}
+            for hashtag in complete(Hashtag.objects.all(), 'name', prefix, limit, ('id', 'name'))
+        ],
+        "user_hashtags": [
+            {"id": hashtag['id'], "name": hashtag['name']}
+            for hashtag in complete(UserHashtag.objects.all(), 'name', prefix, limit, ('id', 'name'))
+        ],
+    }
+    cache.set(key, suggestions, AUTOCOMPLETE_CACHE_TIMEOUT)
+    return suggestions
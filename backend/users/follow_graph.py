@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+from scipy import sparse
+from .models import CustomUser
+
+Subscriptions = CustomUser.subscriptions.through
+
+
+def binary_matrix(rows, cols, shape):
+    data = np.ones(len(rows), dtype=np.float64)
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=shape)
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+class FollowGraph:
+    """
+    Граф підписок у вигляді розрідженої матриці: follows[i, j] = 1, якщо user_ids[i] підписаний на user_ids[j].
+    Єдине представлення графа для фонових обчислень (users.recommendations, users.friend_suggestions).
+    user_ids відсортовані, тож позиції знаходяться бінарним пошуком (positions).
+    Граф - знімок на момент load(); перевірки, від яких залежить коректність відповіді
+    (стрічка, виключення кандидатів), робляться запитом до БД.
+    """
+
+    def __init__(self, user_ids, follows):
+        self.user_ids = user_ids
+        self.index = {user_id: position for position, user_id in enumerate(user_ids.tolist())}
+        self.follows = follows.tocsr()
+        self.follows.sort_indices()
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @classmethod
+    def load(cls):
+        user_ids = np.fromiter(CustomUser.objects.order_by('id').values_list('id', flat=True), dtype=np.int64)
+        pairs = np.array(
+            list(Subscriptions.objects.values_list('from_customuser_id', 'to_customuser_id')), dtype=np.int64
+        ).reshape(-1, 2)
+        positions = np.searchsorted(user_ids, pairs)
+        return cls(user_ids, binary_matrix(positions[:, 0], positions[:, 1], (len(user_ids), len(user_ids))))
+
+    def positions(self, user_ids):
+        return np.searchsorted(self.user_ids, np.fromiter(user_ids, dtype=np.int64))
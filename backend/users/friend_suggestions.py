@@ -0,0 +1,131 @@
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db.models import Count
+from .models import CustomUser
+from .follow_graph import FollowGraph
+
+# Ймовірність повернення випадкового блукання до користувача на кожному кроці (personalized PageRank)
+PAGERANK_RESTART_PROBABILITY = getattr(settings, 'PAGERANK_RESTART_PROBABILITY', 0.15)
+PAGERANK_MAX_ITERATIONS = 30
+PAGERANK_TOLERANCE = 1e-6
+# Скільки користувачів рахується одним множенням матриці на блок векторів
+# (блок - щільна матриця float32 розміром кількість користувачів x PAGERANK_BLOCK_SIZE)
+PAGERANK_BLOCK_SIZE = 32
+
+# Внесок нормованих оцінок у підсумкову: близькість за блуканнями та кількість спільних знайомих
+PAGERANK_WEIGHT = 0.6
+FRIENDS_OF_FRIENDS_WEIGHT = 0.4
+
+
+class FriendSuggester:
+    """
+    Пошук "людей, яких ви можете знати" на графі підписок (users.follow_graph.FollowGraph).
+    Для personalized PageRank зберігається транспонована матриця переходів (крок по випадковій підписці)
+    та маска користувачів без підписок, з яких блукання повертається до початкового користувача.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.user_ids = graph.user_ids
+        self.follows = graph.follows
+        out_degree = np.asarray(self.follows.sum(axis=1)).ravel()
+        self.dangling = out_degree == 0
+        inverse_degree = np.divide(1.0, out_degree, out=np.zeros(len(out_degree)), where=~self.dangling)
+        self.transition_t = (sparse.diags(inverse_degree) @ self.follows).T.tocsr().astype(np.float32)
+
+    def __len__(self):
+        return len(self.graph)
+
+    def personalized_pagerank(self, positions, restart=PAGERANK_RESTART_PROBABILITY,
+                              max_iterations=PAGERANK_MAX_ITERATIONS, tolerance=PAGERANK_TOLERANCE):
+        """
+        Стовпчик k результату (n x len(positions)) - стаціонарний розподіл блукання з поверненням,
+        що починається в positions[k]: r = restart * e + (1 - restart) * Tᵀ r,
+        маса з вершин без підписок теж повертається в e. Рахується степеневим методом для всього блоку одразу.
+        """
+        n, block = len(self), len(positions)
+        seeds = np.zeros((n, block), dtype=np.float32)
+        seeds[positions, np.arange(block)] = 1.0
+        ranks = seeds.copy()
+        for _ in range(max_iterations):
+            lost = ranks[self.dangling].sum(axis=0)
+            updated = restart * seeds + (1 - restart) * (self.transition_t @ ranks + seeds * lost)
+            change = np.abs(updated - ranks).sum(axis=0).max()
+            ranks = updated
+            if change < tolerance:
+                break
+        return ranks
+
+    def friends_of_friends(self, positions):
+        """
+        Рядок k (розріджений) - скільки людей, на яких підписаний positions[k], підписані на кожного користувача.
+        """
+        return (self.follows[positions] @ self.follows).tocsr()
+
+    def suggest(self, positions, limit, block_size=PAGERANK_BLOCK_SIZE):
+        """
+        Для кожної позиції - до limit пар (id користувача, оцінка) від найкращих.
+        Кандидати - друзі друзів та всі, кого досягає блукання; сам користувач і ті,
+        на кого він уже підписаний, відкидаються.
+        """
+        suggestions = []
+        for start in range(0, len(positions), block_size):
+            block = positions[start:start + block_size]
+            ranks = self.personalized_pagerank(block)
+            mutual = self.friends_of_friends(block)
+            for column, position in enumerate(block):
+                suggestions.append(self._top(position, ranks[:, column], mutual[column], limit))
+        return suggestions
+
+    def _top(self, position, rank, mutual, limit):
+        mutual = np.asarray(mutual.todense()).ravel()
+        excluded = np.zeros(len(self), dtype=bool)
+        excluded[position] = True
+        excluded[self.follows[position].indices] = True
+
+        candidates = np.flatnonzero(((rank > 0) | (mutual > 0)) & ~excluded)
+        if not len(candidates):
+            return []
+        rank, mutual = rank[candidates], mutual[candidates]
+        scores = (
+            PAGERANK_WEIGHT * rank / max(rank.max(), np.finfo(float).tiny)
+            + FRIENDS_OF_FRIENDS_WEIGHT * mutual / max(mutual.max(), 1)
+        )
+        if len(candidates) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            best = np.arange(len(candidates))
+        # Сортуємо за оцінкою від 1 до 0, при рівності - за id
+        best = best[np.lexsort((self.user_ids[candidates[best]], -scores[best]))]
+        return [(int(self.user_ids[candidates[i]]), float(scores[i])) for i in best]
+
+
+def suggest_people(user_ids, limit, graph=None):
+    """
+    "Люди, яких ви можете знати" для кількох користувачів: {user_id: [(id, оцінка), ...]}.
+    Користувачі, яких ще немає в графі, отримують порожній список.
+    """
+    if graph is None:
+        graph = FollowGraph.load()
+    known = [user_id for user_id in user_ids if user_id in graph.index]
+    positions = np.array([graph.index[user_id] for user_id in known], dtype=np.int64)
+    suggestions = dict(zip(known, FriendSuggester(graph).suggest(positions, limit)))
+    return {user_id: suggestions.get(user_id, []) for user_id in user_ids}
+
+
+def friends_of_friends(user, limit):
+    """
+    Швидкий варіант без графа в пам'яті: до limit пар (id користувача, оцінка) за кількістю спільних знайомих,
+    одним запитом до БД. Оцінка - лише внесок друзів друзів у формулу suggest_people.
+    """
+    rows = list(
+        CustomUser.objects.filter(subscribers__subscribers=user)
+        .exclude(id=user.id).exclude(subscribers=user)
+        .values('id').annotate(mutual=Count('subscribers'))
+        .order_by('-mutual', 'id').values_list('id', 'mutual')[:limit]
+    )
+    if not rows:
+        return []
+    most = rows[0][1]
+    return [(user_id, FRIENDS_OF_FRIENDS_WEIGHT * mutual / most) for user_id, mutual in rows]
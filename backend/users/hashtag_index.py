@@ -0,0 +1,98 @@
+import hashlib
+
+import numpy as np
+from django.db import transaction
+from .models import UserHashtagBucket
+
+# MinHash-підпис хештегу будується за множиною його символів.
+# LSH: підпис ділиться на LSH_BANDS смуг по LSH_ROWS значень; хештеги, у яких збігається хоча б одна смуга,
+# потрапляють в один кошик. Ймовірність стати кандидатом при схожості s: 1 - (1 - s^LSH_ROWS)^LSH_BANDS,
+# для s = 0.5 це ~98.4%, для s = 0.2 - ~10%, тож кошики відсікають більшість непотрібних порівнянь.
+LSH_BANDS = 64
+LSH_ROWS = 4
+MINHASH_PERMUTATIONS = LSH_BANDS * LSH_ROWS
+SIMILARITY_THRESHOLD = 0.5
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240501)
+_A = _rng.integers(1, _PRIME, size=MINHASH_PERMUTATIONS, dtype=np.int64)
+_B = _rng.integers(0, _PRIME, size=MINHASH_PERMUTATIONS, dtype=np.int64)
+
+
+def character_similarity(first, second):
+    """
+    Схожість Жаккара множин символів двох назв, обчислена так само, як 1 - nltk.jaccard_distance.
+    """
+    first, second = set(first), set(second)
+    union = len(first | second)
+    return 1 - (union - len(first & second)) / union
+
+
+def minhash_signature(name):
+    """
+    MinHash-підпис множини символів назви: для кожної з MINHASH_PERMUTATIONS хеш-функцій
+    (a * x + b) mod p - мінімум по кодах символів.
+    """
+    codes = np.fromiter((ord(char) for char in set(name)), dtype=np.int64)
+    if not len(codes):
+        return np.full(MINHASH_PERMUTATIONS, _PRIME, dtype=np.int64)
+    return ((_A[:, None] * codes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def band_keys(signature):
+    """
+    Ключі LSH-кошиків підпису: по одному 64-бітному ключу на смугу (номер смуги входить у ключ).
+    """
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(np.int64(band).tobytes() + rows.astype(np.int64).tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def index_hashtags(hashtags, bucket_model):
+    """
+    Рахує підписи для хештегів і замінює їхні кошики в індексі.
+    bucket_model передається явно, щоб функцію можна було використати і в міграції.
+    """
+    hashtags = list(hashtags)
+    if not hashtags:
+        return
+    buckets = []
+    for hashtag in hashtags:
+        signature = minhash_signature(hashtag.name)
+        hashtag.minhash = signature.tolist()
+        buckets.extend(bucket_model(hashtag_id=hashtag.id, key=key) for key in set(band_keys(signature)))
+
+    with transaction.atomic():
+        type(hashtags[0]).objects.bulk_update(hashtags, ['minhash'])
+        bucket_model.objects.filter(hashtag_id__in=[hashtag.id for hashtag in hashtags]).delete()
+        bucket_model.objects.bulk_create(buckets, batch_size=5000)
+
+
+def find_similar_hashtags(names, threshold=SIMILARITY_THRESHOLD):
+    """
+    Для кожної назви з names повертає {назва хештегу: схожість} хештегів користувачів,
+    схожих на неї щонайменше на threshold. Кандидати беруться зі спільних LSH-кошиків,
+    а схожість перевіряється точно, тож хибнопозитивних збігів немає.
+    """
+    keys_by_name = {name: band_keys(minhash_signature(name)) for name in set(names)}
+    all_keys = {key for keys in keys_by_name.values() for key in keys}
+    if not all_keys:
+        return {name: {} for name in keys_by_name}
+
+    candidates_by_key = {}
+    for key, candidate in UserHashtagBucket.objects.filter(key__in=all_keys).values_list('key', 'hashtag__name'):
+        candidates_by_key.setdefault(key, set()).add(candidate)
+
+    similar = {}
+    for name, keys in keys_by_name.items():
+        candidates = set().union(*(candidates_by_key.get(key, ()) for key in keys))
+        matches = {}
+        for candidate in candidates:
+            similarity = character_similarity(name, candidate)
+            if similarity >= threshold:
+                matches[candidate] = similarity
+        similar[name] = matches
+    return similar
@@ -0,0 +1,99 @@
+import time
+
+from django.core.management.base import BaseCommand
+from nltk.metrics import jaccard_distance
+from users.models import CustomUser
+from users import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Порівнює розріджений рушій рекомендацій користувачів з попереднім поштучним підрахунком "
+        "(запити на кожного кандидата): час на користувача та збіг оцінок."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5, help="Для скількох користувачів виконується вимір.")
+        parser.add_argument('--tolerance', type=float, default=1e-9, help="Допустима різниця оцінок.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        graph = recommendations.SocialGraph.load()
+        load_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f"Граф: {len(graph)} користувачів, {graph.follows.nnz} підписок, {graph.likes.nnz} лайків, "
+            f"завантажено за {load_ms:.0f} мс"
+        )
+        self.stdout.write(f"{'користувач':>10} {'кандидатів':>11} {'рушій, мс':>10} {'поштучно, мс':>13} {'розбіжностей':>13}")
+
+        for user in CustomUser.objects.order_by('?')[:options['users']]:
+            candidate_ids = [
+                user_id for user_id in recommendations.get_candidate_users(user).values_list('id', flat=True)
+                if user_id in graph.index
+            ]
+            candidates = [graph.index[user_id] for user_id in candidate_ids]
+
+            started = time.perf_counter()
+            scores, _ = graph.score(graph.index[user.id], candidates)
+            engine_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            expected = self.legacy_scores(user, CustomUser.objects.filter(id__in=candidate_ids))
+            legacy_ms = (time.perf_counter() - started) * 1000
+
+            mismatches = sum(
+                1 for user_id, score in zip(candidate_ids, scores.tolist())
+                if abs(expected[user_id] - score) > options['tolerance']
+            )
+            self.stdout.write(f"{user.id:>10} {len(candidate_ids):>11} {engine_ms:>10.1f} {legacy_ms:>13.1f} {mismatches:>13}")
+
+    def legacy_scores(self, user, candidates):
+        """
+        Попередня реалізація RecommendedUsersView: кілька запитів на кожного кандидата.
+        """
+        scores = {}
+        for potential_user in candidates:
+            score = 0
+
+            user_hashtags = set(user.hashtags.values_list('name', flat=True))
+            potential_user_hashtags = set(potential_user.hashtags.values_list('name', flat=True))
+            if user_hashtags and potential_user_hashtags:
+                similarity = 0
+                for user_hashtag in user_hashtags:
+                    for potential_user_hashtag in potential_user_hashtags:
+                        current_similarity = 1 - jaccard_distance(set(user_hashtag), set(potential_user_hashtag))
+                        if current_similarity > similarity:
+                            similarity = current_similarity
+                if similarity >= 0.5:
+                    score += 0.25 * similarity
+
+            common_subscriptions = user.subscriptions.filter(id__in=potential_user.subscriptions.all()).count()
+            if common_subscriptions > 0:
+                score += 0.25 * (common_subscriptions / user.subscriptions.count())
+
+            score += 0.35 * self.calculate_interactions(user, potential_user)
+
+            if self.calculate_interest_similarity(user, potential_user) > 0.7:
+                score += 0.15
+
+            scores[potential_user.id] = score
+        return scores
+
+    def calculate_interactions(self, user, potential_user):
+        total_interactions = (
+            user.likes.count() + user.comments.count() + user.posts.filter(original_post__isnull=False).count()
+        )
+        potential_interactions = (
+            potential_user.likes.count() + potential_user.comments.count()
+            + potential_user.posts.filter(original_post__isnull=False).count()
+        )
+        if total_interactions == 0:
+            return 0
+        return min(total_interactions, potential_interactions) / total_interactions
+
+    def calculate_interest_similarity(self, user, potential_user):
+        user_liked_posts = set(user.likes.values_list('post_id', flat=True))
+        potential_user_liked_posts = set(potential_user.likes.values_list('post_id', flat=True))
+        if not user_liked_posts or not potential_user_liked_posts:
+            return 0
+        return len(user_liked_posts & potential_user_liked_posts) / len(user_liked_posts)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from users.models import UserHashtag, UserHashtagBucket
+from users.hashtag_index import index_hashtags
+from posts.tasks import chunked
+
+
+class Command(BaseCommand):
+    help = (
+        "Перебудовує MinHash-підписи та LSH-кошики хештегів користувачів. "
+        "Потрібно після зміни параметрів індексу; нові хештеги індексуються автоматично."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Скільки хештегів індексується за раз.")
+        parser.add_argument('--missing-only', action='store_true', help="Індексувати лише хештеги без підпису.")
+
+    def handle(self, *args, **options):
+        hashtags = UserHashtag.objects.order_by('id')
+        if options['missing_only']:
+            hashtags = hashtags.filter(minhash__isnull=True)
+
+        indexed = 0
+        for batch in chunked(hashtags.iterator(chunk_size=options['batch_size']), options['batch_size']):
+            index_hashtags(batch, UserHashtagBucket)
+            indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Проіндексовано хештегів: {indexed}"))
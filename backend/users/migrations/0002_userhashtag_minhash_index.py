@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_hashtag_index(apps, schema_editor):
+    from users.hashtag_index import index_hashtags
+
+    UserHashtag = apps.get_model('users', 'UserHashtag')
+    UserHashtagBucket = apps.get_model('users', 'UserHashtagBucket')
+    index_hashtags(UserHashtag.objects.all(), UserHashtagBucket)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userhashtag',
+            name='minhash',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='UserHashtagBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='users.userhashtag')),
+            ],
+            options={
+                'unique_together': {('hashtag', 'key')},
+            },
+        ),
+        migrations.RunPython(build_hashtag_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    from users.search import update_user_search_vectors
+
+    CustomUser = apps.get_model('users', 'CustomUser')
+    ids = list(CustomUser.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), BACKFILL_BATCH_SIZE):
+        update_user_search_vectors(CustomUser.objects.filter(id__in=ids[start:start + BACKFILL_BATCH_SIZE]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_userhashtag_minhash_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='user_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:40
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_customuser_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='userhashtag',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='userhashtag_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['display_name'], name='user_display_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
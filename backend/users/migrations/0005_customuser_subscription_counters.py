@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def actual_count(model, field):
+    subquery = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(subquery), 0)
+
+
+def backfill_subscription_counts(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    Subscriptions = CustomUser.subscriptions.through
+    CustomUser.objects.update(
+        subscriptions_count=actual_count(Subscriptions, 'from_customuser'),
+        subscribers_count=actual_count(Subscriptions, 'to_customuser'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_trigram_indexes'),
+    ]
+
+    # Поля були оголошені в моделі, але перекриті властивостями з COUNT, тому в БД їх ще немає
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='subscriptions_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_subscription_counts, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import BaseUserManager
 from django.contrib.auth.hashers import make_password, check_password
 import os
@@ -21,6 +23,7 @@ def get_random_avatar():
 
 class UserHashtag(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    minhash = models.JSONField(null=True, blank=True)  # MinHash-підпис множини символів назви (див. users.hashtag_index)
 
     def __str__(self):
         return self.name
@@ -28,6 +31,20 @@ class UserHashtag(models.Model):
     class Meta:
         verbose_name = 'Хештег користувача'
         verbose_name_plural = 'Хештеги користувачів'
+        indexes = [
+            # Триграмний індекс для підказок під час введення (users.autocomplete)
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='userhashtag_name_trgm_idx'),
+        ]
+
+class UserHashtagBucket(models.Model):
+    """
+    LSH-кошик хештегу: хештеги зі спільним ключем - кандидати на схожість назв за символами.
+    """
+    hashtag = models.ForeignKey(UserHashtag, on_delete=models.CASCADE, related_name='lsh_buckets')
+    key = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        unique_together = ('hashtag', 'key')
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, display_name, password=None, **extra_fields):
@@ -44,6 +61,9 @@ class CustomUserManager(BaseUserManager):
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(email, display_name, password, **extra_fields)
 
+# Лічильники, які змінюються лише атомарними UPDATE (сигнали підписок, злив total_likes, reconcile_user_counters)
+COUNTER_FIELDS = {'subscriptions_count', 'subscribers_count', 'total_likes'}
+
 class CustomUser(models.Model):
     email = models.EmailField(unique=True)  # Унікальна електронна пошта для авторизації
     full_name = models.CharField(max_length=100, blank=True, null=True)  # ПІБ
@@ -52,8 +72,8 @@ class CustomUser(models.Model):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
-    subscriptions_count = models.PositiveIntegerField(default=0)  # Кількість підписок
-    subscribers_count = models.PositiveIntegerField(default=0)  # Кількість підписаних
+    subscriptions_count = models.PositiveIntegerField(default=0)  # Кількість підписок (оновлюється сигналом)
+    subscribers_count = models.PositiveIntegerField(default=0)  # Кількість підписаних (оновлюється сигналом)
     total_likes = models.PositiveIntegerField(default=0)  # Кількість лайків за весь час
     photo = models.ImageField(upload_to='profile_photos/', blank=True, null=True, default=get_random_avatar)  # Фото
     bio = models.TextField(blank=True, null=True)  # Коротке біо
@@ -61,6 +81,7 @@ class CustomUser(models.Model):
     objects = CustomUserManager()  # Використовуємо кастомний менеджер для створення користувачів
     subscriptions = models.ManyToManyField("self", symmetrical=False, blank=True, related_name="subscribers") # 
     ignored_users = models.ManyToManyField("self", symmetrical=False, blank=True, related_name="ignored_by")  # Додано поле для ігнорування
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)  # Для повнотекстового пошуку (users.search)
 
     REQUIRED_FIELDS = ['display_name', 'password']  # Вказуємо обов'язкові поля
     USERNAME_FIELD = 'email'  # Використовуємо email для автентифікації користувачів
@@ -72,20 +93,21 @@ class CustomUser(models.Model):
         """Підписка на користувача."""
         if user == self:
             raise Exception("Не можна підписатися на самого себе.")
+        # Лічильники атомарно оновлює сигнал m2m_changed (users.signals); save() тут затер би їх старими значеннями
         self.subscriptions.add(user)
-        self.subscriptions_count  # просто викликаємо, щоб оновити значення
-        self.save()
-        user.save()
+        self.refresh_subscription_counts(user)
 
     def unsubscribe(self, user):
         """Відписка з користувача."""
         if user == self:
             raise Exception("Не можна відписатися від самого себе.")
         self.subscriptions.remove(user)
-        self.subscriptions_count = self.subscriptions.count()  # оновлюємо кількість підписок
-        user.subscribers_count = user.subscribers.count()  # оновлюємо кількість підписаних
-        self.save()
-        user.save()
+        self.refresh_subscription_counts(user)
+
+    def refresh_subscription_counts(self, user):
+        """Підтягує з БД оновлені лічильники підписок обох користувачів."""
+        self.refresh_from_db(fields=['subscriptions_count', 'subscribers_count'])
+        user.refresh_from_db(fields=['subscriptions_count', 'subscribers_count'])
 
     def set_password(self, raw_password):
         """Хешуємо пароль."""
@@ -95,16 +117,6 @@ class CustomUser(models.Model):
         """Перевірка паролю."""
         return check_password(raw_password, self.password)
 
-    @property
-    def subscriptions_count(self):
-        """Повертає кількість користувачів, на яких підписаний даний користувач."""
-        return self.subscriptions.count()
-
-    @property
-    def subscribers_count(self):
-        """Повертає кількість користувачів, які підписані на даного користувача."""
-        return self.subscribers.count()
-
     @property
     def hashtagClass(self):
         return UserHashtag
@@ -152,6 +164,10 @@ class CustomUser(models.Model):
     class Meta:
         verbose_name = 'Користувач'
         verbose_name_plural = 'Користувачі'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='user_search_vector_idx'),
+            GinIndex(fields=['display_name'], opclasses=['gin_trgm_ops'], name='user_display_name_trgm_idx'),
+        ]
 
     def clean(self):
         # """Перевірка на кількість хештегів."""
@@ -161,6 +177,15 @@ class CustomUser(models.Model):
 
 
     def save(self, *args, **kwargs):
-        """Перевіряємо обмеження перед збереженням."""
+        """
+        Перевіряємо обмеження перед збереженням.
+        Повне збереження існуючого користувача не записує COUNTER_FIELDS: значення в екземплярі
+        могли застаріти і затерли б зміни, зроблені іншими транзакціями.
+        """
         self.full_clean()  # Викликає метод clean()
+        if not self._state.adding and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,252 @@
+import os
+import random
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+from social_network_project.audit import JsonlAuditSink
+from posts.models import Post, Comment, Like
+from .models import CustomUser
+from .hashtag_index import find_similar_hashtags
+from .follow_graph import FollowGraph, binary_matrix
+
+# Скільки рекомендованих користувачів показується
+RECOMMENDED_USERS_LIMIT = 15
+# Скільки секунд завантажений у пам'ять граф підписок і лайків використовується без перезавантаження
+SOCIAL_GRAPH_TTL = getattr(settings, 'SOCIAL_GRAPH_TTL', 5 * 60)
+
+# Ваги та пороги критеріїв рекомендації користувачів
+HASHTAG_SIMILARITY_WEIGHT = 0.25
+HASHTAG_SIMILARITY_THRESHOLD = 0.5  # Мінімум 50% схожості
+COMMON_SUBSCRIPTIONS_WEIGHT = 0.25
+INTERACTIONS_WEIGHT = 0.35
+INTEREST_SIMILARITY_WEIGHT = 0.15
+INTEREST_SIMILARITY_THRESHOLD = 0.7
+
+# Журнал аудиту рекомендацій: записується вибірково, не більше RECOMMENDATION_AUDIT_MAX_CANDIDATES
+# кандидатів на запит, у фоновому потоці (див. social_network_project.audit)
+RECOMMENDATION_AUDIT_SAMPLE_RATE = getattr(settings, 'RECOMMENDATION_AUDIT_SAMPLE_RATE', 0.1)
+RECOMMENDATION_AUDIT_MAX_CANDIDATES = getattr(settings, 'RECOMMENDATION_AUDIT_MAX_CANDIDATES', 20)
+
+audit_sink = JsonlAuditSink(
+    getattr(settings, 'RECOMMENDATION_AUDIT_LOG', os.path.join(settings.BASE_DIR, 'logs', 'recommendations.jsonl')),
+    max_bytes=getattr(settings, 'RECOMMENDATION_AUDIT_MAX_BYTES', 10 * 1024 * 1024),
+    backup_count=getattr(settings, 'RECOMMENDATION_AUDIT_BACKUP_COUNT', 5),
+)
+
+
+class SocialGraph:
+    """
+    Граф користувачів у вигляді розріджених матриць (рядок/стовпчик i - користувач user_ids[i]):
+    follows - матриця підписок графа follow_graph (users.follow_graph.FollowGraph);
+    likes[i, p] = 1, якщо i лайкнув пост p;
+    user_tags[i, t] = 1, якщо в i є хештег tag_names[t].
+    interactions[i] - сумарна кількість лайків, коментарів і репостів користувача i.
+    """
+
+    def __init__(self, follow_graph, likes, user_tags, tag_names, interactions):
+        self.follow_graph = follow_graph
+        self.user_ids = follow_graph.user_ids
+        self.index = follow_graph.index
+        self.follows = follow_graph.follows
+        self.likes = likes
+        self.user_tags = user_tags
+        self.tag_names = tag_names
+        self.tag_columns = {name: column for column, name in enumerate(tag_names)}
+        self.interactions = interactions
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @classmethod
+    def load(cls, follow_graph=None):
+        if follow_graph is None:
+            follow_graph = FollowGraph.load()
+        n = len(follow_graph)
+        positions = follow_graph.positions
+
+        like_pairs = np.array(list(Like.objects.values_list('user_id', 'post_id')), dtype=np.int64).reshape(-1, 2)
+        post_ids, post_columns = np.unique(like_pairs[:, 1], return_inverse=True)
+        likes = binary_matrix(positions(like_pairs[:, 0]), post_columns, (n, len(post_ids)))
+
+        UserHashtags = CustomUser.hashtags.through
+        tag_pairs = list(UserHashtags.objects.values_list('customuser_id', 'userhashtag__name'))
+        tag_names = sorted({name for _, name in tag_pairs})
+        tag_columns = {name: column for column, name in enumerate(tag_names)}
+        user_tags = binary_matrix(
+            positions(user_id for user_id, _ in tag_pairs),
+            np.array([tag_columns[name] for _, name in tag_pairs], dtype=np.int64),
+            (n, len(tag_names)),
+        )
+
+        # Сумарна кількість лайків, коментарів і репостів кожного користувача трьома агрегатними запитами
+        interactions = np.zeros(n, dtype=np.int64)
+        for queryset, field in (
+            (Like.objects.all(), 'user_id'),
+            (Comment.objects.all(), 'author_id'),
+            (Post.objects.filter(original_post__isnull=False), 'author_id'),
+        ):
+            counts = list(queryset.values(field).annotate(total=Count('id')).values_list(field, 'total'))
+            if counts:
+                counts = np.array(counts, dtype=np.int64)
+                np.add.at(interactions, positions(counts[:, 0]), counts[:, 1])
+
+        return cls(follow_graph, likes, user_tags, tag_names, interactions)
+
+    def hashtag_similarity(self, position):
+        """
+        Для кожного користувача - максимальна схожість Жаккара за множинами символів між будь-яким
+        хештегом користувача position та будь-яким його хештегом, якщо вона не менша за поріг, інакше 0.
+        Схожі хештеги шукаються через LSH-індекс (users.hashtag_index), а не перебором усіх пар.
+        """
+        similarity = np.zeros(len(self))
+        own_tags = [self.tag_names[column] for column in self.user_tags[position].indices]
+        if not own_tags:
+            return similarity
+
+        best_by_tag = np.zeros(len(self.tag_names))
+        for matches in find_similar_hashtags(own_tags, threshold=HASHTAG_SIMILARITY_THRESHOLD).values():
+            for name, value in matches.items():
+                column = self.tag_columns.get(name)
+                if column is not None and value > best_by_tag[column]:
+                    best_by_tag[column] = value
+
+        # Максимум по хештегах кожного рядка user_tags без перетворення матриці в щільну
+        values = best_by_tag[self.user_tags.indices]
+        rows_with_tags = np.flatnonzero(np.diff(self.user_tags.indptr))
+        if len(values):
+            similarity[rows_with_tags] = np.maximum.reduceat(values, self.user_tags.indptr[rows_with_tags])
+        return similarity
+
+    def score(self, position, candidates):
+        """
+        Оцінки кандидатів (масив позицій) для користувача position за тією ж формулою, що й раніше:
+        схожість хештегів, спільні підписки, взаємодії та схожість інтересів за лайкнутими постами.
+        Повертає (оцінки, складові оцінок за критеріями).
+        """
+        scores = np.zeros(len(candidates))
+
+        # Критерій 1: Використання хештегів
+        similarity = self.hashtag_similarity(position)[candidates]
+        hashtags = np.where(
+            similarity >= HASHTAG_SIMILARITY_THRESHOLD, HASHTAG_SIMILARITY_WEIGHT * similarity, 0.0
+        )
+        scores += hashtags
+
+        # Критерій 2: Спільні підписки - одним розрідженим добутком для всіх кандидатів
+        own_subscriptions = self.follows[position]
+        common = np.asarray((self.follows @ own_subscriptions.T).todense()).ravel()[candidates]
+        subscriptions = np.zeros(len(candidates))
+        if own_subscriptions.nnz:
+            subscriptions = np.where(common > 0, COMMON_SUBSCRIPTIONS_WEIGHT * (common / own_subscriptions.nnz), 0.0)
+        scores += subscriptions
+
+        # Критерій 3: Взаємодії (лайки, коментарі, репости)
+        own_interactions = self.interactions[position]
+        interactions = np.zeros(len(candidates))
+        if own_interactions:
+            ratio = np.minimum(own_interactions, self.interactions[candidates]) / own_interactions
+            interactions = INTERACTIONS_WEIGHT * ratio
+        scores += interactions
+
+        # Критерій 4: Схожість інтересів - частка лайкнутих постів, лайкнутих і кандидатом
+        own_likes = self.likes[position]
+        interests = np.zeros(len(candidates))
+        if own_likes.nnz:
+            overlap = np.asarray((self.likes @ own_likes.T).todense()).ravel()[candidates]
+            interests = np.where(overlap / own_likes.nnz > INTEREST_SIMILARITY_THRESHOLD, INTEREST_SIMILARITY_WEIGHT, 0.0)
+        scores += interests
+
+        criteria = {
+            "hashtag_similarity": hashtags,
+            "common_subscriptions": subscriptions,
+            "interactions": interactions,
+            "interest_similarity": interests,
+        }
+        return scores, criteria
+
+
+_graph = None
+
+
+def get_social_graph(required_user_id=None):
+    """
+    Повертає завантажений граф, перезавантажуючи його після SOCIAL_GRAPH_TTL
+    або якщо в ньому ще немає required_user_id (щойно зареєстрований користувач).
+    """
+    global _graph
+    if (
+        _graph is None
+        or time.monotonic() - _graph.loaded_at > SOCIAL_GRAPH_TTL
+        or (required_user_id is not None and required_user_id not in _graph.index)
+    ):
+        _graph = SocialGraph.load()
+    return _graph
+
+
+def get_candidate_users(user):
+    # Всі користувачі, окрім самого себе, тих, на яких підписаний, та ігнорованих
+    return CustomUser.objects.exclude(id=user.id).exclude(subscribers=user).exclude(ignored_users=user)
+
+
+def popular_users(user, limit=RECOMMENDED_USERS_LIMIT):
+    """
+    Швидкий варіант без графа в пам'яті: до limit пар (id користувача, оцінка) серед кандидатів
+    за кількістю підписників, одним запитом до БД. Оцінка нормована на найпопулярнішого кандидата.
+    """
+    rows = list(
+        get_candidate_users(user).filter(subscribers_count__gt=0)
+        .order_by('-subscribers_count', 'id').values_list('id', 'subscribers_count')[:limit]
+    )
+    if not rows:
+        return []
+    most = rows[0][1]
+    return [(user_id, subscribers_count / most) for user_id, subscribers_count in rows]
+
+
+def recommend_users(user, limit=RECOMMENDED_USERS_LIMIT, graph=None):
+    """
+    Рекомендації користувачів: до limit пар (id користувача, оцінка), від найкращих.
+    Кандидати, яких ще немає в завантаженому графі, пропускаються до його оновлення.
+    """
+    graph = graph or get_social_graph(required_user_id=user.id)
+    candidate_ids = [
+        user_id for user_id in get_candidate_users(user).values_list('id', flat=True) if user_id in graph.index
+    ]
+    if not candidate_ids:
+        return []
+    candidates = np.array([graph.index[user_id] for user_id in candidate_ids], dtype=np.int64)
+    scores, criteria = graph.score(graph.index[user.id], candidates)
+
+    # Сортуємо рекомендації за оцінкою від 1 до 0
+    best = np.argsort(-scores, kind='stable')[:limit]
+
+    audit_recommendations(user, [candidate_ids[position] for position in best], scores[best],
+                          {name: values[best] for name, values in criteria.items()})
+
+    return [(candidate_ids[position], float(scores[position])) for position in best]
+
+
+def audit_recommendations(user, recommended_ids, scores, criteria):
+    """
+    Записує в журнал аудиту частку RECOMMENDATION_AUDIT_SAMPLE_RATE запитів:
+    один рядок на запит з найкращими кандидатами та складовими їхніх оцінок.
+    """
+    if random.random() >= RECOMMENDATION_AUDIT_SAMPLE_RATE:
+        return
+    limit = RECOMMENDATION_AUDIT_MAX_CANDIDATES
+    audit_sink.write({
+        "timestamp": datetime.now(dt_timezone.utc).isoformat(),
+        "requesting_user": user.display_name,
+        "candidates": [
+            {
+                "recommended_user_id": user_id,
+                "score": float(score),
+                "criteria": {name: float(values[position]) for name, values in criteria.items()},
+            }
+            for position, (user_id, score) in enumerate(zip(recommended_ids[:limit], scores[:limit]))
+        ],
+    })
@@ -0,0 +1,22 @@
+from django.contrib.postgres.search import SearchVector
+from posts.search import SEARCH_CONFIG, related_names
+
+
+def user_search_vector(user_model):
+    # Ім'я та хештеги важать більше за ПІБ
+    return (
+        SearchVector('display_name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(
+            related_names(user_model.hashtags.through, 'customuser_id', 'userhashtag__name'),
+            weight='A',
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector('full_name', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_user_search_vectors(queryset):
+    """
+    Перераховує search_vector одним UPDATE для всіх користувачів queryset-у.
+    """
+    return queryset.update(search_vector=user_search_vector(queryset.model))
@@ -1,8 +1,14 @@
 from rest_framework import serializers
+from django.conf import settings
 from .models import CustomUser, UserHashtag
 from django.contrib.auth.password_validation import validate_password
+from posts.models import Post
+from posts.pagination import KeysetPaginator
 from posts.serializers import PostSerializer
 
+# Скільки постів віддається разом із профілем
+PROFILE_POSTS_PAGE_SIZE = getattr(settings, 'PROFILE_POSTS_PAGE_SIZE', 10)
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
@@ -51,13 +57,34 @@ class UserHashtagSerializer(serializers.ModelSerializer):
         fields = ['name']
 
 class UserProfileSerializer(serializers.ModelSerializer):
-    posts = PostSerializer(many=True, read_only=True)
+    # Лише перша сторінка постів з курсором; наступні - через UserPostsView (profile/<id>/posts/?cursor=...)
+    posts = serializers.SerializerMethodField()
     hashtags = UserHashtagSerializer(many=True, read_only=True)
 
+    def get_posts(self, obj):
+        request = self.context.get('request')
+        posts = Post.objects.filter(author=obj).for_listing(request.user if request else None)
+        paginator = KeysetPaginator(page_size=PROFILE_POSTS_PAGE_SIZE)
+        page, next_cursor = paginator.first_page(posts)
+        data = PostSerializer(page, many=True, context=self.context).data
+        return paginator.get_paginated_data(data, next_cursor)
+
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'email', 'full_name', 'display_name', 'bio', 'photo', 'hashtags', 'subscriptions_count', 'subscribers_count', 'total_likes', 'posts']
+        read_only_fields = ['id', 'subscriptions_count', 'subscribers_count', 'total_likes']
+
+
+class UserCardSerializer(serializers.ModelSerializer):
+    """
+    Компактна картка користувача для результатів пошуку (без постів).
+    """
+    hashtags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+
     class Meta:
         model = CustomUser
-        fields = ['email', 'full_name', 'display_name', 'bio', 'photo', 'hashtags', 'subscriptions_count', 'subscribers_count', 'total_likes', 'posts']
-        read_only_fields = ['subscriptions_count', 'subscribers_count', 'total_likes']
+        fields = ['id', 'display_name', 'full_name', 'photo', 'hashtags']
+        read_only_fields = fields
 
 
 class SubscribeSerializer(serializers.Serializer):
@@ -0,0 +1,80 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, m2m_changed
+from django.dispatch import receiver
+from .models import CustomUser, UserHashtag, UserHashtagBucket
+from .hashtag_index import index_hashtags
+from .search import update_user_search_vectors
+
+SEARCHABLE_USER_FIELDS = {'display_name', 'full_name'}
+
+
+@receiver(post_save, sender=UserHashtag)
+def index_new_hashtag(sender, instance, created, **kwargs):
+    # Новий хештег одразу додається в LSH-індекс; кошики видаленого хештегу видаляються каскадом
+    if created or instance.minhash is None:
+        transaction.on_commit(lambda: index_hashtags([instance], UserHashtagBucket))
+
+
+@receiver(post_save, sender=CustomUser)
+def update_user_search_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHABLE_USER_FIELDS.intersection(update_fields):
+        return
+    update_user_search_vectors(CustomUser.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=CustomUser.hashtags.through)
+def update_search_vector_on_hashtags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_user_search_vectors(CustomUser.objects.filter(pk=instance.pk))
+    elif pk_set:
+        update_user_search_vectors(CustomUser.objects.filter(pk__in=pk_set))
+
+
+def update_subscription_counts(pairs, delta):
+    """
+    Атомарно змінює subscriptions_count підписників і subscribers_count авторів на delta
+    для кожної пари (підписник, автор). Користувачі з однаковою зміною оновлюються одним UPDATE.
+    """
+    for field, counts in (
+        ('subscriptions_count', Counter(follower_id for follower_id, _ in pairs)),
+        ('subscribers_count', Counter(followed_id for _, followed_id in pairs)),
+    ):
+        user_ids_by_change = {}
+        for user_id, total in counts.items():
+            user_ids_by_change.setdefault(total, []).append(user_id)
+        for total, user_ids in user_ids_by_change.items():
+            # Сортування id дає однаковий порядок блокувань рядків у паралельних транзакціях
+            CustomUser.objects.filter(pk__in=sorted(user_ids)).update(
+                **{field: Greatest(F(field) + delta * total, 0)}
+            )
+
+
+def subscription_pairs(instance, reverse, pk_set):
+    if reverse:
+        return [(follower_id, instance.pk) for follower_id in pk_set]
+    return [(instance.pk, followed_id) for followed_id in pk_set]
+
+
+@receiver(m2m_changed, sender=CustomUser.subscriptions.through)
+def update_counts_on_subscription_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    post_add отримує лише справді додані id, а remove/clear - будь-які передані,
+    тому перед видаленням запам'ятовуємо пари, які справді існують.
+    """
+    if action == 'post_add' and pk_set:
+        update_subscription_counts(subscription_pairs(instance, reverse, pk_set), 1)
+    elif action in ('pre_remove', 'pre_clear'):
+        existing = sender.objects.filter(**{'to_customuser_id' if reverse else 'from_customuser_id': instance.pk})
+        if action == 'pre_remove':
+            existing = existing.filter(**{'from_customuser_id__in' if reverse else 'to_customuser_id__in': pk_set})
+        instance._removed_subscription_pairs = list(existing.values_list('from_customuser_id', 'to_customuser_id'))
+    elif action in ('post_remove', 'post_clear'):
+        pairs = instance.__dict__.pop('_removed_subscription_pairs', [])
+        if pairs:
+            update_subscription_counts(pairs, -1)
@@ -1,8 +1,17 @@
+import numpy as np
 from faker import Faker
 from django.core.management.color import no_style
 from django.db import connection
+from django.test import SimpleTestCase, TestCase
 from .persistent_test_case import PersistentTestCase
 from .models import CustomUser
+from .follow_graph import FollowGraph, binary_matrix
+from .hashtag_index import minhash_signature, band_keys, character_similarity
+from .friend_suggestions import FriendSuggester, PAGERANK_RESTART_PROBABILITY
+from .recommendations import (
+    SocialGraph, COMMON_SUBSCRIPTIONS_WEIGHT, INTERACTIONS_WEIGHT, INTEREST_SIMILARITY_WEIGHT,
+    INTEREST_SIMILARITY_THRESHOLD,
+)
 
 class UserPopulationTest(PersistentTestCase):
     def setUp(self):
@@ -59,4 +68,172 @@ class UserPopulationTest(PersistentTestCase):
 
         # Додатково можна вивести кількість створених користувачів
         total_users = CustomUser.objects.count()
-        print(f"Створено користувачів: {total_users}")
\ No newline at end of file
+        print(f"Створено користувачів: {total_users}")
+
+
+class SubscriptionCountersTest(TestCase):
+    def setUp(self):
+        self.follower = CustomUser.objects.create_user(
+            email='counter_follower@example.com', display_name='counter_follower', password='TestPassword123!'
+        )
+        self.author = CustomUser.objects.create_user(
+            email='counter_author@example.com', display_name='counter_author', password='TestPassword123!'
+        )
+
+    def test_subscribe_and_unsubscribe_update_both_counters(self):
+        self.follower.subscribe(self.author)
+        self.assertEqual((self.follower.subscriptions_count, self.author.subscribers_count), (1, 1))
+
+        self.follower.unsubscribe(self.author)
+        # Повторна відписка не повинна зробити лічильники від'ємними
+        self.follower.subscriptions.remove(self.author)
+        self.follower.refresh_subscription_counts(self.author)
+        self.assertEqual((self.follower.subscriptions_count, self.author.subscribers_count), (0, 0))
+
+    def test_full_save_does_not_overwrite_counters(self):
+        stale_author = CustomUser.objects.get(pk=self.author.pk)
+        self.follower.subscribe(self.author)
+
+        stale_author.bio = 'Оновлене біо'
+        stale_author.save()
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.bio, 'Оновлене біо')
+        self.assertEqual(self.author.subscribers_count, 1)
+
+
+def random_follow_graph(seed, n=40, density=0.12):
+    """
+    Випадковий граф підписок з розрідженими id користувачів і {id: множина id, на яких він підписаний}.
+    """
+    rng = np.random.default_rng(seed)
+    user_ids = np.sort(rng.choice(np.arange(1, 10 * n), size=n, replace=False)).astype(np.int64)
+    pairs = [(i, j) for i in range(n) for j in range(n) if i != j and rng.random() < density]
+    follows = binary_matrix([i for i, _ in pairs], [j for _, j in pairs], (n, n))
+    following = {int(user_id): set() for user_id in user_ids}
+    for i, j in pairs:
+        following[int(user_ids[i])].add(int(user_ids[j]))
+    return FollowGraph(user_ids, follows), following
+
+
+class FollowGraphTest(SimpleTestCase):
+    def setUp(self):
+        self.graph, self.following = random_follow_graph(seed=3)
+
+    def test_rows_match_pairs(self):
+        for user_id, followed in self.following.items():
+            position = self.graph.index[user_id]
+            row = self.graph.follows.indices[self.graph.follows.indptr[position]:self.graph.follows.indptr[position + 1]]
+            self.assertEqual(set(self.graph.user_ids[row].tolist()), followed)
+
+    def test_positions_follow_sorted_ids(self):
+        user_ids = list(self.following)
+        self.assertEqual(self.graph.positions(user_ids).tolist(), [self.graph.index[user_id] for user_id in user_ids])
+        self.assertEqual(len(self.graph), len(user_ids))
+
+
+class SocialGraphScoreParityTest(SimpleTestCase):
+    """
+    Оцінки кандидатів розрідженими добутками (SocialGraph.score) порівнюються з підрахунком по одному кандидату.
+    Хештегів у графі немає: їх схожість перевіряється окремо індексом LSH.
+    """
+
+    def setUp(self):
+        follow_graph, self.following = random_follow_graph(seed=5)
+        rng = np.random.default_rng(5)
+        n = len(follow_graph)
+        # Лайки з невеликого набору постів, щоб частина користувачів мала схожі інтереси
+        self.liked = [set(rng.choice(8, size=rng.integers(0, 6), replace=False).tolist()) for _ in range(n)]
+        likes = binary_matrix(
+            [row for row, posts in enumerate(self.liked) for _ in posts],
+            [post for posts in self.liked for post in posts],
+            (n, 8),
+        )
+        self.interactions = rng.integers(0, 30, n)
+        self.graph = SocialGraph(
+            follow_graph, likes, binary_matrix([], [], (n, 0)), [], self.interactions
+        )
+
+    def reference_score(self, position, candidate):
+        own_id, candidate_id = (int(self.graph.user_ids[index]) for index in (position, candidate))
+        score = 0.0
+        own_following = self.following[own_id]
+        common = len(own_following & self.following[candidate_id])
+        if own_following and common:
+            score += COMMON_SUBSCRIPTIONS_WEIGHT * common / len(own_following)
+        own_interactions = self.interactions[position]
+        if own_interactions:
+            score += INTERACTIONS_WEIGHT * min(own_interactions, self.interactions[candidate]) / own_interactions
+        own_likes = self.liked[position]
+        if own_likes and len(own_likes & self.liked[candidate]) / len(own_likes) > INTEREST_SIMILARITY_THRESHOLD:
+            score += INTEREST_SIMILARITY_WEIGHT
+        return score
+
+    def test_scores_match_per_candidate_formula(self):
+        for position in range(0, len(self.graph), 7):
+            candidates = np.array([index for index in range(len(self.graph)) if index != position])
+            scores, criteria = self.graph.score(position, candidates)
+            np.testing.assert_allclose(scores, [self.reference_score(position, index) for index in candidates])
+            np.testing.assert_allclose(scores, sum(criteria.values()))
+
+
+class FriendSuggesterParityTest(SimpleTestCase):
+    def setUp(self):
+        self.graph, self.following = random_follow_graph(seed=9, density=0.08)
+        self.suggester = FriendSuggester(self.graph)
+
+    def exact_pagerank(self, position, restart=PAGERANK_RESTART_PROBABILITY):
+        # Розв'язок r = restart * e + (1 - restart) * (Tᵀ r + e * сума r по вершинах без підписок)
+        n = len(self.graph)
+        seed = np.zeros(n)
+        seed[position] = 1.0
+        walk = self.suggester.transition_t.toarray().astype(np.float64) + np.outer(seed, self.suggester.dangling)
+        return np.linalg.solve(np.eye(n) - (1 - restart) * walk, restart * seed)
+
+    def test_power_iteration_matches_exact_solution(self):
+        positions = np.arange(0, len(self.graph), 5)
+        ranks = self.suggester.personalized_pagerank(positions, max_iterations=200)
+        for column, position in enumerate(positions):
+            np.testing.assert_allclose(ranks[:, column], self.exact_pagerank(position), atol=1e-4)
+            self.assertAlmostEqual(float(ranks[:, column].sum()), 1.0, places=4)
+
+    def test_suggestions_skip_self_and_followed(self):
+        user_ids = self.graph.user_ids.tolist()
+        positions = np.arange(len(self.graph))
+        mutual = self.suggester.friends_of_friends(positions).toarray()
+        for position, suggestions in zip(positions, self.suggester.suggest(positions, limit=10)):
+            user_id = user_ids[position]
+            for other, other_id in enumerate(user_ids):
+                expected = sum(1 for friend_id in self.following[user_id] if other_id in self.following[friend_id])
+                self.assertEqual(mutual[position, other], expected)
+            suggested = [suggested_id for suggested_id, _ in suggestions]
+            self.assertNotIn(user_id, suggested)
+            self.assertFalse(self.following[user_id] & set(suggested))
+            scores = [score for _, score in suggestions]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+
+
+class HashtagMinHashTest(SimpleTestCase):
+    # Стандартне відхилення оцінки з 256 перестановок не перевищує 0.032
+    TOLERANCE = 0.1
+    PAIRS = [
+        ('музика', 'музикант'), ('football', 'footballer'), ('travel', 'traveling'), ('python', 'pythonista'),
+        ('photo', 'photography'), ('art', 'artist'), ('guitar', 'guitarist'), ('travel', 'football'),
+    ]
+
+    def test_identical_character_sets_share_every_bucket(self):
+        for first, second in (('music', 'music'), ('listen', 'silent'), ('aab', 'bba')):
+            self.assertEqual(minhash_signature(first).tolist(), minhash_signature(second).tolist())
+            self.assertEqual(band_keys(minhash_signature(first)), band_keys(minhash_signature(second)))
+
+    def test_disjoint_character_sets_share_no_bucket(self):
+        for first, second in (('abc', 'xyz'), ('музика', 'football'), ('art', 'love')):
+            self.assertFalse(set(first) & set(second))
+            self.assertFalse(set(band_keys(minhash_signature(first))) & set(band_keys(minhash_signature(second))))
+
+    def test_signature_estimates_exact_jaccard(self):
+        for first, second in self.PAIRS:
+            exact = len(set(first) & set(second)) / len(set(first) | set(second))
+            self.assertAlmostEqual(character_similarity(first, second), exact)
+            estimate = float(np.mean(minhash_signature(first) == minhash_signature(second)))
+            self.assertLess(abs(estimate - exact), self.TOLERANCE, (first, second))
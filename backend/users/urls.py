@@ -10,9 +10,12 @@ from .views import (
                     SubscriptionsView, 
                     UserSubscriptionsView, 
                     UserProfileDetailView, 
+                    UserPostsView,
                     SearchView, 
+                    AutocompleteView,
                     GoogleAuthView,
                     RecommendedUsersView,
+                    PeopleYouMayKnowView,
                     IgnoreUserView
                     )
 from django.conf import settings
@@ -23,6 +26,7 @@ urlpatterns = [
     path('login/', UserLoginView.as_view(), name='user-login'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),  # Свій профіль
     path('profile/<int:pk>/', UserProfileDetailView.as_view(), name='user-profile-detail'),  # Чужий профіль  
+    path('profile/<int:pk>/posts/', UserPostsView.as_view(), name='user-posts'),  # Пости користувача сторінками
     path('logout/', UserLogoutView.as_view(), name='user-logout'),  # Вихід з акаунту
     path('delete/', UserDeleteView.as_view(), name='user-delete'),  # Видалення акаунту
     path('hashtags/', HashtagView.as_view(), name='hashtag-view'),
@@ -32,9 +36,11 @@ urlpatterns = [
     path('search/', SearchView.as_view(), name='search'),
     path('search/users/', SearchView.as_view(), name='search-users'),
     path('search/posts/', SearchView.as_view(), name='search-posts'),
+    path('search/autocomplete/', AutocompleteView.as_view(), name='search-autocomplete'),  # Підказки під час введення
     path('auth/google/', GoogleAuthView.as_view(), name='google-auth'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('users/Recommendation/', RecommendedUsersView.as_view(), name='Users-Recommendation'),
+    path('users/people-you-may-know/', PeopleYouMayKnowView.as_view(), name='people-you-may-know'),
     path('ignore/<int:user_id>/', IgnoreUserView.as_view(), name='ignore-user'),  # Додано маршрут для ігнорування
 ]
 
@@ -5,12 +5,16 @@ from rest_framework.views import APIView
 from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from .models import CustomUser
-from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer, SubscribeSerializer, GoogleAuthResponseSerializer
-from nltk.metrics import jaccard_distance
-from django.db.models import Q
+from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer, UserCardSerializer, SubscribeSerializer, GoogleAuthResponseSerializer
+from django.db.models import Exists, OuterRef
 from users.models import CustomUser
 from posts.models import Post
-from posts.serializers import PostSerializer
+from posts.serializers import PostSerializer, PostCardSerializer
+from posts.pagination import KeysetPaginator
+from posts.search import search_ranked, count_results
+from ai.recommendations import get_user_recommendations, get_people_recommendations
+from .recommendations import get_candidate_users, RECOMMENDED_USERS_LIMIT
+from .autocomplete import autocomplete, AUTOCOMPLETE_MAX_RESULTS
 from rest_framework_simplejwt.tokens import RefreshToken  
 import random  
 import string  
@@ -70,7 +74,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 
     def get(self, request, *args, **kwargs):
         """
-        Обробляє GET-запит і повертає профіль користувача разом із його постами.
+        Обробляє GET-запит і повертає профіль користувача разом із першою сторінкою його постів.
         """
         user = self.get_object()
         serializer = self.get_serializer(user)
@@ -84,7 +88,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
                 raise serializers.ValidationError({"password": "Пароль не може бути пустим"})
             
             user.set_password(password)
-            user.save()
+            user.save(update_fields=['password'])
             
         serializer.save()
 
@@ -100,6 +104,23 @@ class UserProfileDetailView(generics.GenericAPIView):
         return Response(serializer.data)
 
 
+class UserPostsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """
+        Пости користувача сторінками (від новіших до старіших), продовження списку з профілю.
+        Наступна сторінка запитується параметром ?cursor=<next_cursor>.
+        """
+        if not CustomUser.objects.filter(pk=pk).exists():
+            return Response({"message": "Користувача не знайдено"}, status=status.HTTP_404_NOT_FOUND)
+        posts = Post.objects.filter(author_id=pk).for_listing(request.user)
+        paginator = KeysetPaginator()
+        page, next_cursor = paginator.paginate_queryset(posts, request)
+        serializer = PostSerializer(page, many=True, context={'request': request})
+        return Response(paginator.get_paginated_data(serializer.data, next_cursor), status=status.HTTP_200_OK)
+
+
 # Вихід з акаунту (інвалідизація токену)
 class UserLogoutView(APIView):
     permission_classes = [IsAuthenticated]
@@ -215,30 +236,53 @@ class UserSubscribersView(APIView):
             return Response({"message": "Користувача не зндено"}, status=status.HTTP_404_NOT_FOUND)
 
 class SearchView(APIView):
+    """
+    Повнотекстовий пошук користувачів і постів через search_vector (GIN-індекс),
+    результати впорядковані за релевантністю (SearchRank). Порожній запит повертає найновіші.
+    Результати - компактні картки, кожен тип гортається своїм курсором (users_cursor, posts_cursor).
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        query = request.GET.get('query', '')
+        query = request.GET.get('query', '').strip()
         search_type = request.GET.get('type', 'all')
         response_data = {}
+        total_users = total_posts = 0
+        users_estimated = posts_estimated = False
         
         if search_type in ['all', 'users']:
-            users = CustomUser.objects.filter(Q(display_name__icontains=query) | Q(full_name__icontains=query) | Q(hashtags__name__icontains=query)).distinct()
+            users = search_ranked(CustomUser.objects.all(), query) if query else CustomUser.objects.all()
             
             hashtag_query = request.GET.get('user_hashtag')
             if hashtag_query:
-                users = users.filter(hashtags__name__icontains=hashtag_query)
-                
-            response_data['users'] = UserProfileSerializer(users, many=True, context={'request': request}).data
+                users = users.filter(Exists(CustomUser.hashtags.through.objects.filter(
+                    customuser_id=OuterRef('pk'), userhashtag__name__icontains=hashtag_query,
+                )))
+            
+            total_users, users_estimated = count_results(users)
+            paginator = KeysetPaginator(
+                ordering=('rank', 'id') if query else ('date_joined', 'id'), cursor_query_param='users_cursor'
+            )
+            page, next_cursor = paginator.paginate_queryset(users.prefetch_related('hashtags'), request)
+            response_data['users'] = UserCardSerializer(page, many=True, context={'request': request}).data
+            response_data['users_next_cursor'] = next_cursor
         
         if search_type in ['all', 'posts']:
-            posts = Post.objects.filter(Q(content__icontains=query) | Q(hashtags__name__icontains=query)).distinct()
+            posts = search_ranked(Post.objects.all(), query) if query else Post.objects.all()
             
             hashtag_query = request.GET.get('post_hashtag')
             if hashtag_query:
-                posts = posts.filter(hashtags__name__icontains=hashtag_query)
+                posts = posts.filter(Exists(Post.hashtags.through.objects.filter(
+                    post_id=OuterRef('pk'), hashtag__name__icontains=hashtag_query,
+                )))
                 
-            response_data['posts'] = PostSerializer(posts, many=True, context={'request': request}).data
+            total_posts, posts_estimated = count_results(posts)
+            paginator = KeysetPaginator(
+                ordering=('rank', 'id') if query else ('created_at', 'id'), cursor_query_param='posts_cursor'
+            )
+            page, next_cursor = paginator.paginate_queryset(posts.for_cards(request.user), request)
+            response_data['posts'] = PostCardSerializer(page, many=True, context={'request': request}).data
+            response_data['posts_next_cursor'] = next_cursor
         
         # Перевірка на відсутність результатів
         if (search_type == 'all' and not response_data.get('users') and not response_data.get('posts')) or (search_type == 'users' and not response_data.get('users')) or (search_type == 'posts' and not response_data.get('posts')):
@@ -252,16 +296,40 @@ class SearchView(APIView):
                 }
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Додавання метаданих про результати пошуку
+        # Додавання метаданих про результати пошуку; *_estimated - кількість приблизна (див. posts.search.count_results)
         response_data['metadata'] = {
             'query': query,
             'search_type': search_type,
-            'total_users': len(response_data.get('users', [])),
-            'total_posts': len(response_data.get('posts', [])),
+            'total_users': total_users,
+            'total_posts': total_posts,
+            'total_users_estimated': users_estimated,
+            'total_posts_estimated': posts_estimated,
         }
         
         return Response(response_data, status=status.HTTP_200_OK)
 
+class AutocompleteView(APIView):
+    """
+    Легкі підказки під час введення: лише id, ім'я та аватар, не більше limit кожного типу.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.GET.get('query', '')
+        try:
+            limit = min(int(request.GET.get('limit', AUTOCOMPLETE_MAX_RESULTS)), AUTOCOMPLETE_MAX_RESULTS)
+        except ValueError:
+            return Response({"message": "limit має бути цілим числом"}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"message": "limit має бути більшим за нуль"}, status=status.HTTP_400_BAD_REQUEST)
+
+        suggestions = autocomplete(query, limit)
+        users = [
+            {**user, "avatar": request.build_absolute_uri(user['avatar']) if user['avatar'] else None}
+            for user in suggestions['users']
+        ]
+        return Response({**suggestions, "users": users}, status=status.HTTP_200_OK)
+
 logger = logging.getLogger(__file__)
 
 def get_tokens_for_user(user):
@@ -380,7 +448,7 @@ class GoogleAuthView(GenericAPIView):
                 )
             if not user.is_active:
                 user.is_active = True
-                user.save()
+                user.save(update_fields=['is_active'])
             # Якщо потрібно, тут можна встановити прапорець google_auth_enabled, якщо така логіка потрібна
 
         serializer_data = self.response_serializer_class(user, context={"request": request}).data
@@ -391,109 +459,41 @@ class GoogleAuthView(GenericAPIView):
             "token": get_tokens_for_user(user),
         }, status=status.HTTP_200_OK)
 
-# Налаштування логування
-log_file_path = os.path.join(settings.BASE_DIR, 'logs', 'recommendations.log')
-os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
-
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-file_handler = logging.FileHandler(log_file_path)
-formatter = logging.Formatter('%(asctime)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-
 class RecommendedUsersView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-
-        # Отримуємо всіх користувачів, окрім самого себе, тих, на яких підписаний, та ігнорованих
-        users = CustomUser.objects.exclude(id=user.id).exclude(subscriptions=user).exclude(ignored_users=user)
-
-        recommendations = []
-        for potential_user in users:
-            score = 0
-
-            # Критерій 1: Використання хештегів
-            user_hashtags = set(user.hashtags.values_list('name', flat=True))
-            potential_user_hashtags = set(potential_user.hashtags.values_list('name', flat=True))
-            if user_hashtags and potential_user_hashtags:
-                # Порівняння хештегів за допомогою NLTK
-                similarity = 0
-                for user_hashtag in user_hashtags:
-                    for potential_user_hashtag in potential_user_hashtags:
-                        current_similarity = 1 - jaccard_distance(set(user_hashtag), set(potential_user_hashtag))
-                        if current_similarity > similarity:
-                            similarity = current_similarity
-                if similarity >= 0.5:  # Мінімум 50% схожості
-                    score += 0.25 * similarity
-
-            # Критерій 2: Спільні підписки
-            common_subscriptions = user.subscriptions.filter(id__in=potential_user.subscriptions.all()).count()
-            if common_subscriptions > 0:
-                score += 0.25 * (common_subscriptions / user.subscriptions.count())
-
-            # Критерій 3: Взаємодії (лайки, коментарі, репости)
-            interactions = self.calculate_interactions(user, potential_user)
-            score += 0.35 * interactions
-
-            # Критерій 4: Схожість інтересів
-            interest_similarity = self.calculate_interest_similarity(user, potential_user)
-            if interest_similarity > 0.7:
-                score += 0.15
-
-            # Логування рекомендацій у JSON форматі
-            log_data = {
-                "requesting_user": user.display_name,
-                "recommended_user": potential_user.display_name,
-                "score": score,
-                "criteria": {
-                    "hashtag_similarity": 0.25 * similarity if user_hashtags and potential_user_hashtags else 0,
-                    "common_subscriptions": 0.25 * (common_subscriptions / user.subscriptions.count()) if common_subscriptions > 0 else 0,
-                    "interactions": 0.35 * interactions,
-                    "interest_similarity": 0.15 if interest_similarity > 0.7 else 0
-                }
-            }
-            logger.info(json.dumps(log_data))
-
-            recommendations.append((potential_user, score))
-
-        # Сортуємо рекомендації за оцінкою від 1 до 0
-        recommendations.sort(key=lambda x: x[1], reverse=True)
-
-        # Повертаємо лише 15 користувачів з найвищими оцінками
-        recommended_users = [user for user, score in recommendations[:15]]
-        serializer = UserProfileSerializer(recommended_users, many=True, context={'request': request})
+        '''
+        Повертає користувачів з найвищими оцінками рекомендації.
+        Список попередньо обчислюється задачею Celery (див. ai.tasks), новим користувачам - популярні кандидати.
+        '''
+        items = get_user_recommendations(request.user)
+        # Відкидаємо тих, хто перестав бути кандидатом після обчислення списку (підписки, ігнор)
+        candidates = get_candidate_users(request.user).prefetch_related('hashtags').in_bulk(
+            [user_id for user_id, _ in items]
+        )
+        recommended_users = [candidates[user_id] for user_id, _ in items if user_id in candidates]
+        # Компактні картки без постів: список рендериться фіксованою кількістю запитів
+        serializer = UserCardSerializer(
+            recommended_users[:RECOMMENDED_USERS_LIMIT], many=True, context={'request': request}
+        )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    def calculate_interactions(self, user, potential_user):
-        # Логіка для обчислення взаємодій (лайки, коментарі, репости)
-        user_likes = user.likes.count()
-        potential_user_likes = potential_user.likes.count()
-        user_comments = user.comments.count()
-        potential_user_comments = potential_user.comments.count()
-        user_reposts = user.posts.filter(original_post__isnull=False).count()
-        potential_user_reposts = potential_user.posts.filter(original_post__isnull=False).count()
-
-        total_interactions = (user_likes + user_comments + user_reposts)
-        potential_interactions = (potential_user_likes + potential_user_comments + potential_user_reposts)
-
-        if total_interactions == 0:
-            return 0
-
-        return min(total_interactions, potential_interactions) / total_interactions
-
-    def calculate_interest_similarity(self, user, potential_user):
-        # Логіка для обчислення схожості інтересів на основі історії лайків
-        user_liked_posts = set(user.likes.values_list('id', flat=True))
-        potential_user_liked_posts = set(potential_user.likes.values_list('id', flat=True))
-
-        if not user_liked_posts or not potential_user_liked_posts:
-            return 0
+class PeopleYouMayKnowView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        intersection = user_liked_posts.intersection(potential_user_liked_posts)
-        return len(intersection) / len(user_liked_posts)
+    def get(self, request):
+        '''
+        "Люди, яких ви можете знати": друзі друзів та найближчі за personalized PageRank у графі підписок.
+        Список попередньо обчислюється задачею Celery (див. users.friend_suggestions, ai.tasks).
+        '''
+        items = get_people_recommendations(request.user)
+        candidates = get_candidate_users(request.user).in_bulk([user_id for user_id, _ in items])
+        people = [candidates[user_id] for user_id, _ in items if user_id in candidates]
+        serializer = UserCardSerializer(
+            people[:RECOMMENDED_USERS_LIMIT], many=True, context={'request': request}
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
 class IgnoreUserView(APIView):
     permission_classes = [IsAuthenticated]
@@ -1,5 +1,5 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from django.db import transaction
+from posts.outbox import publish_event
 from rest_framework.response import Response
 from voice_channels.models import Invitation, VoiceChannel
 from voice_channels.serializers import InvitationSerializer, VoiceChannelSerializer
@@ -109,21 +109,21 @@ class sendInvitationView(GenericAPIView):
             voice_channel = request.user.voice_chats.get(pk=pk)
             serializer = InvitationSerializer(data=request.data)
             if serializer.is_valid():
-                invitation = serializer.save(sender=request.user, voice_channel=voice_channel)
-
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f"notifications_{invitation.recipient.id}",
-                    {
-                        "type": "send_notification",
-                        "notification": {
-                            "type": "voice_invite",
-                            "message": f"{invitation.sender.display_name} запрошує вас в голосовий канал",
-                            "invitation_id": invitation.id,
-                            "channel_id": invitation.voice_channel.id
+                with transaction.atomic():
+                    invitation = serializer.save(sender=request.user, voice_channel=voice_channel)
+
+                    publish_event(
+                        f"notifications_{invitation.recipient.id}",
+                        {
+                            "type": "send_notification",
+                            "notification": {
+                                "type": "voice_invite",
+                                "message": f"{invitation.sender.display_name} запрошує вас в голосовий канал",
+                                "invitation_id": invitation.id,
+                                "channel_id": invitation.voice_channel.id
+                            }
                         }
-                    }
-                )
+                    )
                 return Response(InvitationSerializer(invitation).data, status=status.HTTP_201_CREATED)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
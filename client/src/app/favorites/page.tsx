@@ -46,7 +46,7 @@ export default function FavoritesPage() {
         }
 
         const data = await response.json();
-        setLikedPosts(data.reverse());
+        setLikedPosts(data.results);
       } catch (err) {
         setError(`Не вдалося отримати дані: ${err}`);
         if (err instanceof Error && err.message.includes('401')) {
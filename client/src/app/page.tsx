@@ -125,11 +125,11 @@ export default function Home() {
   );
 
   const handlePostsListTrigger = useCallback(async () => {
-    const postsListResponse: Post[] = await fetchData(
-      `${process.env.NEXT_PUBLIC_API_URL}/api/posts/posts/`,
-    );
+    const postsListResponse: { results: Post[]; next_cursor: string | null } =
+      await fetchData(`${process.env.NEXT_PUBLIC_API_URL}/api/posts/posts/`);
     if (postsListResponse) {
-      setPostsListToShow(postsListResponse.reverse());
+      // Бекенд повертає сторінку вже відсортованою від новіших до старіших
+      setPostsListToShow(postsListResponse.results);
       setTimeout(() => {
         window.scrollBy(0, 1); // Примусовий скрол (на 1 піксель вниз)
         window.scrollBy(0, -1); // Повернення назад
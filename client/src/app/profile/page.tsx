@@ -33,6 +33,7 @@ const Profile: React.FC = () => {
   const [easterEggCounter, setEasterEggCounter] = useState(0);
   const [isPostModalOpen, setIsPostModalOpen] = useState(false);
   const [selectedPost, setSelectedPost] = useState<Post | null>(null);
+  const [isLoadingMorePosts, setIsLoadingMorePosts] = useState(false);
 
   const handleLogout = () => {
     localStorage.removeItem('access_token');
@@ -146,6 +147,44 @@ const Profile: React.FC = () => {
     }
   };
 
+  const loadMorePosts = async () => {
+    const nextCursor = userData?.posts?.next_cursor;
+    if (!userData || !nextCursor || isLoadingMorePosts) return;
+    setIsLoadingMorePosts(true);
+    try {
+      const response = await fetchClient(
+        `${process.env.NEXT_PUBLIC_API_URL}/api/users/profile/${userData.id}/posts/?cursor=${encodeURIComponent(nextCursor)}`,
+        {
+          headers: {
+            'Content-Type': 'application/json',
+          },
+        },
+      );
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const page: { results: Post[]; next_cursor: string | null } =
+        await response.json();
+      setUserData((prev) =>
+        prev
+          ? {
+              ...prev,
+              posts: {
+                results: [...(prev.posts?.results || []), ...page.results],
+                next_cursor: page.next_cursor,
+              },
+            }
+          : null,
+      );
+    } catch (err) {
+      console.error('Error fetching more posts:', err);
+    } finally {
+      setIsLoadingMorePosts(false);
+    }
+  };
+
   const openOriginalPost = async (postId: number) => {
     try {
       const response = await fetchClient(
@@ -259,9 +298,10 @@ const Profile: React.FC = () => {
             )}
             <div className='mx-auto min-h-[85vh] w-[100%] max-w-[100%] rounded-[30px] border-[1px] border-white border-opacity-10 bg-opacity-70 bg-gradient-to-r from-[#414164] to-[#97A7E7] p-6 shadow-2xl backdrop-blur-xl'>
               <h4 className='mb-3 text-lg font-semibold'>Публікації</h4>
-              {userData.posts && userData.posts.length > 0 ? (
+              {userData.posts && userData.posts.results.length > 0 ? (
                 <div className='space-y-4'>
-                  {userData.posts.toReversed().map((post, key) => (
+                  {/* Бекенд повертає пости вже від новіших до старіших */}
+                  {userData.posts.results.map((post, key) => (
                     <div
                       key={key}
                       onClick={() => openOriginalPost(post.id)}
@@ -270,6 +310,18 @@ const Profile: React.FC = () => {
                       <MicroPost post={post} key={key} />
                     </div>
                   ))}
+                  {userData.posts.next_cursor && (
+                    <motion.button
+                      onClick={loadMorePosts}
+                      disabled={isLoadingMorePosts}
+                      className='h-12 w-full rounded-[20px] bg-[#5B6EAE] px-4 py-2 text-white hover:bg-[#6374B6] disabled:opacity-60'
+                      whileHover={{ scale: 1.02 }}
+                      whileTap={{ scale: 0.9 }}
+                      transition={{ type: 'spring', stiffness: 400, damping: 17 }}
+                    >
+                      {isLoadingMorePosts ? 'Завантаження...' : 'Показати ще'}
+                    </motion.button>
+                  )}
                 </div>
               ) : (
                 <p className='text-gray-400'>Немає публікацій</p>
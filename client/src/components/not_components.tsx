@@ -9,7 +9,8 @@ export interface UserData {
   subscriptions_count?: number;
   subscribers_count?: number;
   total_likes?: number;
-  posts?: Post[];
+  // Перша сторінка постів; наступні - з /api/users/profile/<id>/posts/?cursor=<next_cursor>
+  posts?: { results: Post[]; next_cursor: string | null };
   muted?: boolean;
   talks?: number;
 }